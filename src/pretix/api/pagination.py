@@ -0,0 +1,113 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from datetime import datetime
+from functools import reduce
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class CursorOrPageNumberPagination(PageNumberPagination):
+    """
+    Behaves like DRF's page number pagination by default. If the client passes the ``cursor`` query parameter
+    (it can be empty for the first page), keyset pagination is used instead: The result set is ordered by a
+    unique combination of fields, e.g. ``(datetime, id)``, and every page starts right after the last row of
+    the previous page. This neither requires an ``OFFSET`` nor a ``COUNT(*)`` query and is stable if new rows
+    are inserted while a client pages through the result set.
+
+    Views using this class need to define ``cursor_orderings``, a dictionary mapping values of the ``ordering``
+    query parameter to the tuple of fields used for the keyset. The last field of each tuple needs to be unique.
+    The first entry is used if the client does not request an ordering we support for cursors.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            self.cursor_mode = False
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_mode = True
+        self.request = request
+        page_size = self.get_page_size(request)
+        fields, descending = self._get_cursor_fields(request, view)
+
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            values = self._decode_cursor(cursor, len(fields))
+            try:
+                queryset = queryset.filter(self._keyset_filter(fields, values, descending))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+
+        queryset = queryset.order_by(*[('-' if descending else '') + f for f in fields])
+        page = list(queryset[:page_size + 1])
+        if len(page) > page_size:
+            page = page[:page_size]
+            self.next_cursor = self._encode_cursor([self._get_value(page[-1], f) for f in fields])
+        else:
+            self.next_cursor = None
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.cursor_mode:
+            return super().get_next_link()
+        if not self.next_cursor:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if not self.cursor_mode:
+            return super().get_previous_link()
+        return None
+
+    def _get_cursor_fields(self, request, view):
+        orderings = view.cursor_orderings
+        ordering = request.query_params.get('ordering', '').strip()
+        descending = ordering.startswith('-')
+        fields = orderings.get(ordering.lstrip('-'))
+        if not fields:
+            return next(iter(orderings.values())), False
+        return fields, descending
+
+    def _keyset_filter(self, fields, values, descending):
+        lookup = 'lt' if descending else 'gt'
+        qs = []
+        for i, f in enumerate(fields):
+            q = Q(**{'{}__{}'.format(f, lookup): values[i]})
+            for prev_f, prev_v in zip(fields[:i], values[:i]):
+                q &= Q(**{prev_f: prev_v})
+            qs.append(q)
+        return reduce(lambda a, b: a | b, qs)
+
+    def _get_value(self, obj, field):
+        for part in field.split('__'):
+            obj = getattr(obj, part)
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return obj
+
+    def _encode_cursor(self, values):
+        return urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def _decode_cursor(self, cursor, length):
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != length:
+            raise NotFound(self.invalid_cursor_message)
+        return values
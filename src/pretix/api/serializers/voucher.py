@@ -3,6 +3,7 @@ from rest_framework.exceptions import ValidationError
 
 from pretix.api.serializers.i18n import I18nAwareModelSerializer
 from pretix.base.models import Voucher
+from pretix.base.models.vouchers import generate_codes
 
 
 class VoucherListSerializer(serializers.ListSerializer):
@@ -11,15 +12,38 @@ class VoucherListSerializer(serializers.ListSerializer):
         errs = []
         err = False
         for voucher_data in validated_data:
-            if voucher_data['code'] in codes:
+            if voucher_data.get('code') and voucher_data['code'].upper() in codes:
                 err = True
                 errs.append({'code': ['Duplicate voucher code in request.']})
             else:
-                codes.add(voucher_data['code'])
+                if voucher_data.get('code'):
+                    codes.add(voucher_data['code'].upper())
                 errs.append({})
         if err:
             raise ValidationError(errs)
-        return super().create(validated_data)
+
+        missing = [d for d in validated_data if not d.get('code')]
+        for voucher_data, code in zip(missing, generate_codes(len(missing))):
+            voucher_data['code'] = code
+
+        objs = []
+        for voucher_data in validated_data:
+            voucher_data['code'] = voucher_data['code'].upper()
+            objs.append(Voucher(**voucher_data))
+        Voucher.objects.bulk_create(objs, batch_size=500)
+        Voucher.bulk_mark_quotas_dirty(objs)
+
+        event = self.context['event']
+        event.cache.set('vouchers_exist', True)
+
+        # We need to query them again as bulk_create does not fill in .pk values on databases other than
+        # PostgreSQL
+        all_codes = [o.code for o in objs]
+        created = {}
+        for i in range(0, len(all_codes), 500):  # Work around SQLite's SQLITE_MAX_VARIABLE_NUMBER
+            for v in event.vouchers.filter(code__in=all_codes[i:i + 500]):
+                created[v.code] = v
+        return [created[c] for c in all_codes]
 
 
 class VoucherSerializer(I18nAwareModelSerializer):
@@ -54,6 +78,15 @@ class VoucherSerializer(I18nAwareModelSerializer):
             ),
             creating=not self.instance
         )
+        if self.context.get('defer_batch_checks'):
+            # Quota availability and code uniqueness are checked for the whole batch at once by the caller
+            if check_quota:
+                Voucher.clean_quota_target(
+                    full_data, self.context.get('event'),
+                    full_data.get('quota'), full_data.get('item'), full_data.get('variation')
+                )
+            return data
+
         if check_quota:
             Voucher.clean_quota_check(
                 full_data, 1, self.instance, self.context.get('event'),
@@ -4,6 +4,7 @@ from django.dispatch import Signal, receiver
 from django.utils.timezone import now
 
 from pretix.api.models import WebHookCall
+from pretix.base.services.periodic import periodic
 from pretix.base.signals import periodic_task
 
 register_webhook_events = Signal(
@@ -17,5 +18,6 @@ instances.
 
 
 @receiver(periodic_task)
+@periodic(interval=timedelta(hours=1))
 def cleanup_webhook_logs(sender, **kwargs):
     WebHookCall.objects.filter(datetime__lte=now() - timedelta(days=30)).delete()
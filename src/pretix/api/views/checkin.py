@@ -3,6 +3,7 @@ from django.db.models import Count, F, Max, OuterRef, Prefetch, Q, Subquery
 from django.db.models.functions import Coalesce
 from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
 from django.utils.functional import cached_property
 from django.utils.timezone import now
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
@@ -11,6 +12,7 @@ from rest_framework.decorators import detail_route
 from rest_framework.fields import DateTimeField
 from rest_framework.response import Response
 
+from pretix.api.pagination import CursorOrPageNumberPagination
 from pretix.api.serializers.checkin import CheckinListSerializer
 from pretix.api.serializers.item import QuestionSerializer
 from pretix.api.serializers.order import OrderPositionSerializer
@@ -21,6 +23,7 @@ from pretix.base.services.checkin import (
     CheckInError, RequiredQuestionsError, perform_checkin,
 )
 from pretix.helpers.database import FixedOrderBy
+from pretix.helpers.http import event_generation, make_etag
 
 
 class CheckinListFilter(FilterSet):
@@ -78,6 +81,23 @@ class CheckinListViewSet(viewsets.ModelViewSet):
     @detail_route(methods=['GET'])
     def status(self, *args, **kwargs):
         clist = self.get_object()
+
+        headers = {}
+        generation = event_generation(clist.event)
+        if generation:
+            # Check-ins and order changes update Order.last_modified, changes to products clear the event cache.
+            etag = make_etag(
+                self.request.get_full_path(),
+                generation,
+                clist.event.orders.aggregate(m=Max('last_modified'))['m'],
+                clist.include_pending, clist.subevent_id, clist.all_products,
+                sorted(clist.limit_products.values_list('id', flat=True)) if not clist.all_products else None,
+            )
+            resp = get_conditional_response(self.request, etag=etag)
+            if resp is not None:
+                return resp
+            headers['ETag'] = etag
+
         cqs = Checkin.objects.filter(
             position__order__event=clist.event,
             position__order__status__in=[Order.STATUS_PAID] + ([Order.STATUS_PENDING] if clist.include_pending else []),
@@ -141,7 +161,7 @@ class CheckinListViewSet(viewsets.ModelViewSet):
                 })
             response['items'].append(i)
 
-        return Response(response)
+        return Response(response, headers=headers)
 
 
 class CheckinOrderPositionFilter(OrderPositionFilter):
@@ -176,6 +196,10 @@ class CheckinListPositionViewSet(viewsets.ReadOnlyModelViewSet):
         },
     }
 
+    pagination_class = CursorOrPageNumberPagination
+    cursor_orderings = {
+        'order__datetime': ('order__datetime', 'id'),
+    }
     filterset_class = CheckinOrderPositionFilter
     permission = 'can_view_orders'
     write_permission = 'can_change_orders'
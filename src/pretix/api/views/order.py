@@ -1,24 +1,29 @@
 import datetime
+from calendar import timegm
 
 import django_filters
 import pytz
 from django.db import transaction
-from django.db.models import F, Prefetch, Q
+from django.db.models import F, Max, Prefetch, Q
 from django.db.models.functions import Coalesce, Concat
-from django.http import FileResponse
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django.utils.timezone import make_aware, now
 from django_filters.rest_framework import DjangoFilterBackend, FilterSet
 from rest_framework import mixins, serializers, status, viewsets
-from rest_framework.decorators import detail_route
+from rest_framework.decorators import detail_route, list_route
 from rest_framework.exceptions import (
     APIException, NotFound, PermissionDenied, ValidationError,
 )
 from rest_framework.filters import OrderingFilter
 from rest_framework.mixins import CreateModelMixin
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 
 from pretix.api.models import OAuthAccessToken
+from pretix.api.pagination import CursorOrPageNumberPagination
 from pretix.api.serializers.order import (
     InvoiceSerializer, OrderCreateSerializer, OrderPaymentSerializer,
     OrderPositionSerializer, OrderRefundCreateSerializer,
@@ -38,8 +43,10 @@ from pretix.base.services.orders import (
     OrderChangeManager, OrderError, approve_order, cancel_order, deny_order,
     extend_order, mark_order_expired, mark_order_refunded,
 )
+from pretix.base.services.search import positions_matching
 from pretix.base.services.tickets import generate
 from pretix.base.signals import order_placed, register_ticket_outputs
+from pretix.helpers.http import event_generation, make_etag
 
 
 class OrderFilter(FilterSet):
@@ -59,10 +66,16 @@ class OrderViewSet(CreateModelMixin, viewsets.ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend, OrderingFilter)
     ordering = ('datetime',)
     ordering_fields = ('datetime', 'code', 'status', 'last_modified')
+    pagination_class = CursorOrPageNumberPagination
+    cursor_orderings = {
+        'datetime': ('datetime', 'id'),
+        'last_modified': ('last_modified', 'id'),
+    }
     filterset_class = OrderFilter
     lookup_field = 'code'
     permission = 'can_view_orders'
     write_permission = 'can_change_orders'
+    stream_chunk_size = 500
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -108,17 +121,56 @@ class OrderViewSet(CreateModelMixin, viewsets.ReadOnlyModelViewSet):
 
     def list(self, request, **kwargs):
         date = serializers.DateTimeField().to_representation(now())
+
+        # Every change to an order or its positions, payments, check-ins, … updates Order.last_modified, so
+        # we can answer repeated polls without running the actual query if nothing changed since.
+        headers = {'X-Page-Generated': date}
+        generation = event_generation(request.event)
+        if generation:
+            lmd = request.event.orders.aggregate(m=Max('last_modified'))['m']
+            lmd_ts = timegm(lmd.utctimetuple()) if lmd else None
+            etag = make_etag(request.get_full_path(), generation, lmd)
+            resp = get_conditional_response(request, etag=etag, last_modified=lmd_ts)
+            if resp is not None:
+                return resp
+            headers['ETag'] = etag
+            if lmd_ts:
+                headers['Last-Modified'] = http_date(lmd_ts)
+
         queryset = self.filter_queryset(self.get_queryset())
 
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
             resp = self.get_paginated_response(serializer.data)
-            resp['X-Page-Generated'] = date
+            for k, v in headers.items():
+                resp[k] = v
             return resp
 
         serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data, headers={'X-Page-Generated': date})
+        return Response(serializer.data, headers=headers)
+
+    @list_route(methods=['GET'])
+    def stream(self, request, **kwargs):
+        date = serializers.DateTimeField().to_representation(now())
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def _generate():
+            renderer = JSONRenderer()
+            last_pk = 0
+            while True:
+                # Fetching the orders in chunks keeps the memory usage bounded while still allowing us to
+                # prefetch all related objects for a whole chunk at once
+                chunk = list(queryset.filter(pk__gt=last_pk).order_by('pk')[:self.stream_chunk_size])
+                if not chunk:
+                    break
+                for o in self.get_serializer(chunk, many=True).data:
+                    yield renderer.render(o) + b'\n'
+                last_pk = chunk[-1].pk
+
+        resp = StreamingHttpResponse(_generate(), content_type='application/x-ndjson')
+        resp['X-Page-Generated'] = date
+        return resp
 
     @detail_route(url_name='download', url_path='download/(?P<output>[^/]+)')
     def download(self, request, output, **kwargs):
@@ -371,13 +423,7 @@ class OrderPositionFilter(FilterSet):
     search = django_filters.CharFilter(method='search_qs')
 
     def search_qs(self, queryset, name, value):
-        return queryset.filter(
-            Q(secret__istartswith=value)
-            | Q(attendee_name_cached__icontains=value)
-            | Q(addon_to__attendee_name_cached__icontains=value)
-            | Q(order__code__istartswith=value)
-            | Q(order__invoice_address__name_cached__icontains=value)
-        )
+        return queryset.filter(positions_matching(value))
 
     def has_checkin_qs(self, queryset, name, value):
         return queryset.filter(checkins__isnull=not value)
@@ -406,6 +452,10 @@ class OrderPositionViewSet(mixins.DestroyModelMixin, viewsets.ReadOnlyModelViewS
     filter_backends = (DjangoFilterBackend, OrderingFilter)
     ordering = ('order__datetime', 'positionid')
     ordering_fields = ('order__code', 'order__datetime', 'positionid', 'attendee_name', 'order__status',)
+    pagination_class = CursorOrPageNumberPagination
+    cursor_orderings = {
+        'order__datetime': ('order__datetime', 'id'),
+    }
     filterset_class = OrderPositionFilter
     permission = 'can_view_orders'
     write_permission = 'can_change_orders'
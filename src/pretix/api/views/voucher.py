@@ -1,19 +1,44 @@
+import codecs
 import contextlib
+import csv
+import json
 
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import F, Q
+from django.db.models.functions import Upper
+from django.http import StreamingHttpResponse
 from django.utils.timezone import now
 from django_filters.rest_framework import (
     BooleanFilter, DjangoFilterBackend, FilterSet,
 )
 from rest_framework import status, viewsets
 from rest_framework.decorators import list_route
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 
 from pretix.api.serializers.voucher import VoucherSerializer
-from pretix.base.models import Voucher
+from pretix.base.models import LogEntry, Quota, Voucher
+from pretix.base.services.locking import LockTimeoutException
+
+BATCH_IMPORT_CHUNK_SIZE = 500
+
+
+def _read_csv_rows(stream):
+    reader = csv.DictReader(codecs.iterdecode(stream or [], 'utf-8'))
+    for row in reader:
+        # Empty cells are treated like missing keys, such that the model defaults apply
+        yield {k: v for k, v in row.items() if k and v != ''}
+
+
+def _read_ndjson_rows(stream):
+    for line in codecs.iterdecode(stream or [], 'utf-8'):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
 
 
 class VoucherFilter(FilterSet):
@@ -124,12 +149,184 @@ class VoucherViewSet(viewsets.ModelViewSet):
             serializer.is_valid(raise_exception=True)
             with transaction.atomic():
                 serializer.save(event=self.request.event)
-                for i in serializer.instance:
+                LogEntry.objects.bulk_create([
                     i.log_action(
                         'pretix.voucher.added',
                         user=self.request.user,
                         auth=self.request.auth,
-                        data=self.request.data
+                        data=d,
+                        save=False
                     )
+                    for i, d in zip(serializer.instance, self.request.data)
+                ], batch_size=500)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
+
+    def _read_batch_rows(self, request):
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type == 'text/csv':
+            return _read_csv_rows(request.stream)
+        elif content_type == 'application/x-ndjson':
+            return _read_ndjson_rows(request.stream)
+        if not isinstance(request.data, list):
+            raise ValidationError('Expected a list of vouchers.')
+        return iter(request.data)
+
+    def _batch_existing_codes(self, codes):
+        codes = list(codes)
+        existing = set()
+        for i in range(0, len(codes), 500):  # Work around SQLite's SQLITE_MAX_VARIABLE_NUMBER
+            existing |= set(
+                self.request.event.vouchers.annotate(
+                    code_upper=Upper('code')
+                ).filter(code_upper__in=codes[i:i + 500]).values_list('code_upper', flat=True)
+            )
+        return existing
+
+    def _batch_affected_quotas(self, data, cache):
+        if data.get('quota'):
+            return [data['quota']], False
+
+        subevent = data.get('subevent')
+        key = (data['item'].pk, data['variation'].pk if data.get('variation') else None, subevent.pk if subevent else None)
+        if key not in cache:
+            qs = data['variation'].quotas if data.get('variation') else data['item'].quotas
+            cache[key] = list(qs.filter(subevent=subevent) if subevent else qs.all())
+        # Item-based vouchers are checked with waiting list reservations taken into account, just like
+        # Voucher.clean_quota_check does
+        return cache[key], True
+
+    def _batch_validate(self, chunk, ctx):
+        serializer_class = self.get_serializer_class()
+        valid = []
+        codes = set()
+        for res, row in chunk:
+            if not isinstance(row, dict):
+                res['errors'] = {'non_field_errors': ['Invalid voucher data.']}
+                continue
+            serializer = serializer_class(data=row, context=ctx)
+            if not serializer.is_valid():
+                res['errors'] = serializer.errors
+                continue
+            data = dict(serializer.validated_data)
+            if data.get('code'):
+                data['code'] = data['code'].upper()
+                if data['code'] in codes:
+                    res['errors'] = {'code': ['Duplicate voucher code in request.']}
+                    continue
+                codes.add(data['code'])
+            valid.append((res, data))
+        return valid
+
+    def _batch_check_quotas(self, valid, quota_cache):
+        required_quotas = {}
+        row_quotas = {}
+        for res, data in valid:
+            if not Voucher.clean_quota_needs_checking(data, None, item_changed=False, creating=True):
+                continue
+            quotas, count_waitinglist = self._batch_affected_quotas(data, quota_cache)
+            row_quotas[res['row']] = [q.pk for q in quotas]
+            for q in quotas:
+                wl = required_quotas.get(q.pk, (q, False))[1]
+                required_quotas[q.pk] = (q, wl or count_waitinglist)
+
+        remaining = {}
+        for qid, (q, count_waitinglist) in required_quotas.items():
+            avail = q.availability(count_waitinglist=count_waitinglist)
+            remaining[qid] = avail[1] if avail[0] == Quota.AVAILABILITY_OK else 0
+
+        for res, data in valid:
+            qids = row_quotas.get(res['row'], [])
+            cnt = data.get('max_usages', 1)
+            if any(remaining[qid] is not None and remaining[qid] < cnt for qid in qids):
+                res['errors'] = {'non_field_errors': [
+                    'You cannot create a voucher that blocks quota as the selected product or quota is '
+                    'currently sold out or completely reserved.'
+                ]}
+                continue
+            for qid in qids:
+                if remaining[qid] is not None:
+                    remaining[qid] -= cnt
+
+    def _batch_create(self, valid, ctx):
+        serializer_class = self.get_serializer_class()
+        created = serializer_class(many=True, context=ctx).create([
+            dict(data, event=self.request.event) for res, data in valid
+        ])
+        LogEntry.objects.bulk_create([
+            v.log_action(
+                'pretix.voucher.added',
+                user=self.request.user,
+                auth=self.request.auth,
+                data=serializer_class(v, context=ctx).data,
+                save=False
+            )
+            for v in created
+        ], batch_size=500)
+        for (res, data), v in zip(valid, created):
+            res['id'] = v.pk
+            res['code'] = v.code
+
+    def _batch_process_chunk(self, chunk, ctx, quota_cache):
+        valid = self._batch_validate(chunk, ctx)
+        if not valid:
+            return
+
+        try:
+            with self.request.event.lock():
+                existing = self._batch_existing_codes(data['code'] for res, data in valid if data.get('code'))
+                for res, data in valid:
+                    if data.get('code') in existing:
+                        res['errors'] = {'code': ['A voucher with this code already exists.']}
+                valid = [(res, data) for res, data in valid if 'errors' not in res]
+
+                self._batch_check_quotas(valid, quota_cache)
+                valid = [(res, data) for res, data in valid if 'errors' not in res]
+
+                try:
+                    with transaction.atomic():
+                        self._batch_create(valid, ctx)
+                except IntegrityError:
+                    # Fall back to creating the vouchers one by one to find out which rows are affected
+                    for res, data in valid:
+                        try:
+                            with transaction.atomic():
+                                self._batch_create([(res, data)], ctx)
+                        except IntegrityError:
+                            res['errors'] = {'code': ['A voucher with this code already exists.']}
+        except LockTimeoutException:
+            for res, data in valid:
+                if 'errors' not in res:
+                    res['errors'] = {'non_field_errors': [
+                        'The server was too busy to process your request. Please try again.'
+                    ]}
+
+    def _batch_import(self, rows):
+        ctx = self.get_serializer_context()
+        ctx['defer_batch_checks'] = True
+        quota_cache = {}
+        chunk = []
+        for i, row in enumerate(rows):
+            chunk.append(({'row': i}, row))
+            if len(chunk) >= BATCH_IMPORT_CHUNK_SIZE:
+                self._batch_process_chunk(chunk, ctx, quota_cache)
+                for res, row in chunk:
+                    yield json.dumps(res) + '\n'
+                chunk = []
+        if chunk:
+            self._batch_process_chunk(chunk, ctx, quota_cache)
+            for res, row in chunk:
+                yield json.dumps(res) + '\n'
+
+    @list_route(methods=['POST'])
+    def batch_import(self, request, *args, **kwargs):
+        """
+        Creates a large number of vouchers at once. Rows can be submitted as a JSON list, as newline-delimited JSON
+        or as CSV. The input is read and processed in chunks: every row is validated on its own, then the code
+        uniqueness and the quota impact of all valid rows of a chunk are checked at once under the event lock. The
+        result for every row is streamed back as newline-delimited JSON as soon as its chunk has been processed.
+        """
+        return StreamingHttpResponse(
+            self._batch_import(self._read_batch_rows(request)),
+            content_type='application/x-ndjson'
+        )
@@ -13,6 +13,7 @@ from requests import RequestException
 from pretix.api.models import WebHook, WebHookCall, WebHookEventListener
 from pretix.api.signals import register_webhook_events
 from pretix.base.models import LogEntry
+from pretix.base.models.log import match_action_type
 from pretix.base.services.tasks import ProfiledTask, TransactionAwareTask
 from pretix.celery_app import app
 
@@ -169,18 +170,20 @@ def register_default_webhook_events(sender, **kwargs):
 
 @app.task(base=TransactionAwareTask)
 def notify_webhooks(logentry_id: int):
-    logentry = LogEntry.all.get(id=logentry_id)
+    _notify_webhooks(LogEntry.all.get(id=logentry_id))
+
+
+@app.task(base=TransactionAwareTask)
+def notify_webhooks_batch(logentry_ids: list):
+    for logentry in LogEntry.all.filter(id__in=logentry_ids).select_related('event__organizer'):
+        _notify_webhooks(logentry)
 
+
+def _notify_webhooks(logentry: LogEntry):
     if not logentry.organizer:
         return  # We need to know the organizer
 
-    types = get_all_webhook_events()
-    notification_type = None
-    typepath = logentry.action_type
-    while not notification_type and '.' in typepath:
-        notification_type = types.get(typepath + ('.*' if typepath != logentry.action_type else ''))
-        typepath = typepath.rsplit('.', 1)[0]
-
+    notification_type = match_action_type(get_all_webhook_events(), logentry.action_type)
     if not notification_type:
         return  # Ignore, no webhooks for this event type
 
@@ -201,7 +204,7 @@ def notify_webhooks(logentry_id: int):
         )
 
     for wh in webhooks:
-        send_webhook.apply_async(args=(logentry_id, notification_type.action_type, wh.pk))
+        send_webhook.apply_async(args=(logentry.pk, notification_type.action_type, wh.pk))
 
 
 @app.task(base=ProfiledTask, bind=True, max_retries=9)
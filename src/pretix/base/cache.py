@@ -1,6 +1,6 @@
 import hashlib
 import time
-from typing import Callable, Dict, List
+from typing import Callable, Dict, Iterable, List
 
 from django.core.cache import caches
 from django.db.models import Model
@@ -100,3 +100,16 @@ class ObjectRelatedCache(NamespacedCache):
     def __init__(self, obj: Model, cache: str='default'):
         assert isinstance(obj, Model)
         super().__init__('%s:%s' % (obj._meta.object_name, obj.pk), cache)
+
+    @staticmethod
+    def version_of(objs: Iterable[Model], cache: str='default') -> str:
+        """
+        Returns a short string that changes every time the cache of one of the given objects is
+        cleared or the set of objects changes. You can use it as part of a cache key if you cache
+        data that depends on many objects, e.g. on all events of an organizer.
+        """
+        keys = ['%s:%s' % (o._meta.object_name, o.pk) for o in objs]
+        prefixes = caches[cache].get_many(keys)
+        return hashlib.sha1(
+            ';'.join('%s=%s' % (k, prefixes.get(k)) for k in keys).encode()
+        ).hexdigest()
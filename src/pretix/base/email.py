@@ -1,21 +1,37 @@
+import hashlib
 import logging
 from smtplib import SMTPResponseException
 
 import bleach
 import markdown
 from django.conf import settings
+from django.core.cache import cache as django_cache
 from django.core.mail.backends.smtp import EmailBackend
 from django.dispatch import receiver
+from django.template import engines
 from django.template.loader import get_template
-from django.utils.translation import ugettext_lazy as _
+from django.utils.html import conditional_escape
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language, ugettext_lazy as _
 from inlinestyler.utils import inline_css
+from lxml import etree
 
+from pretix.base.metrics import pretix_mail_wrapper_cache_total
 from pretix.base.models import Event, Order
 from pretix.base.signals import register_html_mail_renderers
 from pretix.base.templatetags.rich_text import markdown_compile
 
 logger = logging.getLogger('pretix.base.email')
 
+CONTENT_START = '<!--pretix-mail-content-start-->'
+CONTENT_END = '<!--pretix-mail-content-end-->'
+CONTENT_SLOT = '<!--pretix-mail-content-->'
+SUBJECT_SLOT = '<!--pretix-mail-subject-->'
+WRAPPER_TEMPLATE = (
+    '{% extends wrapper_template %}{% block content %}' + CONTENT_START + '{{ block.super }}' + CONTENT_END +
+    '{% endblock %}'
+)
+
 
 class CustomSMTPBackend(EmailBackend):
 
@@ -92,12 +108,20 @@ class BaseHTMLMailRenderer:
 
 
 class TemplateBasedMailRenderer(BaseHTMLMailRenderer):
+    """
+    Renders the HTML part of an email from a template. If ``precompile_wrapper`` is set, the template
+    is split into the ``content`` block, which is rendered for every email, and the wrapper around it. The
+    wrapper is rendered and its CSS is inlined only once per event, color and language and is then cached,
+    so only the content block needs to be inlined for every email. This requires that everything outside
+    of the ``content`` block only depends on the event, and the subject.
+    """
+    precompile_wrapper = False
 
     @property
     def template_name(self):
         raise NotImplementedError()
 
-    def render(self, plain_body: str, plain_signature: str, subject: str, order: Order) -> str:
+    def _get_context(self, plain_body: str, plain_signature: str, subject: str, order: Order) -> dict:
         body_md = bleach.linkify(markdown_compile(plain_body))
         htmlctx = {
             'site': settings.PRETIX_INSTANCE_NAME,
@@ -117,10 +141,57 @@ class TemplateBasedMailRenderer(BaseHTMLMailRenderer):
 
         if order:
             htmlctx['order'] = order
+        return htmlctx
+
+    def _get_wrapper(self, tpl, htmlctx: dict):
+        """
+        Returns a tuple of the inlined wrapper with a slot for the content and a minimal document containing
+        only the ancestors of the content, which is used to inline the CSS of the content.
+        """
+        cache = self.event.cache if self.event else django_cache
+        key = 'mail_wrapper_{}_{}'.format(self.identifier, hashlib.sha1('{}|{}|{}'.format(
+            self.template_name, htmlctx['color'], get_language()
+        ).encode()).hexdigest())
+        wrapper = cache.get(key)
+        if settings.METRICS_ENABLED:
+            pretix_mail_wrapper_cache_total.inc(1, renderer=self.identifier, result='hit' if wrapper else 'miss')
+        if wrapper:
+            return wrapper
+
+        html = tpl.render(dict(htmlctx, subject=mark_safe(SUBJECT_SLOT)))
+        html = html[:html.index(CONTENT_START)] + CONTENT_SLOT + html[html.index(CONTENT_END) + len(CONTENT_END):]
+
+        doc = etree.HTML(html)
+        node = next(c for c in doc.iter(etree.Comment) if '<!--{}-->'.format(c.text) == CONTENT_SLOT)
+        parent = node.getparent()
+        while parent is not None:
+            for child in list(parent):
+                if child is not node and child.tag != 'head':
+                    parent.remove(child)
+            node, parent = parent, parent.getparent()
+
+        wrapper = inline_css(html), etree.tostring(doc, method='html', encoding='unicode')
+        cache.set(key, wrapper, 3600)
+        return wrapper
+
+    def render(self, plain_body: str, plain_signature: str, subject: str, order: Order) -> str:
+        htmlctx = self._get_context(plain_body, plain_signature, subject, order)
+
+        if not self.precompile_wrapper:
+            tpl = get_template(self.template_name)
+            return inline_css(tpl.render(htmlctx))
+
+        tpl = engines['django'].from_string(WRAPPER_TEMPLATE)
+        htmlctx['wrapper_template'] = self.template_name
+        html = tpl.render(htmlctx)
+        if CONTENT_START not in html:
+            return inline_css(html)
 
-        tpl = get_template(self.template_name)
-        body_html = inline_css(tpl.render(htmlctx))
-        return body_html
+        content = html[html.index(CONTENT_START) + len(CONTENT_START):html.index(CONTENT_END)]
+        wrapper, skeleton = self._get_wrapper(tpl, htmlctx)
+        content = inline_css(skeleton.replace(CONTENT_SLOT, CONTENT_START + content + CONTENT_END))
+        content = content[content.index(CONTENT_START) + len(CONTENT_START):content.index(CONTENT_END)]
+        return wrapper.replace(CONTENT_SLOT, content).replace(SUBJECT_SLOT, conditional_escape(str(subject)))
 
 
 class ClassicMailRenderer(TemplateBasedMailRenderer):
@@ -128,6 +199,7 @@ class ClassicMailRenderer(TemplateBasedMailRenderer):
     identifier = 'classic'
     thumbnail_filename = 'pretixbase/email/thumb.png'
     template_name = 'pretixbase/email/plainwrapper.html'
+    precompile_wrapper = True
 
 
 @receiver(register_html_mail_renderers, dispatch_uid="pretixbase_email_renderers")
@@ -15,8 +15,9 @@ class BaseExporter:
     This is the base class for all data exporters
     """
 
-    def __init__(self, event):
+    def __init__(self, event, progress_callback=lambda v: None):
         self.event = event
+        self.progress_callback = progress_callback
 
     def __str__(self):
         return self.identifier
@@ -67,7 +68,11 @@ class BaseExporter:
     def render(self, form_data: dict) -> Tuple[str, str, bytes]:
         """
         Render the exported file and return a tuple consisting of a filename, a file type
-        and file content.
+        and file content. For large files, the content can also be a file-like object
+        opened for reading, e.g. a temporary file, that is closed after it has been stored.
+
+        If rendering takes long, you can call ``self.progress_callback`` with a percentage
+        value between 0 and 100 from time to time to inform the user about the progress.
 
         :type form_data: dict
         :param form_data: The form data of the export details form
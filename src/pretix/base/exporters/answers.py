@@ -8,6 +8,7 @@ from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 
 from pretix.base.models import QuestionAnswer
+from pretix.helpers.zip import zip_write_file
 
 from ..exporter import BaseExporter
 from ..signals import register_data_exporters
@@ -39,23 +40,22 @@ class AnswerFilesExporter(BaseExporter):
         ).select_related('orderposition', 'orderposition__order', 'question')
         if form_data.get('questions'):
             qs = qs.filter(question__in=form_data['questions'])
-        with tempfile.TemporaryDirectory() as d:
-            with ZipFile(os.path.join(d, 'tmp.zip'), 'w') as zipf:
-                for i in qs:
-                    if i.file:
-                        i.file.open('rb')
-                        fname = '{}-{}-{}-q{}-{}'.format(
-                            self.event.slug.upper(),
-                            i.orderposition.order.code,
-                            i.orderposition.positionid,
-                            i.question.pk,
-                            os.path.basename(i.file.name).split('.', 1)[1]
-                        )
-                        zipf.writestr(fname, i.file.read())
-                        i.file.close()
-
-            with open(os.path.join(d, 'tmp.zip'), 'rb') as zipf:
-                return '{}_answers.zip'.format(self.event.slug), 'application/zip', zipf.read()
+        f = tempfile.NamedTemporaryFile(suffix='.zip')
+        with ZipFile(f, 'w') as zipf:
+            for i in qs.iterator():
+                if i.file:
+                    fname = '{}-{}-{}-q{}-{}'.format(
+                        self.event.slug.upper(),
+                        i.orderposition.order.code,
+                        i.orderposition.positionid,
+                        i.question.pk,
+                        os.path.basename(i.file.name).split('.', 1)[1]
+                    )
+                    with i.file.open('rb'):
+                        zip_write_file(zipf, fname, i.file)
+
+        f.seek(0)
+        return '{}_answers.zip'.format(self.event.slug), 'application/zip', f
 
 
 @receiver(register_data_exporters, dispatch_uid="exporter_answers")
@@ -1,5 +1,5 @@
-import os
 import tempfile
+import time
 from collections import OrderedDict
 from zipfile import ZipFile
 
@@ -10,11 +10,15 @@ from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 
 from pretix.base.models import OrderPayment
+from pretix.helpers.zip import zip_write_file
 
 from ..exporter import BaseExporter
 from ..services.invoices import invoice_pdf_task
 from ..signals import register_data_exporters
 
+PDF_WAIT_TIMEOUT = 30
+PDF_QUEUE_AHEAD = 20
+
 
 class InvoiceExporter(BaseExporter):
     identifier = 'invoices'
@@ -45,25 +49,53 @@ class InvoiceExporter(BaseExporter):
                 date_value = dateutil.parser.parse(date_value).date()
             qs = qs.filter(date__lte=date_value)
 
-        with tempfile.TemporaryDirectory() as d:
-            with ZipFile(os.path.join(d, 'tmp.zip'), 'w') as zipf:
-                for i in qs:
-                    try:
-                        if not i.file:
-                            invoice_pdf_task.apply(args=(i.pk,))
-                            i.refresh_from_db()
-                        i.file.open('rb')
-                        zipf.writestr('{}.pdf'.format(i.number), i.file.read())
-                        i.file.close()
-                    except FileNotFoundError:
+        missing = list(qs.filter(Q(file__isnull=True) | Q(file='')).order_by('pk').values_list('pk', flat=True))
+        # Missing files are rendered in parallel on all available workers while we build the zip file. We only
+        # queue a limited number of them ahead of the invoice we are working on, since we render them ourselves
+        # once the workers turn out to be too busy.
+        queued = set()
+        inline = False
+
+        positions = {pk: n for n, pk in enumerate(missing)}
+
+        def queue_ahead(pk):
+            if inline or pk not in positions:
+                return
+            for m in missing[positions[pk]:positions[pk] + PDF_QUEUE_AHEAD]:
+                if m not in queued:
+                    invoice_pdf_task.apply_async(args=(m,))
+                    queued.add(m)
+
+        total = qs.count()
+        f = tempfile.NamedTemporaryFile(suffix='.zip')
+        with ZipFile(f, 'w') as zipf:
+            for n, i in enumerate(qs.order_by('pk').iterator()):
+                if not i.file:
+                    queue_ahead(i.pk)
+                    waiting_since = time.monotonic()
+                    while not inline and not i.file and time.monotonic() < waiting_since + PDF_WAIT_TIMEOUT:
+                        time.sleep(.5)
+                        i.refresh_from_db(fields=['file'])
+                    if not i.file:
+                        # No worker has picked up the file in time, so we rather render all remaining ones ourselves
+                        inline = True
                         invoice_pdf_task.apply(args=(i.pk,))
-                        i.refresh_from_db()
-                        i.file.open('rb')
-                        zipf.writestr('{}.pdf'.format(i.number), i.file.read())
-                        i.file.close()
+                        i.refresh_from_db(fields=['file'])
+
+                try:
+                    i.file.open('rb')
+                except FileNotFoundError:
+                    invoice_pdf_task.apply(args=(i.pk,))
+                    i.refresh_from_db(fields=['file'])
+                    i.file.open('rb')
+                with i.file:
+                    zip_write_file(zipf, '{}.pdf'.format(i.number), i.file)
+
+                if n % 50 == 0:
+                    self.progress_callback(n / total * 100)
 
-            with open(os.path.join(d, 'tmp.zip'), 'rb') as zipf:
-                return '{}_invoices.zip'.format(self.event.slug), 'application/zip', zipf.read()
+        f.seek(0)
+        return '{}_invoices.zip'.format(self.event.slug), 'application/zip', f
 
     @property
     def export_form_fields(self):
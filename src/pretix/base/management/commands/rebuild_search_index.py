@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from pretix.base.models import Event
+from pretix.base.services.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the order search index from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', action='store', type=int, dest='event',
+                            help='Only rebuild the search index of the event with the given ID')
+
+    def handle(self, *args, **options):
+        qs = Event.objects.all()
+        if options.get('event'):
+            qs = qs.filter(pk=options['event'])
+        for event in qs.iterator():
+            rebuild_search_index(event.orders.all())
+            self.stdout.write('Rebuilt search index of event {}'.format(event.pk))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from pretix.base.models import Event
+from pretix.base.services.stats import refresh_sales_statistics
+
+
+class Command(BaseCommand):
+    help = "Rebuild the pre-aggregated sales statistics from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--event', action='store', type=int, dest='event',
+                            help='Only rebuild the statistics of the event with the given ID')
+
+    def handle(self, *args, **options):
+        qs = Event.objects.all()
+        if options.get('event'):
+            qs = qs.filter(pk=options['event'])
+        for event in qs.iterator():
+            refresh_sales_statistics(event, rebuild=True)
+            self.stdout.write('Rebuilt statistics of event {}'.format(event.pk))
@@ -1,12 +1,30 @@
+from django.conf import settings
 from django.core.management import call_command
 from django.core.management.base import BaseCommand
 
-from ...signals import periodic_task
+from ...services.periodic import get_receivers, schedule_periodic_tasks
 
 
 class Command(BaseCommand):
     help = "Run periodic tasks"
 
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', action='store', type=str,
+                            help='Only run the given receivers (comma-separated list of names)')
+        parser.add_argument('--list-tasks', action='store_true', dest='list_tasks',
+                            help='List the names of all receivers and exit')
+
     def handle(self, *args, **options):
-        periodic_task.send(self)
-        call_command('clearsessions')
+        if options.get('list_tasks'):
+            for name, fn in sorted(get_receivers().items()):
+                self.stdout.write('{} (interval: {}, shards: {})'.format(
+                    name,
+                    getattr(fn, 'periodic_interval', None) or '-',
+                    settings.PERIODIC_TASK_SHARDS if getattr(fn, 'periodic_shard_by_event', False) else 1,
+                ))
+            return
+
+        names = [n.strip() for n in options['tasks'].split(',') if n.strip()] if options.get('tasks') else None
+        schedule_periodic_tasks(names)
+        if not names:
+            call_command('clearsessions')
@@ -238,3 +238,11 @@ pretix_task_runs_total = Counter("pretix_task_runs_total", "Total calls to a cel
                                  ["task_name", "status"])
 pretix_task_duration_seconds = Histogram("pretix_task_duration_seconds", "Call time of a celery task",
                                          ["task_name"])
+pretix_periodic_task_runs_total = Counter("pretix_periodic_task_runs_total", "Total runs of a periodic task receiver",
+                                          ["task_name", "status"])
+pretix_periodic_task_duration_seconds = Histogram("pretix_periodic_task_duration_seconds",
+                                                  "Call time of a periodic task receiver", ["task_name"])
+pretix_mail_wrapper_cache_total = Counter("pretix_mail_wrapper_cache_total",
+                                          "Lookups of pre-rendered HTML email wrappers", ["renderer", "result"])
+pretix_incoming_webhooks_total = Counter("pretix_incoming_webhooks_total",
+                                         "Notifications received from payment providers", ["provider", "result"])
@@ -0,0 +1,44 @@
+# Generated by Django 2.1.1 on 2018-11-28 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretixbase', '0103_auto_20181121_1224'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesStatistic',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=20)),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=3)),
+                ('fee_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('internal_type', models.CharField(blank=True, max_length=255, null=True)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('price', models.DecimalField(decimal_places=2, default=0, max_digits=13)),
+                ('tax_value', models.DecimalField(decimal_places=2, default=0, max_digits=13)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sales_statistics', to='pretixbase.Event')),
+                ('item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pretixbase.Item')),
+                ('subevent', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pretixbase.SubEvent')),
+                ('variation', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='pretixbase.ItemVariation')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SalesStatisticsWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_modified', models.DateTimeField(blank=True, null=True)),
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sales_statistics_watermark', to='pretixbase.Event')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='salesstatistic',
+            index_together={('event', 'kind', 'date')},
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.1.1 on 2018-12-03 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+
+
+def set_last_activity(apps, schema_editor):
+    Event = apps.get_model('pretixbase', 'Event')
+    LogEntry = apps.get_model('pretixbase', 'LogEntry')
+    Event.objects.update(last_activity=Subquery(
+        LogEntry.objects.filter(
+            event=OuterRef('pk')
+        ).order_by().values('event').annotate(m=Max('datetime')).values('m'),
+        output_field=models.DateTimeField()
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('pretixbase', '0104_salesstatistic'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='last_activity',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(
+            set_last_activity,
+            migrations.RunPython.noop,
+        ),
+        migrations.CreateModel(
+            name='LogEntryArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('datetime_from', models.DateTimeField()),
+                ('datetime_to', models.DateTimeField()),
+                ('count', models.PositiveIntegerField()),
+                ('data', models.BinaryField()),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.ContentType')),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_logentries', to='pretixbase.Event')),
+            ],
+        ),
+        migrations.AlterIndexTogether(
+            name='logentryarchive',
+            index_together={('content_type', 'object_id')},
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.1.1 on 2018-12-04 14:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretixbase', '0105_logentryarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='notifications_digest',
+            field=models.BooleanField(default=False, verbose_name='Bundle notifications into an hourly digest'),
+        ),
+        migrations.CreateModel(
+            name='QueuedNotification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action_type', models.CharField(max_length=255)),
+                ('method', models.CharField(choices=[('mail', 'E-mail')], max_length=255)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('logentry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='pretixbase.LogEntry')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queued_notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
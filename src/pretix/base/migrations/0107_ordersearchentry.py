@@ -0,0 +1,55 @@
+# Generated by Django 2.1.1 on 2018-12-06 10:12
+
+import django.db.models.deletion
+from django.db import migrations, models, transaction
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    # pg_trgm might not be available or the database user might not be allowed to install
+    # it. Searching still works without the index, it is just slower.
+    try:
+        with transaction.atomic():
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        with transaction.atomic():
+            schema_editor.execute(
+                'CREATE INDEX pretixbase_ordersearchentry_text_trgm '
+                'ON pretixbase_ordersearchentry USING gin (text gin_trgm_ops)'
+            )
+    except Exception:
+        pass
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS pretixbase_ordersearchentry_text_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretixbase', '0106_queuednotification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderSearchEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pretixbase.Event')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='pretixbase.Order')),
+                ('position', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='search_entries', to='pretixbase.OrderPosition')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderSearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(db_index=True, max_length=190)),
+                ('entry', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='pretixbase.OrderSearchEntry')),
+            ],
+        ),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
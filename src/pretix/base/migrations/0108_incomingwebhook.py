@@ -0,0 +1,42 @@
+# Generated by Django 2.1.1 on 2018-12-10 09:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretixbase', '0107_ordersearchentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IncomingWebhook',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(max_length=190)),
+                ('external_id', models.CharField(max_length=190)),
+                ('ordering_key', models.CharField(db_index=True, max_length=190)),
+                ('reference', models.CharField(blank=True, max_length=190, null=True)),
+                ('payload', models.TextField()),
+                ('state', models.CharField(choices=[('pending', 'pending'), ('processing', 'processing'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=190)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('received', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('processed', models.DateTimeField(blank=True, null=True)),
+                ('event', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pretixbase.Event')),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pretixbase.Order')),
+            ],
+            options={
+                'ordering': ('pk',),
+            },
+        ),
+        migrations.AlterUniqueTogether(
+            name='incomingwebhook',
+            unique_together={('provider', 'external_id')},
+        ),
+        migrations.AlterIndexTogether(
+            name='incomingwebhook',
+            index_together={('ordering_key', 'state')},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.1.1 on 2018-12-12 10:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretixbase', '0108_incomingwebhook'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='logentryarchive',
+            name='event',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_logentries', to='pretixbase.Event'),
+        ),
+    ]
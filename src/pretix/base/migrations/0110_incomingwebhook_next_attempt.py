@@ -0,0 +1,18 @@
+# Generated by Django 2.1.1 on 2018-12-12 11:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pretixbase', '0109_logentryarchive_event_cascade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='incomingwebhook',
+            name='next_attempt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
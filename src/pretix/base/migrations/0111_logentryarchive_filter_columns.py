@@ -0,0 +1,67 @@
+# Generated by Django 2.1.1 on 2018-12-14 11:02
+
+import json
+import zlib
+from collections import OrderedDict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils.dateparse import parse_datetime
+
+
+def split_archives(apps, schema_editor):
+    # Archive rows used to contain all entries of an object, now they need to share action type, user and visibility
+    LogEntryArchive = apps.get_model('pretixbase', 'LogEntryArchive')  # noqa
+    last_pk = 0
+    while True:
+        archives = list(LogEntryArchive.objects.filter(pk__gt=last_pk, action_type='').order_by('pk')[:100])
+        if not archives:
+            return
+        for a in archives:
+            groups = OrderedDict()
+            for d in json.loads(zlib.decompress(bytes(a.data)).decode()):
+                groups.setdefault((d['action_type'], d['user_id'], d['visible']), []).append(d)
+            LogEntryArchive.objects.bulk_create([
+                LogEntryArchive(
+                    event_id=a.event_id, content_type_id=a.content_type_id, object_id=a.object_id,
+                    action_type=action_type, user_id=user_id, visible=visible,
+                    datetime_from=min(parse_datetime(d['datetime']) for d in entries),
+                    datetime_to=max(parse_datetime(d['datetime']) for d in entries),
+                    count=len(entries), data=zlib.compress(json.dumps(entries).encode())
+                )
+                for (action_type, user_id, visible), entries in groups.items()
+            ])
+            a.delete()
+        last_pk = archives[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('pretixbase', '0110_incomingwebhook_next_attempt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='logentryarchive',
+            name='action_type',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='logentryarchive',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='logentryarchive',
+            name='visible',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.RunPython(
+            split_archives,
+            migrations.RunPython.noop,
+        ),
+    ]
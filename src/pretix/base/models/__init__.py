@@ -12,8 +12,8 @@ from .items import (
     Item, ItemAddOn, ItemCategory, ItemVariation, Question, QuestionOption,
     Quota, SubEventItem, SubEventItemVariation, itempicture_upload_to,
 )
-from .log import LogEntry
-from .notifications import NotificationSetting
+from .log import LogEntry, LogEntryArchive
+from .notifications import NotificationSetting, QueuedNotification
 from .orders import (
     AbstractPosition, CachedCombinedTicket, CachedTicket, CartPosition,
     InvoiceAddress, Order, OrderFee, OrderPayment, OrderPosition, OrderRefund,
@@ -23,6 +23,9 @@ from .orders import (
 from .organizer import (
     Organizer, Organizer_SettingsStore, Team, TeamAPIToken, TeamInvite,
 )
+from .search import OrderSearchEntry, OrderSearchToken
+from .statistics import SalesStatistic, SalesStatisticsWatermark
 from .tax import TaxRule
 from .vouchers import Voucher
 from .waitinglist import WaitingListEntry
+from .webhooks import IncomingWebhook
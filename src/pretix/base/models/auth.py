@@ -100,6 +100,10 @@ class User(AbstractBaseUser, PermissionsMixin, LoggingMixin):
         verbose_name=_('Receive notifications according to my settings below'),
         help_text=_('If turned off, you will not get any notifications.')
     )
+    notifications_digest = models.BooleanField(
+        default=False,
+        verbose_name=_('Bundle notifications into an hourly digest')
+    )
     notifications_token = models.CharField(max_length=255, default=generate_notifications_token)
 
     objects = UserManager()
@@ -191,6 +195,13 @@ class User(AbstractBaseUser, PermissionsMixin, LoggingMixin):
         return LogEntry.objects.filter(content_type=ContentType.objects.get_for_model(User),
                                        object_id=self.pk)
 
+    def all_logentries_with_archive(self):
+        from pretix.base.models.log import ArchivedLogEntryList, LogEntryArchive
+
+        return ArchivedLogEntryList(self.all_logentries, LogEntryArchive.objects.filter(
+            content_type=ContentType.objects.get_for_model(User), object_id=self.pk
+        ))
+
     def _get_teams_for_organizer(self, organizer):
         if 'o{}'.format(organizer.pk) not in self._teamcache:
             self._teamcache['o{}'.format(organizer.pk)] = list(self.teams.filter(organizer=organizer))
@@ -46,14 +46,11 @@ class LoggingMixin:
         :param data: Any JSON-serializable object
         :param user: The user performing the action (optional)
         """
-        from .log import LogEntry
+        from .log import LogEntry, buffer_log_entry, update_last_activity
         from .event import Event
         from .devices import Device
         from pretix.api.models import OAuthAccessToken, OAuthApplication
         from .organizer import TeamAPIToken
-        from ..notifications import get_all_notification_types
-        from ..services.notifications import notify
-        from pretix.api.webhooks import get_all_webhook_events, notify_webhooks
 
         event = None
         if isinstance(self, Event):
@@ -78,24 +75,10 @@ class LoggingMixin:
         logentry = LogEntry(content_object=self, user=user, action_type=action, event=event, **kwargs)
         if data:
             logentry.data = json.dumps(data, cls=CustomJSONEncoder)
-        if save:
+        if save and not buffer_log_entry(logentry):
             logentry.save()
-
-            no_types = get_all_notification_types()
-            wh_types = get_all_webhook_events()
-
-            no_type = None
-            wh_type = None
-            typepath = logentry.action_type
-            while (not no_type or not wh_types) and '.' in typepath:
-                wh_type = wh_type or wh_types.get(typepath + ('.*' if typepath != logentry.action_type else ''))
-                no_type = no_type or no_types.get(typepath + ('.*' if typepath != logentry.action_type else ''))
-                typepath = typepath.rsplit('.', 1)[0]
-
-            if no_type:
-                notify.apply_async(args=(logentry.pk,))
-            if wh_type:
-                notify_webhooks.apply_async(args=(logentry.pk,))
+            logentry.send_notifications()
+            update_last_activity([logentry])
         return logentry
 
 
@@ -116,6 +99,48 @@ class LoggedModel(models.Model, LoggingMixin):
             content_type=ContentType.objects.get_for_model(type(self)), object_id=self.pk
         ).select_related('user', 'event', 'oauth_application', 'api_token', 'device')
 
+    def all_logentries_with_archive(self):
+        """
+        Returns all log entries that are attached to this object, including the ones that have
+        been moved to the archive.
+
+        :return: An ArchivedLogEntryList of LogEntry objects
+        """
+        from .log import ArchivedLogEntryList, LogEntryArchive
+
+        return ArchivedLogEntryList(self.all_logentries(), LogEntryArchive.objects.filter(
+            content_type=ContentType.objects.get_for_model(type(self)), object_id=self.pk
+        ))
+
+
+class SearchIndexMixin:
+    """
+    Keeps track of the values of the fields in ``search_fields`` as loaded from the database, such that
+    the search index only needs to be rebuilt if one of them has been changed.
+    """
+    search_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._search_values = instance._get_search_values()
+        return instance
+
+    def _get_search_values(self):
+        return tuple(self.__dict__.get(self._meta.get_field(f).attname) for f in self.search_fields)
+
+    def search_index_outdated(self, update_fields=None) -> bool:
+        """
+        Returns whether the search index needs to be rebuilt after this instance has been saved with
+        the given ``update_fields``.
+        """
+        if update_fields is not None:
+            return bool(set(update_fields) & set(self.search_fields))
+        return getattr(self, '_search_values', None) != self._get_search_values()
+
+    def search_index_updated(self):
+        self._search_values = self._get_search_values()
+
 
 class LockModel:
     def refresh_for_update(self, fields=None, using=None, **kwargs):
@@ -22,7 +22,7 @@ from i18nfield.fields import I18nCharField, I18nTextField
 from pretix.base.models.base import LoggedModel
 from pretix.base.reldate import RelativeDateWrapper
 from pretix.base.validators import EventSlugBlacklistValidator
-from pretix.helpers.database import GroupConcat
+from pretix.helpers.database import GroupConcat, bulk_create_with_pks
 from pretix.helpers.daterange import daterange
 from pretix.helpers.json import safe_string
 
@@ -266,6 +266,8 @@ class Event(EventMixin, LoggedModel):
     :type plugins: str
     :param has_subevents: Enable event series functionality
     :type has_subevents: bool
+    :param last_activity: Updated shortly after anything has been logged for this event
+    :type last_activity: datetime
     """
 
     settings_namespace = 'event'
@@ -332,6 +334,7 @@ class Event(EventMixin, LoggedModel):
         verbose_name=_('Event series'),
         default=False
     )
+    last_activity = models.DateTimeField(null=True, blank=True, editable=False, db_index=True)
 
     class Meta:
         verbose_name = _("Event")
@@ -351,6 +354,7 @@ class Event(EventMixin, LoggedModel):
 
     def delete_all_orders(self, really=False):
         from .orders import OrderRefund, OrderPayment, OrderPosition, OrderFee
+        from .statistics import SalesStatisticsWatermark
 
         if not really:
             raise TypeError("Pass really=True as a parameter.")
@@ -360,6 +364,9 @@ class Event(EventMixin, LoggedModel):
         OrderPayment.objects.filter(order__event=self).delete()
         OrderRefund.objects.filter(order__event=self).delete()
         self.orders.all().delete()
+        self.sales_statistics.all().delete()
+        SalesStatisticsWatermark.objects.filter(event=self).delete()
+        self.cache.clear()
 
     def save(self, *args, **kwargs):
         obj = super().save(*args, **kwargs)
@@ -435,8 +442,18 @@ class Event(EventMixin, LoggedModel):
             time(hour=23, minute=59, second=59)
         ), tz)
 
-    def copy_data_from(self, other):
-        from . import ItemAddOn, ItemCategory, Item, Question, Quota
+    def copy_data_from(self, other, progress_callback=lambda v: None):
+        """
+        Copies all products, quotas, questions, check-in lists and settings from the event ``other``
+        to this event. All objects are inserted in bulk. Product pictures are not copied, the new products
+        refer to the same files as the original ones.
+
+        :param progress_callback: Called with the progress in percent after every step
+        """
+        from . import (
+            CheckinList, Event_SettingsStore, ItemAddOn, ItemCategory, Item, ItemVariation, Question,
+            QuestionOption, Quota, TaxRule
+        )
         from ..signals import event_copy_data
 
         self.plugins = other.plugins
@@ -444,85 +461,119 @@ class Event(EventMixin, LoggedModel):
         self.save()
 
         tax_map = {}
-        for t in other.tax_rules.all():
+        taxes = list(other.tax_rules.all())
+        for t in taxes:
             tax_map[t.pk] = t
             t.pk = None
             t.event = self
-            t.save()
+        bulk_create_with_pks(TaxRule, taxes)
 
         category_map = {}
-        for c in ItemCategory.objects.filter(event=other):
+        categories = list(ItemCategory.objects.filter(event=other))
+        for c in categories:
             category_map[c.pk] = c
             c.pk = None
             c.event = self
-            c.save()
+        bulk_create_with_pks(ItemCategory, categories)
+        progress_callback(10)
 
         item_map = {}
-        variation_map = {}
-        for i in Item.objects.filter(event=other).prefetch_related('variations'):
-            vars = list(i.variations.all())
+        items = list(Item.objects.filter(event=other))
+        for i in items:
             item_map[i.pk] = i
             i.pk = None
             i.event = self
-            if i.picture:
-                i.picture.save(i.picture.name, i.picture)
             if i.category_id:
                 i.category = category_map[i.category_id]
             if i.tax_rule_id:
                 i.tax_rule = tax_map[i.tax_rule_id]
-            i.save()
-            for v in vars:
-                variation_map[v.pk] = v
-                v.pk = None
-                v.item = i
-                v.save()
-
-        for ia in ItemAddOn.objects.filter(base_item__event=other).prefetch_related('base_item', 'addon_category'):
-            ia.pk = None
-            ia.base_item = item_map[ia.base_item.pk]
-            ia.addon_category = category_map[ia.addon_category.pk]
-            ia.save()
+        bulk_create_with_pks(Item, items)
+        progress_callback(30)
 
-        for q in Quota.objects.filter(event=other, subevent__isnull=True).prefetch_related('items', 'variations'):
-            items = list(q.items.all())
-            vars = list(q.variations.all())
+        variation_map = {}
+        variations = list(ItemVariation.objects.filter(item__event=other))
+        for v in variations:
+            variation_map[v.pk] = v
+            v.pk = None
+            v.item = item_map[v.item_id]
+        bulk_create_with_pks(ItemVariation, variations)
+
+        addons = list(ItemAddOn.objects.filter(base_item__event=other))
+        for ia in addons:
+            ia.pk = None
+            ia.base_item = item_map[ia.base_item_id]
+            ia.addon_category = category_map[ia.addon_category_id]
+        ItemAddOn.objects.bulk_create(addons)
+        progress_callback(50)
+
+        quota_map = {}
+        quotas = list(Quota.objects.filter(event=other, subevent__isnull=True))
+        for q in quotas:
+            quota_map[q.pk] = q
             q.pk = None
             q.event = self
-            q.save()
-            for i in items:
-                if i.pk in item_map:
-                    q.items.add(item_map[i.pk])
-            for v in vars:
-                q.variations.add(variation_map[v.pk])
+            q.cached_availability_state = None
+            q.cached_availability_number = None
+            q.cached_availability_paid_orders = None
+            q.cached_availability_time = None
+        bulk_create_with_pks(Quota, quotas)
+        Quota.items.through.objects.bulk_create([
+            Quota.items.through(quota=quota_map[q], item=item_map[i])
+            for q, i in Quota.items.through.objects.filter(quota_id__in=list(quota_map)).values_list(
+                'quota_id', 'item_id'
+            )
+            if i in item_map
+        ])
+        Quota.variations.through.objects.bulk_create([
+            Quota.variations.through(quota=quota_map[q], itemvariation=variation_map[v])
+            for q, v in Quota.variations.through.objects.filter(quota_id__in=list(quota_map)).values_list(
+                'quota_id', 'itemvariation_id'
+            )
+            if v in variation_map
+        ])
+        progress_callback(70)
 
         question_map = {}
-        for q in Question.objects.filter(event=other).prefetch_related('items', 'options'):
-            items = list(q.items.all())
-            opts = list(q.options.all())
+        questions = list(Question.objects.filter(event=other))
+        for q in questions:
             question_map[q.pk] = q
             q.pk = None
             q.event = self
-            q.save()
-
-            for i in items:
-                q.items.add(item_map[i.pk])
-            for o in opts:
-                o.pk = None
-                o.question = q
-                o.save()
-
-        for cl in other.checkin_lists.filter(subevent__isnull=True).prefetch_related('limit_products'):
-            items = list(cl.limit_products.all())
+        bulk_create_with_pks(Question, questions)
+        Question.items.through.objects.bulk_create([
+            Question.items.through(question=question_map[q], item=item_map[i])
+            for q, i in Question.items.through.objects.filter(question_id__in=list(question_map)).values_list(
+                'question_id', 'item_id'
+            )
+        ])
+        options = list(QuestionOption.objects.filter(question__event=other))
+        for o in options:
+            o.pk = None
+            o.question = question_map[o.question_id]
+        QuestionOption.objects.bulk_create(options)
+        progress_callback(80)
+
+        checkin_list_map = {}
+        checkin_lists = list(other.checkin_lists.filter(subevent__isnull=True))
+        for cl in checkin_lists:
+            checkin_list_map[cl.pk] = cl
             cl.pk = None
             cl.event = self
-            cl.save()
-            for i in items:
-                cl.limit_products.add(item_map[i.pk])
-
+        bulk_create_with_pks(CheckinList, checkin_lists)
+        CheckinList.limit_products.through.objects.bulk_create([
+            CheckinList.limit_products.through(checkinlist=checkin_list_map[cl], item=item_map[i])
+            for cl, i in CheckinList.limit_products.through.objects.filter(
+                checkinlist_id__in=list(checkin_list_map)
+            ).values_list('checkinlist_id', 'item_id')
+        ])
+        progress_callback(90)
+
+        settings_objects = []
         for s in other.settings._objects.all():
             s.object = self
             s.pk = None
             if s.value.startswith('file://'):
+                # Files stored in settings are deleted once they are replaced, so they can not be shared
                 fi = default_storage.open(s.value[7:], 'rb')
                 nonce = get_random_string(length=8)
                 # TODO: make sure pub is always correct
@@ -531,22 +582,25 @@ class Event(EventMixin, LoggedModel):
                 )
                 newname = default_storage.save(fname, fi)
                 s.value = 'file://' + newname
-                s.save()
+                settings_objects.append(s)
             elif s.key == 'tax_rate_default':
                 try:
                     if int(s.value) in tax_map:
                         s.value = tax_map.get(int(s.value)).pk
-                        s.save()
+                        settings_objects.append(s)
                 except ValueError:
                     pass
             else:
-                s.save()
+                settings_objects.append(s)
+        Event_SettingsStore.objects.bulk_create(settings_objects)
+        self.cache.clear()
 
         event_copy_data.send(
             sender=self, other=other,
             tax_map=tax_map, category_map=category_map, item_map=item_map, variation_map=variation_map,
             question_map=question_map
         )
+        progress_callback(100)
 
     def get_payment_providers(self) -> dict:
         """
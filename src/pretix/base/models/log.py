@@ -1,11 +1,18 @@
 import json
+import threading
+import zlib
+from contextlib import contextmanager
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.core.cache import cache
+from django.db import connections, models, transaction
+from django.db.models import Sum, prefetch_related_objects
 from django.urls import reverse
+from django.utils.dateparse import parse_datetime
 from django.utils.functional import cached_property
 from django.utils.html import escape
+from django.utils.timezone import now
 from django.utils.translation import pgettext_lazy, ugettext_lazy as _
 
 from pretix.base.signals import logentry_object_link
@@ -55,6 +62,14 @@ class LogEntry(models.Model):
     class Meta:
         ordering = ('-datetime', '-id')
 
+    def send_notifications(self):
+        """
+        Queues the notifications and webhooks that are registered for the type of this
+        entry. This is done automatically by ``log_action``, but needs to be called
+        manually for entries that have been created with ``bulk_create``.
+        """
+        send_notifications([self])
+
     def display(self):
         from ..signals import logentry_display
 
@@ -185,3 +200,306 @@ class LogEntry(models.Model):
 
     def delete(self, using=None, keep_parents=False):
         raise TypeError("Logs cannot be deleted.")
+
+
+class LogEntryArchive(models.Model):
+    """
+    Holds log entries that have been moved out of the :py:class:`LogEntry` table because they are
+    older than the configured archive period. Every row contains a compressed batch of entries
+    that all belong to the same object and share the same action type, user and visibility, such
+    that archived entries can be filtered by these columns without unpacking them. Use
+    :py:meth:`get_logentries` to read them.
+
+    :param action_type: The action type of all entries in this batch
+    :type action_type: str
+    :param user: The user who performed the actions in this batch
+    :type user: User
+    :param visible: The visibility of all entries in this batch
+    :type visible: bool
+    :param datetime_from: The timestamp of the oldest entry in this batch
+    :type datetime_from: datetime
+    :param datetime_to: The timestamp of the newest entry in this batch
+    :type datetime_to: datetime
+    :param count: The number of entries in this batch
+    :type count: int
+    :param data: The zlib-compressed JSON representation of the entries
+    :type data: bytes
+    """
+    FIELDS = ('id', 'user_id', 'api_token_id', 'device_id', 'oauth_application_id', 'event_id', 'action_type',
+              'data', 'visible', 'shredded')
+
+    event = models.ForeignKey('Event', null=True, blank=True, on_delete=models.CASCADE,
+                              related_name='archived_logentries')
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
+    object_id = models.PositiveIntegerField()
+    action_type = models.CharField(max_length=255)
+    user = models.ForeignKey('User', null=True, blank=True, on_delete=models.PROTECT)
+    visible = models.BooleanField(default=True)
+    datetime_from = models.DateTimeField()
+    datetime_to = models.DateTimeField()
+    count = models.PositiveIntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        index_together = (('content_type', 'object_id'),)
+
+    @staticmethod
+    def group_key(logentry):
+        """
+        Returns the key by which log entries need to be grouped before they can be packed together.
+        """
+        return logentry.content_type_id, logentry.object_id, logentry.action_type, logentry.user_id, logentry.visible
+
+    @classmethod
+    def pack(cls, logentries):
+        """
+        Creates an unsaved archive row from a list of log entries that share the same
+        :py:meth:`group_key`.
+        """
+        first = logentries[0]
+        data = []
+        for le in logentries:
+            d = {f: getattr(le, f) for f in cls.FIELDS}
+            d['datetime'] = le.datetime.isoformat()
+            data.append(d)
+        return cls(
+            event_id=first.event_id, content_type_id=first.content_type_id, object_id=first.object_id,
+            action_type=first.action_type, user_id=first.user_id, visible=first.visible,
+            datetime_from=min(le.datetime for le in logentries), datetime_to=max(le.datetime for le in logentries),
+            count=len(logentries), data=zlib.compress(json.dumps(data).encode())
+        )
+
+    def get_logentries(self):
+        """
+        Returns the archived entries as unsaved :py:class:`LogEntry` objects, newest first.
+        """
+        entries = []
+        for d in json.loads(zlib.decompress(bytes(self.data)).decode()):
+            d['datetime'] = parse_datetime(d['datetime'])
+            entries.append(LogEntry(content_type_id=self.content_type_id, object_id=self.object_id, **d))
+        entries.sort(key=lambda le: (le.datetime, le.pk), reverse=True)
+        return entries
+
+
+def read_archived_logentries(archives):
+    """
+    Unpacks the given :py:class:`LogEntryArchive` rows and returns all visible entries. Entries are
+    returned batch by batch, starting with the most recent batch, and newest first within every batch.
+    """
+    entries = [
+        le for a in archives.filter(visible=True).order_by('-datetime_to', '-pk')
+        for le in a.get_logentries()
+    ]
+    prefetch_related_objects(entries, 'user', 'event', 'content_type', 'oauth_application', 'api_token', 'device')
+    return entries
+
+
+class ArchivedLogEntryList:
+    """
+    A read-only list of the log entries in ``qs``, followed by the visible entries in ``archives``
+    in the order of :py:func:`read_archived_logentries`. Entries are only archived once they are
+    older than the ones left in the database, so this keeps the order of ``qs``. It can be passed
+    to a paginator instead of a QuerySet.
+
+    Archived entries can only be filtered by the columns of :py:class:`LogEntryArchive`. They are
+    counted in the database and only the batches that overlap with a requested slice are unpacked.
+    """
+
+    def __init__(self, qs, archives):
+        self.qs = qs
+        self.archives = archives.filter(visible=True)
+        self._count = None
+        self._live_count = None
+
+    def _count_archived(self):
+        return self.archives.aggregate(s=Sum('count'))['s'] or 0
+
+    def _count_live(self):
+        if self._live_count is None:
+            self._live_count = self.qs.count()
+        return self._live_count
+
+    def _get_archived(self, start, stop):
+        offset = 0
+        pks = []
+        for pk, cnt in self.archives.order_by('-datetime_to', '-pk').values_list('pk', 'count'):
+            if stop is not None and offset >= stop:
+                break
+            if offset + cnt > start:
+                if not pks:
+                    first_offset = offset
+                pks.append(pk)
+            offset += cnt
+        if not pks:
+            return []
+        entries = read_archived_logentries(self.archives.filter(pk__in=pks))
+        return entries[start - first_offset:None if stop is None else stop - first_offset]
+
+    def count(self):
+        if self._count is None:
+            self._count = self._count_live() + self._count_archived()
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        yield from self.qs
+        yield from read_archived_logentries(self.archives)
+
+    def __getitem__(self, k):
+        if not isinstance(k, slice):
+            result = self[k:k + 1]
+            if not result:
+                raise IndexError('list index out of range')
+            return result[0]
+
+        start = k.start or 0
+        stop = k.stop
+        live_count = self._count_live()
+        result = list(self.qs[start:stop]) if start < live_count else []
+        if stop is None or stop > live_count:
+            result += self._get_archived(max(start - live_count, 0), None if stop is None else stop - live_count)
+        return result
+
+
+_dispatch_table = {}
+_buffer = threading.local()
+
+
+def match_action_type(types: dict, action_type: str):
+    """
+    Looks up the notification type or webhook event registered for a log action type,
+    either directly or through a wildcard like ``pretix.event.order.*``.
+    """
+    typepath = action_type
+    while '.' in typepath:
+        t = types.get(typepath + ('.*' if typepath != action_type else ''))
+        if t:
+            return t
+        typepath = typepath.rsplit('.', 1)[0]
+
+
+def get_dispatch_targets(action_type: str):
+    """
+    Returns a tuple of two booleans, indicating whether any notification type and any webhook
+    event is registered for the given log action type. The result is computed only once per
+    action type.
+    """
+    if action_type not in _dispatch_table:
+        from ..notifications import get_all_notification_types
+        from pretix.api.webhooks import get_all_webhook_events
+
+        _dispatch_table[action_type] = (
+            bool(match_action_type(get_all_notification_types(), action_type)),
+            bool(match_action_type(get_all_webhook_events(), action_type)),
+        )
+    return _dispatch_table[action_type]
+
+
+def send_notifications(logentries):
+    """
+    Queues one background task for all notifications and one for all webhooks that are
+    registered for the types of the given, already saved log entries.
+    """
+    from ..services.notifications import notify_batch
+    from pretix.api.webhooks import notify_webhooks_batch
+
+    notify_ids = []
+    webhook_ids = []
+    for le in logentries:
+        has_notification, has_webhook = get_dispatch_targets(le.action_type)
+        if has_notification:
+            notify_ids.append(le.pk)
+        if has_webhook:
+            webhook_ids.append(le.pk)
+
+    if notify_ids:
+        notify_batch.apply_async(args=(notify_ids,))
+    if webhook_ids:
+        notify_webhooks_batch.apply_async(args=(webhook_ids,))
+
+
+def write_log_entries(logentries):
+    """
+    Saves the given log entries in bulk and queues their notifications and webhooks.
+    """
+    if not logentries:
+        return
+    if connections[LogEntry.objects.db].features.can_return_ids_from_bulk_insert:
+        LogEntry.objects.bulk_create(logentries)
+    else:
+        # We need primary keys for all entries that trigger notifications, and only some
+        # databases return them from bulk inserts
+        dispatched = []
+        silent = []
+        for le in logentries:
+            (dispatched if any(get_dispatch_targets(le.action_type)) else silent).append(le)
+        LogEntry.objects.bulk_create(silent)
+        for le in dispatched:
+            le.save()
+    send_notifications(logentries)
+    update_last_activity(logentries)
+
+
+LAST_ACTIVITY_INTERVAL = 60
+
+
+def update_last_activity(logentries):
+    """
+    Sets ``Event.last_activity`` for the events of the given log entries once the current
+    transaction has been committed. To keep the load on the event table low, this happens at most
+    once every ``LAST_ACTIVITY_INTERVAL`` seconds per event, so the stored value might be older than
+    the newest log entry of the event by up to that interval.
+    """
+    from .event import Event
+
+    event_ids = {le.event_id for le in logentries if le.event_id}
+    if not event_ids:
+        return
+
+    def update():
+        ids = [
+            e for e in event_ids
+            if cache.add('pretix_event_last_activity_{}'.format(e), True, LAST_ACTIVITY_INTERVAL)
+        ]
+        if ids:
+            Event.objects.filter(pk__in=ids).update(last_activity=now())
+
+    transaction.on_commit(update)
+
+
+def buffer_log_entry(logentry) -> bool:
+    """
+    Adds a new log entry to the buffer of the surrounding :py:func:`buffered_logging` block.
+    Returns ``False`` if there is no such block.
+    """
+    entries = getattr(_buffer, 'entries', None)
+    if entries is None:
+        return False
+    entries.append(logentry)
+    return True
+
+
+@contextmanager
+def buffered_logging():
+    """
+    Collects all log entries created through ``log_action`` within this block and writes them
+    with a single bulk insert at its end, followed by one notification and one webhook task
+    for all of them. Nested blocks are merged into the outermost one. This can also be used
+    as a decorator.
+    """
+    if getattr(_buffer, 'entries', None) is not None:
+        yield
+        return
+
+    _buffer.entries = []
+    try:
+        yield
+    except Exception:
+        entries, _buffer.entries = _buffer.entries, None
+        if not transaction.get_connection().needs_rollback:
+            write_log_entries(entries)
+        raise
+    entries, _buffer.entries = _buffer.entries, None
+    write_log_entries(entries)
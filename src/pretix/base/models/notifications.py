@@ -34,3 +34,25 @@ class NotificationSetting(models.Model):
 
     class Meta:
         unique_together = ('user', 'action_type', 'event', 'method')
+
+
+class QueuedNotification(models.Model):
+    """
+    A notification that still needs to be delivered to a user. Notifications are not sent
+    one by one, but collected here and delivered periodically, grouped into one message per
+    user and method.
+
+    :param user: The user to notify.
+    :type user: User
+    :param logentry: The log entry the notification is about.
+    :type logentry: LogEntry
+    :param action_type: The type of notification.
+    :type action_type: str
+    :param method: The method to notify with.
+    :type method: str
+    """
+    user = models.ForeignKey('User', on_delete=models.CASCADE, related_name='queued_notifications')
+    logentry = models.ForeignKey('LogEntry', on_delete=models.CASCADE)
+    action_type = models.CharField(max_length=255)
+    method = models.CharField(max_length=255, choices=NotificationSetting.CHANNELS)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
@@ -33,9 +33,10 @@ from pretix.base.models import User
 from pretix.base.reldate import RelativeDateWrapper
 from pretix.base.settings import PERSON_NAME_SCHEMES
 
-from .base import LockModel, LoggedModel
+from .base import LockModel, LoggedModel, SearchIndexMixin
 from .event import Event, SubEvent
 from .items import Item, ItemVariation, Question, QuestionOption, Quota
+from .log import buffered_logging
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +50,7 @@ def generate_position_secret():
     return get_random_string(length=settings.ENTROPY['ticket_secret'], allowed_chars='abcdefghjkmnpqrstuvwxyz23456789')
 
 
-class Order(LockModel, LoggedModel):
+class Order(SearchIndexMixin, LockModel, LoggedModel):
     """
     An order is created when a user clicks 'buy' on his cart. It holds
     several OrderPositions and is connected to a user. It has an
@@ -178,6 +179,8 @@ class Order(LockModel, LoggedModel):
     )
     sales_channel = models.CharField(max_length=190, default="web")
 
+    search_fields = ('code', 'email', 'comment')
+
     class Meta:
         verbose_name = _("Order")
         verbose_name_plural = _("Orders")
@@ -293,6 +296,13 @@ class Order(LockModel, LoggedModel):
         if not self.expires:
             self.set_expires()
         super().save(**kwargs)
+        if kwargs.get('update_fields') is None or {'status', 'total'} & set(kwargs['update_fields']):
+            from pretix.base.services.stats import mark_sales_statistics_dirty
+            mark_sales_statistics_dirty([self.event_id])
+        if self.search_index_outdated(kwargs.get('update_fields')):
+            from pretix.base.services.search import update_order_search_entry
+            update_order_search_entry(self)
+            self.search_index_updated()
 
     def touch(self):
         self.save(update_fields=['last_modified'])
@@ -945,6 +955,7 @@ class OrderPayment(models.Model):
         }, user=user, auth=auth)
         order_paid.send(self.order.event, order=self.order)
 
+    @buffered_logging()
     def confirm(self, count_waitinglist=True, send_mail=True, force=False, user=None, auth=None, mail_text=''):
         """
         Marks the payment as complete. If possible, this also marks the order as paid if no further
@@ -964,9 +975,20 @@ class OrderPayment(models.Model):
         :type mail_text: str
         :raises Quota.QuotaExceededException: if the quota is exceeded and ``force`` is ``False``
         """
-        from pretix.base.services.invoices import generate_invoice, invoice_qualified
-        from pretix.base.services.mail import SendMailException
-        from pretix.multidomain.urlreverse import build_absolute_uri
+        if self.mark_confirmed(count_waitinglist=count_waitinglist, force=force, user=user, auth=auth):
+            self.process_order_paid(send_mail=send_mail, user=user, mail_text=mail_text)
+
+    def mark_confirmed(self, count_waitinglist=True, force=False, user=None, auth=None) -> bool:
+        """
+        Marks the payment as complete and the order as paid if no further payment is required, but
+        does not generate an invoice or send an email. This is the part of :py:meth:`confirm` that
+        needs to run while holding the event lock, callers need to call :py:meth:`process_order_paid`
+        afterwards if this returns ``True``.
+
+        :return: ``True`` if the order has been marked as paid.
+        :raises Quota.QuotaExceededException: if the quota is exceeded and ``force`` is ``False``
+        """
+        from pretix.base.services.quotas import mark_order_quotas_dirty
 
         self.state = self.PAYMENT_STATE_CONFIRMED
         self.payment_date = now()
@@ -978,7 +1000,7 @@ class OrderPayment(models.Model):
         }, user=user, auth=auth)
 
         if self.order.status == Order.STATUS_PAID:
-            return
+            return False
 
         payment_sum = self.order.payments.filter(
             state__in=(self.PAYMENT_STATE_CONFIRMED, self.PAYMENT_STATE_REFUNDED)
@@ -988,7 +1010,7 @@ class OrderPayment(models.Model):
                        OrderRefund.REFUND_STATE_CREATED)
         ).aggregate(s=Sum('amount'))['s'] or Decimal('0.00')
         if payment_sum - refund_sum < self.order.total:
-            return
+            return False
 
         if self.order.status == Order.STATUS_PENDING and self.order.expires > now() + timedelta(hours=12):
             # Performance optimization. In this case, there's really no reason to lock everything and an atomic
@@ -998,6 +1020,17 @@ class OrderPayment(models.Model):
         else:
             with self.order.event.lock():
                 self._mark_paid(force, count_waitinglist, user, auth)
+        mark_order_quotas_dirty([self.order_id])
+        return True
+
+    def process_order_paid(self, send_mail=True, user=None, mail_text=''):
+        """
+        Generates an invoice and sends the payment confirmation email after :py:meth:`mark_confirmed`
+        marked the order as paid.
+        """
+        from pretix.base.services.invoices import generate_invoice, invoice_qualified
+        from pretix.base.services.mail import SendMailException
+        from pretix.multidomain.urlreverse import build_absolute_uri
 
         invoice = None
         if invoice_qualified(self.order):
@@ -1365,7 +1398,7 @@ class OrderFee(models.Model):
         super().delete(**kwargs)
 
 
-class OrderPosition(AbstractPosition):
+class OrderPosition(SearchIndexMixin, AbstractPosition):
     """
     An OrderPosition is one line of an order, representing one ordered item
     of a specified type (or variation). This has all properties of
@@ -1413,6 +1446,8 @@ class OrderPosition(AbstractPosition):
         db_index=True
     )
 
+    search_fields = ('attendee_name_cached', 'attendee_name_parts', 'attendee_email', 'secret', 'voucher', 'addon_to')
+
     class Meta:
         verbose_name = _("Order position")
         verbose_name_plural = _("Order positions")
@@ -1498,7 +1533,12 @@ class OrderPosition(AbstractPosition):
         if not self.pseudonymization_id:
             self.assign_pseudonymization_id()
 
-        return super().save(*args, **kwargs)
+        super().save(*args, **kwargs)
+
+        if self.search_index_outdated(kwargs.get('update_fields')):
+            from pretix.base.services.search import update_position_search_entry
+            update_position_search_entry(self)
+            self.search_index_updated()
 
     def assign_pseudonymization_id(self):
         # This omits some character pairs completely because they are hard to read even on screens (1/I and O/0)
@@ -1576,7 +1616,7 @@ class CartPosition(AbstractPosition):
             return Decimal('0.00')
 
 
-class InvoiceAddress(models.Model):
+class InvoiceAddress(SearchIndexMixin, models.Model):
     last_modified = models.DateTimeField(auto_now=True)
     order = models.OneToOneField(Order, null=True, blank=True, related_name='invoice_address', on_delete=models.CASCADE)
     is_business = models.BooleanField(default=False, verbose_name=_('Business customer'))
@@ -1597,6 +1637,8 @@ class InvoiceAddress(models.Model):
         blank=True
     )
 
+    search_fields = ('order', 'company', 'name_cached', 'name_parts')
+
     def save(self, **kwargs):
         if self.order:
             self.order.touch()
@@ -1608,6 +1650,11 @@ class InvoiceAddress(models.Model):
             self.name_parts = {}
         super().save(**kwargs)
 
+        if self.order_id and self.search_index_outdated(kwargs.get('update_fields')):
+            from pretix.base.services.search import update_order_search_entry
+            update_order_search_entry(self.order, self)
+            self.search_index_updated()
+
     @property
     def name(self):
         if not self.name_parts:
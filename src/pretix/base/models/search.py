@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class OrderSearchEntry(models.Model):
+    """
+    Contains the searchable values of an order (if ``position`` is empty) or of one of its
+    positions, such as codes, email addresses, names and comments, in lower case. This is used
+    by all order and attendee searches instead of matching against the original tables.
+
+    On PostgreSQL, ``text`` is covered by a trigram index and searched for substrings. On all other
+    databases, every word of ``text`` is additionally stored as an :py:class:`OrderSearchToken` and
+    searched by prefix.
+
+    The entries are kept up to date by ``Order.save()``, ``OrderPosition.save()`` and
+    ``InvoiceAddress.save()`` through :py:mod:`pretix.base.services.search`.
+    """
+    event = models.ForeignKey('Event', on_delete=models.CASCADE, related_name='+')
+    order = models.ForeignKey('Order', on_delete=models.CASCADE, related_name='search_entries')
+    position = models.ForeignKey('OrderPosition', null=True, blank=True, on_delete=models.CASCADE,
+                                 related_name='search_entries')
+    text = models.TextField()
+
+
+class OrderSearchToken(models.Model):
+    """
+    A single word of an :py:class:`OrderSearchEntry` on databases without trigram support.
+    """
+    entry = models.ForeignKey(OrderSearchEntry, on_delete=models.CASCADE, related_name='tokens')
+    token = models.CharField(max_length=190, db_index=True)
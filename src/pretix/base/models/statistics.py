@@ -0,0 +1,58 @@
+from django.db import models
+
+
+class SalesStatistic(models.Model):
+    """
+    Pre-aggregated sales numbers of an event. Every row sums up all orders of one
+    event that have been placed on the same day (in the event's time zone) and are
+    in the same state. There are three kinds of rows:
+
+    * ``position`` rows count the order positions per subevent, product and variation
+    * ``fee`` rows count the order fees per fee type and internal type
+    * ``order`` rows count the orders themselves. Rows without a subevent cover all
+      orders of the event. For event series, there is an additional row per subevent
+      that covers all orders containing at least one position for that subevent. For
+      those, ``price`` and ``tax_value`` are always zero.
+
+    The rows are updated by :py:func:`pretix.base.services.stats.refresh_sales_statistics`
+    and should never be changed directly.
+
+    :param date: The day the orders have been placed on
+    :type date: date
+    :param status: The order status
+    :type status: str
+    :param count: The number of positions, fees or orders
+    :type count: int
+    :param price: The sum of all gross prices (or order totals)
+    :type price: Decimal
+    :param tax_value: The sum of all taxes
+    :type tax_value: Decimal
+    """
+    KIND_POSITION = 'position'
+    KIND_FEE = 'fee'
+    KIND_ORDER = 'order'
+
+    event = models.ForeignKey('Event', on_delete=models.CASCADE, related_name='sales_statistics')
+    kind = models.CharField(max_length=20)
+    date = models.DateField()
+    status = models.CharField(max_length=3)
+    subevent = models.ForeignKey('SubEvent', null=True, blank=True, on_delete=models.CASCADE)
+    item = models.ForeignKey('Item', null=True, blank=True, on_delete=models.CASCADE)
+    variation = models.ForeignKey('ItemVariation', null=True, blank=True, on_delete=models.CASCADE)
+    fee_type = models.CharField(max_length=100, null=True, blank=True)
+    internal_type = models.CharField(max_length=255, null=True, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    price = models.DecimalField(max_digits=13, decimal_places=2, default=0)
+    tax_value = models.DecimalField(max_digits=13, decimal_places=2, default=0)
+
+    class Meta:
+        index_together = (('event', 'kind', 'date'),)
+
+
+class SalesStatisticsWatermark(models.Model):
+    """
+    Stores up to which point in time changes to the orders of an event have been
+    applied to its :py:class:`SalesStatistic` rows.
+    """
+    event = models.OneToOneField('Event', on_delete=models.CASCADE, related_name='sales_statistics_watermark')
+    last_modified = models.DateTimeField(null=True, blank=True)
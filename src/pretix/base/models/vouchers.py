@@ -18,15 +18,39 @@ from .items import Item, ItemVariation, Quota
 def _generate_random_code(prefix=None):
     charset = list('ABCDEFGHKLMNPQRSTUVWXYZ23456789')
     if prefix:
-        return prefix + get_random_string(length=settings.ENTROPY['voucher_code'], allowed_chars=charset)
+        return prefix.upper() + get_random_string(length=settings.ENTROPY['voucher_code'], allowed_chars=charset)
     return get_random_string(length=settings.ENTROPY['voucher_code'], allowed_chars=charset)
 
 
+def generate_codes(num, prefix=None, batch_size=500):
+    """
+    Generates ``num`` distinct random voucher codes that are not yet in use by any voucher.
+
+    Candidates are created in batches and every batch is checked against the existing vouchers with
+    a single query. As voucher codes are always stored in upper case, this lookup can use the index on
+    the ``code`` column instead of a case-insensitive comparison.
+
+    :param num: The number of codes to generate
+    :param prefix: An optional prefix for all codes
+    :param batch_size: The maximum number of candidates checked in one query. The default works around
+                       SQLite's ``SQLITE_MAX_VARIABLE_NUMBER``.
+    :rtype: list
+    """
+    codes = []
+    seen = set()
+    while len(codes) < num:
+        candidates = set()
+        for i in range(min(num - len(codes), batch_size)):
+            candidates.add(_generate_random_code(prefix=prefix))
+        candidates -= seen
+        candidates -= set(Voucher.objects.filter(code__in=candidates).values_list('code', flat=True))
+        seen |= candidates
+        codes += candidates
+    return codes
+
+
 def generate_code(prefix=None):
-    while True:
-        code = _generate_random_code(prefix=prefix)
-        if not Voucher.objects.filter(code__iexact=code).exists():
-            return code
+    return generate_codes(1, prefix=prefix)[0]
 
 
 class Voucher(LoggedModel):
@@ -286,26 +310,32 @@ class Voucher(LoggedModel):
         return quotas
 
     @staticmethod
-    def clean_quota_check(data, cnt, old_instance, event, quota, item, variation):
-        old_quotas = Voucher.clean_quota_get_ignored(old_instance)
-
+    def clean_quota_target(data, event, quota, item, variation):
         if event.has_subevents and data.get('block_quota') and not data.get('subevent'):
             raise ValidationError(_('If you want this voucher to block quota, you need to select a specific date.'))
 
+        if quota:
+            return
+        elif item and item.has_variations and not variation:
+            raise ValidationError(_('You can only block quota if you specify a specific product variation. '
+                                    'Otherwise it might be unclear which quotas to block.'))
+        elif not item:
+            raise ValidationError(_('You need to specify either a quota or a product.'))
+
+    @staticmethod
+    def clean_quota_check(data, cnt, old_instance, event, quota, item, variation):
+        Voucher.clean_quota_target(data, event, quota, item, variation)
+        old_quotas = Voucher.clean_quota_get_ignored(old_instance)
+
         if quota:
             if quota in old_quotas:
                 return
             else:
                 avail = quota.availability(count_waitinglist=False)
-        elif item and item.has_variations and not variation:
-            raise ValidationError(_('You can only block quota if you specify a specific product variation. '
-                                    'Otherwise it might be unclear which quotas to block.'))
-        elif item and variation:
+        elif variation:
             avail = variation.check_quotas(ignored_quotas=old_quotas, subevent=data.get('subevent'))
-        elif item and not item.has_variations:
-            avail = item.check_quotas(ignored_quotas=old_quotas, subevent=data.get('subevent'))
         else:
-            raise ValidationError(_('You need to specify either a quota or a product.'))
+            avail = item.check_quotas(ignored_quotas=old_quotas, subevent=data.get('subevent'))
 
         if avail[0] != Quota.AVAILABILITY_OK or (avail[1] is not None and avail[1] < cnt):
             raise ValidationError(_('You cannot create a voucher that blocks quota as the selected product or '
@@ -320,10 +350,26 @@ class Voucher(LoggedModel):
         self.code = self.code.upper()
         super().save(*args, **kwargs)
         self.event.cache.set('vouchers_exist', True)
+        self._mark_quotas_dirty()
 
     def delete(self, using=None, keep_parents=False):
         super().delete(using, keep_parents)
         self.event.cache.delete('vouchers_exist')
+        self._mark_quotas_dirty()
+
+    def _mark_quotas_dirty(self):
+        Voucher.bulk_mark_quotas_dirty([self])
+
+    @staticmethod
+    def bulk_mark_quotas_dirty(vouchers):
+        """
+        Marks the quotas affected by the given vouchers as dirty. This needs to be called after vouchers
+        have been created in bulk, as ``save()`` is not called in that case.
+        """
+        from ..services.quotas import mark_products_dirty, mark_quotas_dirty
+
+        mark_quotas_dirty([v.quota_id for v in vouchers if v.quota_id])
+        mark_products_dirty([(v.item_id, v.variation_id, v.subevent_id) for v in vouchers if not v.quota_id and v.item_id])
 
     def is_in_cart(self) -> bool:
         """
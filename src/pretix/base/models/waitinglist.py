@@ -7,6 +7,7 @@ from django.utils.translation import pgettext_lazy, ugettext_lazy as _
 
 from pretix.base.i18n import language
 from pretix.base.models import Voucher
+from pretix.base.models.vouchers import generate_code
 from pretix.base.services.mail import mail
 from pretix.multidomain.urlreverse import build_absolute_uri
 
@@ -75,6 +76,19 @@ class WaitingListEntry(LoggedModel):
     def __str__(self):
         return '%s waits for %s' % (str(self.email), str(self.item))
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._mark_quotas_dirty()
+
+    def delete(self, *args, **kwargs):
+        super().delete(*args, **kwargs)
+        self._mark_quotas_dirty()
+
+    def _mark_quotas_dirty(self):
+        from ..services.quotas import mark_products_dirty
+
+        mark_products_dirty([(self.item_id, self.variation_id, self.subevent_id)])
+
     def clean(self):
         WaitingListEntry.clean_duplicate(self.email, self.item, self.variation, self.subevent, self.pk)
         WaitingListEntry.clean_itemvar(self.event, self.item, self.variation)
@@ -94,19 +108,41 @@ class WaitingListEntry(LoggedModel):
             raise WaitingListException(_('This entry is anonymized and can no longer be used.'))
 
         with transaction.atomic():
-            v = Voucher.objects.create(
-                event=self.event,
-                max_usages=1,
-                valid_until=now() + timedelta(hours=self.event.settings.waiting_list_hours),
-                item=self.item,
-                variation=self.variation,
-                tag='waiting-list',
-                comment=_('Automatically created from waiting list entry for {email}').format(
-                    email=self.email
-                ),
-                block_quota=True,
-                subevent=self.subevent,
-            )
+            v = self.build_voucher()
+            v.save()
+            self.voucher = v
+            self.log_voucher(user=user, auth=auth)
+            self.save()
+
+        self.send_voucher_mail()
+
+    def build_voucher(self, valid_until=None, code=None):
+        """
+        Returns a new, unsaved voucher for this entry.
+        """
+        return Voucher(
+            event=self.event,
+            code=code or generate_code(),
+            max_usages=1,
+            valid_until=valid_until or now() + timedelta(hours=self.event.settings.waiting_list_hours),
+            item=self.item,
+            variation=self.variation,
+            tag='waiting-list',
+            comment=_('Automatically created from waiting list entry for {email}').format(
+                email=self.email
+            ),
+            block_quota=True,
+            subevent=self.subevent,
+        )
+
+    def log_voucher(self, user=None, auth=None, save=True):
+        """
+        Creates the log entries for the voucher that has been assigned to this entry.
+
+        :return: A list of the log entries for the voucher and for this entry.
+        """
+        v = self.voucher
+        return [
             v.log_action('pretix.voucher.added.waitinglist', {
                 'item': self.item.pk,
                 'variation': self.variation.pk if self.variation else None,
@@ -117,11 +153,11 @@ class WaitingListEntry(LoggedModel):
                 'email': self.email,
                 'waitinglistentry': self.pk,
                 'subevent': self.subevent.pk if self.subevent else None,
-            }, user=user, auth=auth)
-            self.log_action('pretix.waitinglist.voucher', user=user, auth=auth)
-            self.voucher = v
-            self.save()
+            }, user=user, auth=auth, save=save),
+            self.log_action('pretix.waitinglist.voucher', user=user, auth=auth, save=save),
+        ]
 
+    def send_voucher_mail(self):
         with language(self.locale):
             mail(
                 self.email,
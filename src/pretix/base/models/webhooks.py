@@ -0,0 +1,59 @@
+import json
+
+from django.db import models
+
+
+class IncomingWebhook(models.Model):
+    """
+    A webhook notification that has been sent to us by a payment provider. Notifications are stored
+    as they come in and are processed in the background by
+    :py:mod:`pretix.base.services.webhooks`, so we can acknowledge them immediately.
+
+    :param provider: The identifier of the processor that handles this notification
+    :type provider: str
+    :param external_id: The ID of the notification at the provider. Notifications are only stored once
+                        per provider and ID, so retried deliveries are ignored.
+    :type external_id: str
+    :param ordering_key: Notifications with the same ordering key are processed one after another in
+                         the order they have been received. This is usually the order they refer to.
+    :type ordering_key: str
+    :param reference: The ID of the object at the provider the notification refers to
+    :type reference: str
+    :param payload: The raw notification, as JSON
+    :type payload: str
+    :param next_attempt: If processing has failed, the notification is not retried before this time
+    :type next_attempt: datetime
+    """
+    STATE_PENDING = 'pending'
+    STATE_PROCESSING = 'processing'
+    STATE_DONE = 'done'
+    STATE_FAILED = 'failed'
+
+    STATE_CHOICES = (
+        (STATE_PENDING, STATE_PENDING),
+        (STATE_PROCESSING, STATE_PROCESSING),
+        (STATE_DONE, STATE_DONE),
+        (STATE_FAILED, STATE_FAILED),
+    )
+
+    provider = models.CharField(max_length=190)
+    external_id = models.CharField(max_length=190)
+    ordering_key = models.CharField(max_length=190, db_index=True)
+    reference = models.CharField(max_length=190, null=True, blank=True)
+    event = models.ForeignKey('Event', null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    order = models.ForeignKey('Order', null=True, blank=True, on_delete=models.CASCADE, related_name='+')
+    payload = models.TextField()
+    state = models.CharField(max_length=190, choices=STATE_CHOICES, default=STATE_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt = models.DateTimeField(null=True, blank=True)
+    received = models.DateTimeField(auto_now_add=True, db_index=True)
+    processed = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        unique_together = (('provider', 'external_id'),)
+        index_together = (('ordering_key', 'state'),)
+        ordering = ('pk',)
+
+    @property
+    def data(self):
+        return json.loads(self.payload)
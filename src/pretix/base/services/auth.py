@@ -6,11 +6,13 @@ from django.dispatch import receiver
 from django.utils.timezone import now
 
 from pretix.base.models.auth import StaffSession
+from pretix.base.services.periodic import periodic
 
 from ..signals import periodic_task
 
 
 @receiver(signal=periodic_task)
+@periodic()
 def close_inactive_staff_sessions(sender, **kwargs):
     StaffSession.objects.annotate(last_used=Max('logs__datetime')).filter(
         Q(last_used__lte=now() - timedelta(seconds=settings.PRETIX_SESSION_TIMEOUT_RELATIVE)) & Q(date_end__isnull=True)
@@ -21,6 +21,7 @@ from pretix.base.models.tax import TAXED_ZERO, TaxedPrice, TaxRule
 from pretix.base.services.checkin import _save_answers
 from pretix.base.services.locking import LockTimeoutException
 from pretix.base.services.pricing import get_price
+from pretix.base.services.quotas import mark_quotas_dirty
 from pretix.base.services.tasks import ProfiledTask
 from pretix.base.settings import PERSON_NAME_SCHEMES
 from pretix.base.templatetags.rich_text import rich_text
@@ -109,6 +110,7 @@ class CartManager:
         self.now_dt = now()
         self._operations = []
         self._quota_diff = Counter()
+        self._dirty_quotas = set()
         self._voucher_use_diff = Counter()
         self._items_cache = {}
         self._subevents_cache = {}
@@ -579,6 +581,7 @@ class CartManager:
                 if op.position.expires > self.now_dt:
                     for q in op.position.quotas:
                         quotas_ok[q] += 1
+                        self._dirty_quotas.add(q)
                 op.position.addons.all().delete()
                 op.position.delete()
 
@@ -609,6 +612,8 @@ class CartManager:
 
                 for q in op.quotas:
                     quotas_ok[q] -= available_count
+                    if available_count:
+                        self._dirty_quotas.add(q)
                 if op.voucher:
                     vouchers_ok[op.voucher] -= available_count
 
@@ -674,6 +679,7 @@ class CartManager:
                 err = self._delete_out_of_timeframe()
                 err = self.extend_expired_positions() or err
                 err = self._perform_operations() or err
+                mark_quotas_dirty(self._dirty_quotas)
             if err:
                 raise CartError(err)
 
@@ -6,6 +6,7 @@ from django.utils.translation import ugettext as _
 from pretix.base.models import (
     Checkin, CheckinList, Order, OrderPosition, Question, QuestionOption,
 )
+from pretix.base.models.log import buffered_logging
 
 
 class CheckInError(Exception):
@@ -58,6 +59,7 @@ def _save_answers(op, answers, given_answers):
 
 
 @transaction.atomic
+@buffered_logging()
 def perform_checkin(op: OrderPosition, clist: CheckinList, given_answers: dict, force=False,
                     ignore_unpaid=False, nonce=None, datetime=None, questions_supported=True,
                     user=None, auth=None):
@@ -1,37 +1,129 @@
+import logging
+import time
 from datetime import timedelta
 
+from django.core.cache import cache
+from django.core.files.storage import default_storage
 from django.dispatch import receiver
 from django.utils.timezone import now
 
 from pretix.base.models import CachedCombinedTicket, CachedTicket
+from pretix.base.services.periodic import periodic
+from pretix.base.services.tasks import ProfiledTask
+from pretix.celery_app import app
 
-from ..models import CachedFile, CartPosition, InvoiceAddress
+from ..models import CachedFile, CartPosition, IncomingWebhook, InvoiceAddress
 from ..signals import periodic_task
 
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+TIME_BUDGET = 300
+
+
+@app.task(base=ProfiledTask)
+def delete_stored_files(names):
+    for name in names:
+        try:
+            default_storage.delete(name)
+        except OSError:
+            logger.exception('Could not delete file {}'.format(name))
+
+
+def delete_in_chunks(name, qs, file_fields=(), deadline=None):
+    """
+    Deletes all rows matched by ``qs`` in chunks of ``CHUNK_SIZE`` rows, each in its own short
+    transaction, until either no rows are left or ``deadline`` (a value of ``time.monotonic()``) has
+    been reached. In the latter case, the primary key of the last deleted row is stored in the cache
+    and the next call with the same ``name`` resumes from there. Once the end of the table has been
+    reached, the next call starts at the beginning again.
+
+    If ``file_fields`` is given, no model signals are sent and the files referenced by these fields
+    are deleted from storage by a background task instead. As the rows are then deleted with a single
+    query, this is only allowed for models that no other model refers to, since referencing rows
+    would neither be deleted nor updated.
+
+    :return: ``True``, if all matching rows have been deleted.
+    """
+    if file_fields and qs.model._meta.related_objects:
+        raise ValueError('{} rows can not be deleted without model signals, as other models refer to them.'.format(
+            qs.model.__name__
+        ))
+
+    cursor_key = 'pretix_cleanup_cursor_{}'.format(name)
+    cursor = cache.get(cursor_key)
+    while True:
+        chunk_qs = qs.order_by('pk')
+        if cursor is not None:
+            chunk_qs = chunk_qs.filter(pk__gt=cursor)
+        rows = list(chunk_qs.values_list('pk', *file_fields)[:CHUNK_SIZE])
+        if not rows:
+            cache.delete(cursor_key)
+            return True
+
+        pks = [r[0] for r in rows]
+        if file_fields:
+            # Skip the post_delete handlers, which would delete every file synchronously. This is safe as
+            # no other model refers to this one, see above.
+            qs.model.objects.filter(pk__in=pks)._raw_delete(qs.db)
+            names = [n for r in rows for n in r[1:] if n]
+            if names:
+                delete_stored_files.apply_async(args=(names,))
+        else:
+            qs.model.objects.filter(pk__in=pks).delete()
+
+        cursor = pks[-1]
+        if deadline and time.monotonic() > deadline:
+            cache.set(cursor_key, cursor, 24 * 3600)
+            return False
+
+
+def _run_jobs(jobs, **kwargs):
+    # Every job gets an equal share of the remaining time budget, such that a job with a large backlog does
+    # not keep the following jobs from running
+    end = time.monotonic() + TIME_BUDGET
+    for i, (name, qs) in enumerate(jobs):
+        deadline = time.monotonic() + (end - time.monotonic()) / (len(jobs) - i)
+        delete_in_chunks(name, qs, deadline=deadline, **kwargs)
+
 
 @receiver(signal=periodic_task)
+@periodic(interval=timedelta(hours=1))
 def clean_cart_positions(sender, **kwargs):
-    for cp in CartPosition.objects.filter(expires__lt=now() - timedelta(days=14), addon_to__isnull=False):
-        cp.delete()
-    for cp in CartPosition.objects.filter(expires__lt=now() - timedelta(days=14), addon_to__isnull=True):
-        cp.delete()
-    for ia in InvoiceAddress.objects.filter(order__isnull=True, last_modified__lt=now() - timedelta(days=14)):
-        ia.delete()
+    cutoff = now() - timedelta(days=14)
+    _run_jobs([
+        ('addon_cartpositions', CartPosition.objects.filter(expires__lt=cutoff, addon_to__isnull=False)),
+        ('cartpositions', CartPosition.objects.filter(expires__lt=cutoff, addon_to__isnull=True)),
+        ('invoiceaddresses', InvoiceAddress.objects.filter(order__isnull=True, last_modified__lt=cutoff)),
+    ])
 
 
 @receiver(signal=periodic_task)
+@periodic(interval=timedelta(hours=1))
 def clean_cached_files(sender, **kwargs):
-    for cf in CachedFile.objects.filter(expires__isnull=False, expires__lt=now()):
-        cf.delete()
+    _run_jobs([
+        ('cachedfiles', CachedFile.objects.filter(expires__isnull=False, expires__lt=now())),
+    ], file_fields=('file',))
 
 
 @receiver(signal=periodic_task)
+@periodic(interval=timedelta(hours=1))
 def clean_cached_tickets(sender, **kwargs):
-    for cf in CachedTicket.objects.filter(created__lte=now() - timedelta(days=30)):
-        cf.delete()
-    for cf in CachedCombinedTicket.objects.filter(created__lte=now() - timedelta(days=30)):
-        cf.delete()
-    for cf in CachedTicket.objects.filter(created__lte=now() - timedelta(minutes=30), file__isnull=True):
-        cf.delete()
-    for cf in CachedCombinedTicket.objects.filter(created__lte=now() - timedelta(minutes=30), file__isnull=True):
-        cf.delete()
+    _run_jobs([
+        ('cachedtickets', CachedTicket.objects.filter(created__lte=now() - timedelta(days=30))),
+        ('cachedcombinedtickets', CachedCombinedTicket.objects.filter(created__lte=now() - timedelta(days=30))),
+        ('cachedtickets_empty', CachedTicket.objects.filter(created__lte=now() - timedelta(minutes=30),
+                                                            file__isnull=True)),
+        ('cachedcombinedtickets_empty', CachedCombinedTicket.objects.filter(created__lte=now() - timedelta(minutes=30),
+                                                                            file__isnull=True)),
+    ], file_fields=('file',))
+
+
+@receiver(signal=periodic_task)
+@periodic(interval=timedelta(hours=1))
+def clean_incoming_webhooks(sender, **kwargs):
+    # Processed notifications are only kept to recognize retried deliveries
+    _run_jobs([
+        ('incomingwebhooks', IncomingWebhook.objects.filter(state=IncomingWebhook.STATE_DONE,
+                                                            received__lt=now() - timedelta(days=30))),
+    ])
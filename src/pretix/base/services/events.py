@@ -0,0 +1,27 @@
+from django.db import transaction
+
+from pretix.base.models import Event
+from pretix.base.services.tasks import ProfiledTask
+from pretix.celery_app import app
+
+# Events with at least this many products are copied in the background by the event creation wizard
+ASYNC_COPY_THRESHOLD = 100
+
+
+@app.task(base=ProfiledTask, bind=True)
+def copy_event_data(self, event: int, other: int, settings: dict=None) -> int:
+    """
+    Copies all data of the event ``other`` to ``event``, see :py:meth:`Event.copy_data_from`. The
+    given ``settings`` are set afterwards and take precedence over the copied settings.
+    """
+    def set_progress(val):
+        if not self.request.called_directly and not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta={'value': val})
+
+    event = Event.objects.get(pk=event)
+    other = Event.objects.get(pk=other)
+    with transaction.atomic():
+        event.copy_data_from(other, progress_callback=set_progress)
+        for k, v in (settings or {}).items():
+            event.settings.set(k, v)
+    return event.pk
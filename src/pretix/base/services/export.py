@@ -1,6 +1,6 @@
 from typing import Any, Dict
 
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.utils.timezone import override
 
 from pretix.base.i18n import language
@@ -10,8 +10,12 @@ from pretix.base.signals import register_data_exporters
 from pretix.celery_app import app
 
 
-@app.task(base=ProfiledTask)
-def export(event: str, fileid: str, provider: str, form_data: Dict[str, Any]) -> None:
+@app.task(base=ProfiledTask, bind=True)
+def export(self, event: str, fileid: str, provider: str, form_data: Dict[str, Any]) -> None:
+    def set_progress(val):
+        if not self.request.called_directly and not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta={'value': val})
+
     event = Event.objects.get(id=event)
     file = CachedFile.objects.get(id=fileid)
     with language(event.settings.locale), override(event.settings.timezone):
@@ -19,7 +23,14 @@ def export(event: str, fileid: str, provider: str, form_data: Dict[str, Any]) ->
         for receiver, response in responses:
             ex = response(event)
             if ex.identifier == provider:
+                # Set afterwards, as exporters of plugins might not accept it in their constructor
+                ex.progress_callback = set_progress
                 file.filename, file.type, data = ex.render(form_data)
-                file.file.save(cachedfile_name(file, file.filename), ContentFile(data))
+                if isinstance(data, bytes):
+                    file.file.save(cachedfile_name(file, file.filename), ContentFile(data))
+                else:
+                    # Streamed in chunks by the storage backend instead of being loaded into memory
+                    with data:
+                        file.file.save(cachedfile_name(file, file.filename), File(data))
                 file.save()
     return file.pk
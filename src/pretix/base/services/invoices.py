@@ -22,6 +22,7 @@ from pretix.base.models import (
     Invoice, InvoiceAddress, InvoiceLine, Order, OrderPayment,
 )
 from pretix.base.models.tax import EU_CURRENCIES
+from pretix.base.services.periodic import periodic
 from pretix.base.services.tasks import TransactionAwareTask
 from pretix.base.settings import GlobalSettingsObject
 from pretix.base.signals import periodic_task
@@ -332,6 +333,7 @@ def build_preview_invoice_pdf(event):
 
 
 @receiver(signal=periodic_task)
+@periodic(interval=timedelta(hours=1))
 def fetch_ecb_rates(sender, **kwargs):
     if not settings.FETCH_ECB_RATES:
         return
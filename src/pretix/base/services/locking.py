@@ -14,15 +14,23 @@ LOCK_TIMEOUT = 120
 
 
 class LockManager:
+    """
+    Locks the event for the duration of the ``with`` block. If the lock is already held through the
+    same event object, e.g. by an outer ``with event.lock()`` block, it is kept instead of being
+    released at the end of the inner block.
+    """
+
     def __init__(self, event):
         self.event = event
 
     def __enter__(self):
+        self.nested = bool(getattr(self.event, '_lock', None))
         lock_event(self.event)
         return now()
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        release_event(self.event)
+        if not self.nested:
+            release_event(self.event)
         if exc_type is not None:
             return False
 
@@ -0,0 +1,71 @@
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from pretix.base.models import (
+    Event, LogEntry, LogEntryArchive, QueuedNotification,
+)
+from pretix.base.services.periodic import periodic
+
+from ..signals import periodic_task
+
+CHUNK_SIZE = 1000
+TIME_BUDGET = 300
+
+
+def archive_logentries(cutoff, deadline=None):
+    """
+    Moves all log entries older than ``cutoff`` into :py:class:`LogEntryArchive` rows. This
+    happens in chunks of ``CHUNK_SIZE`` entries, each in its own short transaction, until either
+    no entries are left or ``deadline`` (a value of ``time.monotonic()``) has been reached.
+
+    :return: ``True``, if all matching entries have been archived.
+    """
+    while True:
+        with transaction.atomic():
+            entries = list(LogEntry.all.filter(datetime__lt=cutoff).exclude(
+                pk__in=QueuedNotification.objects.values('logentry_id')
+            ).order_by('pk')[:CHUNK_SIZE])
+            if not entries:
+                return True
+
+            groups = OrderedDict()
+            for le in entries:
+                groups.setdefault(LogEntryArchive.group_key(le), []).append(le)
+            LogEntryArchive.objects.bulk_create([LogEntryArchive.pack(g) for g in groups.values()])
+            # LogEntry.delete() refuses to work on purpose, this is the only place entries are removed
+            LogEntry.all.filter(pk__in=[le.pk for le in entries]).delete()
+
+        if deadline and time.monotonic() > deadline:
+            return False
+
+
+def restore_archived_logentries(event: Event):
+    """
+    Moves all archived log entries of an event back into the :py:class:`LogEntry` table, e.g.
+    to make them available to data shredders. They will be archived again by the next run.
+    """
+    qs = LogEntryArchive.objects.filter(event=event)
+    while True:
+        with transaction.atomic():
+            archives = list(qs.order_by('pk')[:100])
+            if not archives:
+                return
+            LogEntry.all.bulk_create([le for a in archives for le in a.get_logentries()])
+            LogEntryArchive.objects.filter(pk__in=[a.pk for a in archives]).delete()
+
+
+@receiver(signal=periodic_task)
+@periodic(interval=timedelta(hours=1))
+def archive_old_logentries(sender, **kwargs):
+    if not settings.PRETIX_LOG_ARCHIVE_DAYS:
+        return
+    archive_logentries(
+        now() - timedelta(days=settings.PRETIX_LOG_ARCHIVE_DAYS),
+        deadline=time.monotonic() + TIME_BUDGET
+    )
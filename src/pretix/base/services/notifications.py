@@ -1,90 +1,181 @@
+from datetime import timedelta
+from typing import List
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Min, Q
+from django.dispatch import receiver
 from django.template.loader import get_template
+from django.utils.timezone import now
+from django.utils.translation import ungettext
 from inlinestyler.utils import inline_css
 
 from pretix.base.i18n import language
-from pretix.base.models import LogEntry, NotificationSetting, User
-from pretix.base.notifications import Notification, get_all_notification_types
+from pretix.base.models import (
+    Event, LogEntry, NotificationSetting, QueuedNotification, User,
+)
+from pretix.base.models.log import match_action_type
+from pretix.base.notifications import (
+    Notification, NotificationType, get_all_notification_types,
+)
 from pretix.base.services.mail import mail_send_task
+from pretix.base.services.periodic import periodic
 from pretix.base.services.tasks import ProfiledTask, TransactionAwareTask
+from pretix.base.signals import periodic_task
 from pretix.celery_app import app
 from pretix.helpers.urls import build_absolute_uri
 
+RECIPIENT_CACHE_TTL = 300
+DIGEST_INTERVAL = timedelta(hours=1)
+
 
 @app.task(base=TransactionAwareTask)
 def notify(logentry_id: int):
-    logentry = LogEntry.all.get(id=logentry_id)
-    if not logentry.event:
-        return  # Ignore, we only have event-related notifications right now
-    types = get_all_notification_types(logentry.event)
+    queued = _notify(LogEntry.all.get(id=logentry_id))
+    QueuedNotification.objects.bulk_create(queued)
+    _deliver_immediately(queued)
 
-    notification_type = None
-    typepath = logentry.action_type
-    while not notification_type and '.' in typepath:
-        notification_type = types.get(typepath + ('.*' if typepath != logentry.action_type else ''))
-        typepath = typepath.rsplit('.', 1)[0]
 
-    if not notification_type:
-        return  # No suitable plugin
-
-    # All users that have the permission to get the notification
-    users = logentry.event.get_users_with_permission(
-        notification_type.required_permission
-    ).filter(notifications_send=True)
-    if logentry.user:
-        users = users.exclude(pk=logentry.user.pk)
-
-    # Get all notification settings, both specific to this event as well as global
-    notify_specific = {
-        (ns.user, ns.method): ns.enabled
-        for ns in NotificationSetting.objects.filter(
-            event=logentry.event,
-            action_type=notification_type.action_type,
-            user__pk__in=users.values_list('pk', flat=True)
-        )
-    }
-    notify_global = {
-        (ns.user, ns.method): ns.enabled
-        for ns in NotificationSetting.objects.filter(
-            event__isnull=True,
+@app.task(base=TransactionAwareTask)
+def notify_batch(logentry_ids: list):
+    types_cache = {}
+    recipients_cache = {}
+    queued = []
+    for logentry in LogEntry.all.filter(id__in=logentry_ids).select_related('event', 'user'):
+        if logentry.event_id and logentry.event_id not in types_cache:
+            types_cache[logentry.event_id] = get_all_notification_types(logentry.event)
+        queued += _notify(logentry, types_cache.get(logentry.event_id), recipients_cache)
+    QueuedNotification.objects.bulk_create(queued)
+    _deliver_immediately(queued)
+
+
+def _deliver_immediately(queued: List[QueuedNotification]):
+    """
+    Starts the delivery of the given notifications to all users who did not choose to receive a digest.
+    """
+    if not queued:
+        return
+    user_ids = set(User.objects.filter(
+        pk__in={q.user_id for q in queued}, notifications_digest=False
+    ).values_list('pk', flat=True))
+    for user_id, method in {(q.user_id, q.method) for q in queued if q.user_id in user_ids}:
+        deliver_notifications.apply_async(args=(user_id, method))
+
+
+def get_recipients(event: Event, notification_type: NotificationType):
+    """
+    Returns a list of ``(user_id, method)`` tuples for all users that want to be notified about
+    the given type of notification in the given event, based on their permissions and their
+    event-specific and global notification settings. The result is cached for
+    ``RECIPIENT_CACHE_TTL`` seconds.
+    """
+    key = 'pretix_notification_recipients_{}_{}'.format(event.pk, notification_type.action_type)
+    recipients = cache.get(key)
+    if recipients is None:
+        # All users that have the permission to get the notification
+        users = event.get_users_with_permission(
+            notification_type.required_permission
+        ).filter(notifications_send=True)
+
+        # Event-specific settings take precedence over global ones
+        enabled = {}
+        for ns in sorted(NotificationSetting.objects.filter(
+            Q(event=event) | Q(event__isnull=True),
             action_type=notification_type.action_type,
             user__pk__in=users.values_list('pk', flat=True)
-        )
-    }
-
-    for um, enabled in notify_specific.items():
-        user, method = um
-        if enabled:
-            send_notification.apply_async(args=(logentry_id, notification_type.action_type, user.pk, method))
+        ), key=lambda ns: ns.event_id is not None):
+            enabled[ns.user_id, ns.method] = ns.enabled
+        recipients = [um for um, e in enabled.items() if e]
+        cache.set(key, recipients, RECIPIENT_CACHE_TTL)
+    return recipients
 
-    for um, enabled in notify_global.items():
-        user, method = um
-        if enabled and um not in notify_specific:
-            send_notification.apply_async(args=(logentry_id, notification_type.action_type, user.pk, method))
 
+def _notify(logentry: LogEntry, types: dict=None, recipients_cache: dict=None):
+    if not logentry.event:
+        return []  # Ignore, we only have event-related notifications right now
+    if types is None:
+        types = get_all_notification_types(logentry.event)
 
-@app.task(base=ProfiledTask)
-def send_notification(logentry_id: int, action_type: str, user_id: int, method: str):
-    logentry = LogEntry.all.get(id=logentry_id)
-    user = User.objects.get(id=user_id)
-    types = get_all_notification_types(logentry.event)
-    notification_type = types.get(action_type)
+    notification_type = match_action_type(types, logentry.action_type)
     if not notification_type:
-        return  # Ignore, e.g. plugin not active for this event
+        return []  # No suitable plugin
+
+    if recipients_cache is None:
+        recipients_cache = {}
+    key = (logentry.event_id, notification_type.action_type)
+    if key not in recipients_cache:
+        recipients_cache[key] = get_recipients(logentry.event, notification_type)
+
+    return [
+        QueuedNotification(user_id=user_id, logentry=logentry, action_type=notification_type.action_type,
+                           method=method)
+        for user_id, method in recipients_cache[key]
+        if user_id != logentry.user_id
+    ]
+
+
+@receiver(signal=periodic_task)
+@periodic()
+def send_queued_notifications(sender, **kwargs):
+    """
+    Starts the delivery of all queued notifications, one task per user and method. For users who
+    chose to receive a digest, notifications are only delivered once the oldest one has been
+    waiting for ``DIGEST_INTERVAL``. All other notifications are usually delivered right after they
+    have been queued, this only retries deliveries that failed.
+    """
+    cutoff = now() - DIGEST_INTERVAL
+    for row in QueuedNotification.objects.order_by().values(
+        'user', 'method', 'user__notifications_digest'
+    ).annotate(first=Min('created')):
+        if not row['user__notifications_digest'] or row['first'] < cutoff:
+            deliver_notifications.apply_async(args=(row['user'], row['method']))
 
-    with language(user.locale):
-        notification = notification_type.build_notification(logentry)
 
-        if method == "mail":
-            send_notification_mail(notification, user)
-
-
-def send_notification_mail(notification: Notification, user: User):
-    ctx = {
+@app.task(base=ProfiledTask)
+def deliver_notifications(user_id: int, method: str):
+    with transaction.atomic():
+        # The lock makes sure that concurrent deliveries to the same user do not send notifications twice.
+        # The notifications are only removed from the queue once they have been sent successfully.
+        ids = list(QueuedNotification.objects.filter(
+            user_id=user_id, method=method
+        ).select_for_update().values_list('pk', flat=True))
+        if not ids:
+            return
+        queued = list(QueuedNotification.objects.filter(pk__in=ids).select_related(
+            'logentry', 'logentry__event', 'logentry__event__organizer'
+        ).order_by('created'))
+
+        user = User.objects.get(id=user_id)
+        if user.notifications_send:
+            _send_notifications(user, method, queued)
+        QueuedNotification.objects.filter(pk__in=ids).delete()
+
+
+def _send_notifications(user: User, method: str, queued: List[QueuedNotification]):
+    types_cache = {}
+    with language(user.locale):
+        notifications = []
+        for q in queued:
+            event = q.logentry.event
+            if event.pk not in types_cache:
+                types_cache[event.pk] = get_all_notification_types(event)
+            notification_type = types_cache[event.pk].get(q.action_type)
+            if notification_type:  # Ignore, e.g. plugin not active for this event
+                notifications.append(notification_type.build_notification(q.logentry))
+
+        if method == "mail" and notifications:
+            if len(notifications) == 1:
+                send_notification_mail(notifications[0], user)
+            else:
+                send_notification_digest_mail(notifications, user)
+
+
+def _mail_context(user: User):
+    return {
         'site': settings.PRETIX_INSTANCE_NAME,
         'site_url': settings.SITE_URL,
         'color': '#8E44B3',
-        'notification': notification,
         'settings_url': build_absolute_uri(
             'control:user.settings.notifications',
         ),
@@ -97,6 +188,11 @@ def send_notification_mail(notification: Notification, user: User):
         )
     }
 
+
+def send_notification_mail(notification: Notification, user: User):
+    ctx = _mail_context(user)
+    ctx['notification'] = notification
+
     tpl_html = get_template('pretixbase/email/notification.html')
     body_html = inline_css(tpl_html.render(ctx))
     tpl_plain = get_template('pretixbase/email/notification.txt')
@@ -110,3 +206,26 @@ def send_notification_mail(notification: Notification, user: User):
         'sender': settings.MAIL_FROM,
         'headers': {},
     })
+
+
+def send_notification_digest_mail(notifications: List[Notification], user: User):
+    ctx = _mail_context(user)
+    ctx['notifications'] = notifications
+
+    tpl_html = get_template('pretixbase/email/notification_digest.html')
+    body_html = inline_css(tpl_html.render(ctx))
+    tpl_plain = get_template('pretixbase/email/notification_digest.txt')
+    body_plain = tpl_plain.render(ctx)
+
+    mail_send_task.apply_async(kwargs={
+        'to': [user.email],
+        'subject': '[{}] {}'.format(
+            settings.PRETIX_INSTANCE_NAME,
+            ungettext('%(count)d new notification', '%(count)d new notifications',
+                      len(notifications)) % {'count': len(notifications)}
+        ),
+        'body': body_plain,
+        'html': body_html,
+        'sender': settings.MAIL_FROM,
+        'headers': {},
+    })
@@ -21,10 +21,11 @@ from pretix.base.i18n import (
     LazyCurrencyNumber, LazyDate, LazyLocaleException, LazyNumber, language,
 )
 from pretix.base.models import (
-    CartPosition, Device, Event, Item, ItemVariation, Order, OrderPayment,
-    OrderPosition, Quota, User, Voucher,
+    CartPosition, Device, Event, Invoice, Item, ItemVariation, Order,
+    OrderPayment, OrderPosition, Quota, User, Voucher,
 )
 from pretix.base.models.event import SubEvent
+from pretix.base.models.log import buffered_logging, write_log_entries
 from pretix.base.models.orders import (
     CachedCombinedTicket, CachedTicket, InvoiceAddress, OrderFee, OrderRefund,
     generate_position_secret, generate_secret,
@@ -37,10 +38,16 @@ from pretix.base.services.invoices import (
 )
 from pretix.base.services.locking import LockTimeoutException
 from pretix.base.services.mail import SendMailException
+from pretix.base.services.periodic import filter_event_shard, periodic
 from pretix.base.services.pricing import get_price
+from pretix.base.services.quotas import (
+    mark_order_quotas_dirty, mark_products_dirty,
+)
+from pretix.base.services.stats import mark_sales_statistics_dirty
 from pretix.base.services.tasks import ProfiledTask
 from pretix.base.signals import (
-    allow_ticket_download, order_fee_calculation, order_placed, periodic_task,
+    allow_ticket_download, order_expired, order_fee_calculation, order_placed,
+    periodic_task,
 )
 from pretix.celery_app import app
 from pretix.helpers.models import modelcopy
@@ -97,6 +104,8 @@ def extend_order(order: Order, new_date: datetime, force: bool=False, user: User
         if was_expired:
             order.status = Order.STATUS_PENDING
         order.save(update_fields=['expires'] + (['status'] if was_expired else []))
+        if was_expired:
+            mark_order_quotas_dirty([order.pk])
         order.log_action(
             'pretix.event.order.expirychanged',
             user=user,
@@ -136,6 +145,7 @@ def mark_order_refunded(order, user=None, auth=None, api_token=None):
     with order.event.lock():
         order.status = Order.STATUS_REFUNDED
         order.save(update_fields=['status'])
+    mark_order_quotas_dirty([order.pk])
 
     order.log_action('pretix.event.order.refunded', user=user, auth=auth or api_token)
     i = order.invoices.filter(is_cancellation=False).last()
@@ -159,15 +169,68 @@ def mark_order_expired(order, user=None, auth=None):
     with order.event.lock():
         order.status = Order.STATUS_EXPIRED
         order.save(update_fields=['status'])
+    mark_order_quotas_dirty([order.pk])
 
     order.log_action('pretix.event.order.expired', user=user, auth=auth)
     i = order.invoices.filter(is_cancellation=False).last()
     if i:
         generate_cancellation(i)
 
+    order_expired.send(order.event, order=order)
     return order
 
 
+def mark_orders_expired(event, order_ids, user=None, auth=None, batch_size=500):
+    """
+    Marks many pending orders of the same event as expired. In contrast to calling
+    :py:func:`mark_order_expired` for every order, this takes the event lock only once and
+    changes the orders and creates the log entries in bulk. Invoice cancellations and the
+    ``order_expired`` signal are processed after the changes have been committed.
+
+    :param event: The event all orders belong to
+    :param order_ids: The IDs of the orders to expire. Orders that are no longer pending are skipped.
+    :return: The list of IDs of all orders that have been expired
+    """
+    order_ids = list(order_ids)
+    expired = []
+    with event.lock():
+        for i in range(0, len(order_ids), batch_size):
+            with transaction.atomic():
+                orders = list(Order.objects.filter(
+                    event=event, pk__in=order_ids[i:i + batch_size], status=Order.STATUS_PENDING
+                ).only('pk'))
+                if not orders:
+                    continue
+                ids = [o.pk for o in orders]
+                Order.objects.filter(pk__in=ids).update(status=Order.STATUS_EXPIRED, last_modified=now())
+                logentries = []
+                for o in orders:
+                    o.event = event
+                    logentries.append(o.log_action('pretix.event.order.expired', user=user, auth=auth, save=False))
+                write_log_entries(logentries)
+                mark_order_quotas_dirty(ids)
+                mark_sales_statistics_dirty([event])
+            expired += ids
+
+    if not expired:
+        return expired
+
+    event.cache.clear()
+
+    for i in range(0, len(expired), batch_size):
+        ids = expired[i:i + batch_size]
+        invoices = {}
+        for inv in Invoice.objects.filter(order_id__in=ids, is_cancellation=False):
+            invoices[inv.order_id] = inv
+        for inv in invoices.values():
+            generate_cancellation(inv)
+
+        for o in Order.objects.filter(pk__in=ids).select_related('event'):
+            order_expired.send(event, order=o)
+
+    return expired
+
+
 @transaction.atomic
 def approve_order(order, user=None, send_mail: bool=True, auth=None):
     """
@@ -258,6 +321,7 @@ def deny_order(order, comment='', user=None, send_mail: bool=True, auth=None):
     with order.event.lock():
         order.status = Order.STATUS_CANCELED
         order.save(update_fields=['status'])
+    mark_order_quotas_dirty([order.pk])
 
     order.log_action('pretix.event.order.denied', user=user, auth=auth, data={
         'comment': comment
@@ -327,6 +391,7 @@ def _cancel_order(order, user=None, send_mail: bool=True, api_token=None, device
             raise OrderError(_('You cannot cancel this order.'))
         order.status = Order.STATUS_CANCELED
         order.save(update_fields=['status'])
+    mark_order_quotas_dirty([order.pk])
 
     order.log_action('pretix.event.order.canceled', user=user, auth=api_token or oauth_application or device)
     i = order.invoices.filter(is_cancellation=False).last()
@@ -496,6 +561,7 @@ def _get_fees(positions: List[CartPosition], payment_provider: BasePaymentProvid
     return fees, pf
 
 
+@buffered_logging()
 def _create_order(event: Event, email: str, positions: List[CartPosition], now_dt: datetime,
                   payment_provider: BasePaymentProvider, locale: str=None, address: InvoiceAddress=None,
                   meta_info: dict=None, sales_channel: str='web'):
@@ -541,6 +607,7 @@ def _create_order(event: Event, email: str, positions: List[CartPosition], now_d
             )
 
         OrderPosition.transform_cart_positions(positions, order)
+        mark_order_quotas_dirty([order.pk])
         order.log_action('pretix.event.order.placed')
         if order.require_approval:
             order.log_action('pretix.event.order.placed.require_approval')
@@ -645,27 +712,33 @@ def _perform_order(event: str, payment_provider: str, position_ids: List[str],
 
 
 @receiver(signal=periodic_task)
+@periodic(shard_by_event=True)
 def expire_orders(sender, **kwargs):
-    eventcache = {}
-
-    for o in Order.objects.filter(expires__lt=now(), status=Order.STATUS_PENDING,
-                                  require_approval=False).select_related('event'):
-        expire = eventcache.get(o.event.pk, None)
-        if expire is None:
-            expire = o.event.settings.get('payment_term_expire_automatically', as_type=bool)
-            eventcache[o.event.pk] = expire
-        if expire:
-            mark_order_expired(o)
+    qs = filter_event_shard(
+        Order.objects.filter(expires__lt=now(), status=Order.STATUS_PENDING, require_approval=False),
+        **kwargs
+    )
+    event_ids = qs.order_by().values_list('event_id', flat=True).distinct()
+    for e in Event.objects.filter(pk__in=event_ids).prefetch_related('_settings_objects',
+                                                                     'organizer___settings_objects'):
+        if not e.settings.get('payment_term_expire_automatically', as_type=bool):
+            continue
+        try:
+            mark_orders_expired(e, qs.filter(event=e).values_list('pk', flat=True))
+        except LockTimeoutException:
+            logger.warning('Could not expire orders of event {} as the event is locked.'.format(e.pk))
 
 
 @receiver(signal=periodic_task)
+@periodic(interval=timedelta(minutes=30), shard_by_event=True)
 def send_expiry_warnings(sender, **kwargs):
     eventcache = {}
     today = now().replace(hour=0, minute=0, second=0)
 
-    for o in Order.objects.filter(
+    qs = Order.objects.filter(
         expires__gte=today, expiry_reminder_sent=False, status=Order.STATUS_PENDING, datetime__lte=now() - timedelta(hours=2)
-    ).only('pk'):
+    )
+    for o in filter_event_shard(qs, **kwargs).only('pk'):
         with transaction.atomic():
             o = Order.objects.select_related('event').select_for_update().get(pk=o.pk)
             if o.status != Order.STATUS_PENDING or o.expiry_reminder_sent:
@@ -714,10 +787,11 @@ def send_expiry_warnings(sender, **kwargs):
 
 
 @receiver(signal=periodic_task)
+@periodic(interval=timedelta(minutes=30), shard_by_event=True)
 def send_download_reminders(sender, **kwargs):
     today = now().replace(hour=0, minute=0, second=0, microsecond=0)
 
-    for e in Event.objects.filter(date_from__gte=today):
+    for e in filter_event_shard(Event.objects.filter(date_from__gte=today), 'id', **kwargs):
 
         days = e.settings.get('mail_days_download_reminder', as_type=int)
         if days is None:
@@ -1291,7 +1365,9 @@ class OrderChangeManager:
                     raise OrderError(self.error_messages['not_pending_or_paid'])
                 self._check_quotas()
                 self._check_complete_cancel()
+                mark_products_dirty(self.order.positions.values_list('item_id', 'variation_id', 'subevent_id'))
                 self._perform_operations()
+                mark_order_quotas_dirty([self.order.pk] + ([self.split_order.pk] if self.split_order else []))
             self._recalculate_total_and_payment_fee()
             self._reissue_invoice()
             self._clear_tickets_cache()
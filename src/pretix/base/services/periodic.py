@@ -0,0 +1,158 @@
+import logging
+import time
+import uuid
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from pretix.base.metrics import (
+    pretix_periodic_task_duration_seconds, pretix_periodic_task_runs_total,
+)
+from pretix.base.services.tasks import ProfiledTask
+from pretix.base.signals import periodic_task
+from pretix.celery_app import app
+
+logger = logging.getLogger(__name__)
+_receivers = {}
+
+
+def periodic(interval: timedelta=None, shard_by_event=False, lock_timeout: timedelta=timedelta(hours=1)):
+    """
+    Configures how a receiver of the ``periodic_task`` signal is scheduled. Use this below the ``@receiver``
+    decorator::
+
+        @receiver(signal=periodic_task)
+        @periodic(interval=timedelta(minutes=30), shard_by_event=True)
+        def send_reminders(sender, **kwargs):
+            for e in filter_event_shard(Event.objects.all(), 'id', **kwargs):
+                …
+
+    :param interval: The minimum time between two successful runs of this receiver. By default, the receiver
+                     runs every time ``runperiodic`` is called.
+    :param shard_by_event: If set, the receiver is called ``PERIODIC_TASK_SHARDS`` times in parallel with
+                           different values for the keyword arguments ``shard`` and ``shards``. The receiver
+                           is expected to only process events whose ID modulo ``shards`` equals ``shard``, see
+                           :py:func:`filter_event_shard`.
+    :param lock_timeout: The maximum time a run of this receiver is expected to take. Until then, no other run
+                         of the same receiver (and shard) will be started.
+
+    Receivers using this decorator are scheduled by ``runperiodic`` on their own and therefore ignore the
+    ``periodic_task`` signal if it is sent the usual way. Calling the function directly still works.
+    """
+    def decorator(fn):
+        fn.periodic_interval = interval
+        fn.periodic_shard_by_event = shard_by_event
+        fn.periodic_lock_timeout = lock_timeout
+        _receivers[get_receiver_name(fn)] = fn
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if kwargs.get('signal') is periodic_task:
+                return
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def filter_event_shard(qs, field='event_id', shard=0, shards=1, **kwargs):
+    """
+    Restricts a queryset to the rows that belong to the event shard a periodic receiver has been called for.
+    The keyword arguments passed to the receiver can be passed on to this function as they are.
+    """
+    if shards <= 1:
+        return qs
+    return qs.annotate(_periodic_shard=F(field) % shards).filter(_periodic_shard=shard)
+
+
+def get_receiver_name(fn):
+    return '{}.{}'.format(fn.__module__, fn.__name__)
+
+
+def get_receivers():
+    """
+    Returns all receivers that have been registered with the :py:func:`periodic` decorator, keyed by name.
+    """
+    return dict(_receivers)
+
+
+def run_receiver(name, shard=0, shards=1):
+    """
+    Runs a single receiver of the ``periodic_task`` signal, unless it has already been run successfully within
+    its configured interval or another run of it is still in progress. Locking and interval tracking are
+    stored in the cache, so they work across all servers if a shared cache like redis or memcached is used.
+    """
+    fn = get_receivers().get(name)
+    if not fn:
+        logger.warning('Periodic task receiver {} not found.'.format(name))
+        return
+
+    key = 'pretix_periodic_{}_{}_{}'.format(name, shard, shards)
+    interval = getattr(fn, 'periodic_interval', None)
+    if interval and cache.get(key + '_done'):
+        status = 'skipped'
+        if settings.METRICS_ENABLED:
+            pretix_periodic_task_runs_total.inc(1, task_name=name, status=status)
+        return status
+
+    lock_timeout = getattr(fn, 'periodic_lock_timeout', timedelta(hours=1))
+    token = uuid.uuid4().hex
+    if not cache.add(key + '_lock', token, lock_timeout.total_seconds()):
+        status = 'locked'
+        if settings.METRICS_ENABLED:
+            pretix_periodic_task_runs_total.inc(1, task_name=name, status=status)
+        return status
+
+    t0 = time.perf_counter()
+    try:
+        fn(signal=periodic_task, sender=None, shard=shard, shards=shards)
+        status = 'success'
+        if interval:
+            cache.set(key + '_done', True, interval.total_seconds())
+    except Exception:
+        logger.exception('Periodic task receiver {} failed.'.format(name))
+        status = 'error'
+    finally:
+        if cache.get(key + '_lock') == token:
+            cache.delete(key + '_lock')
+
+    if settings.METRICS_ENABLED:
+        pretix_periodic_task_duration_seconds.observe(time.perf_counter() - t0, task_name=name)
+        pretix_periodic_task_runs_total.inc(1, task_name=name, status=status)
+    return status
+
+
+@app.task(base=ProfiledTask)
+def run_periodic_receiver(name, shard=0, shards=1):
+    run_receiver(name, shard, shards)
+
+
+@app.task(base=ProfiledTask)
+def send_periodic_signal():
+    """
+    Sends the ``periodic_task`` signal for all receivers that do not use the :py:func:`periodic` decorator,
+    e.g. those of older plugins.
+    """
+    for receiver, response in periodic_task.send_robust(sender=None):
+        if isinstance(response, Exception):
+            logger.error('Periodic task receiver {} failed.'.format(get_receiver_name(receiver)), exc_info=response)
+
+
+def schedule_periodic_tasks(names=None):
+    """
+    Queues one celery task per receiver of the ``periodic_task`` signal (and per shard, for receivers that
+    support sharding), such that a slow receiver does not delay all others. Receivers without the
+    :py:func:`periodic` decorator are run together in one additional task.
+
+    :param names: If given, only the receivers with these names are scheduled.
+    """
+    if not names:
+        send_periodic_signal.apply_async()
+    for name, fn in get_receivers().items():
+        if names and name not in names:
+            continue
+        shards = settings.PERIODIC_TASK_SHARDS if getattr(fn, 'periodic_shard_by_event', False) else 1
+        for shard in range(shards):
+            run_periodic_receiver.apply_async(args=(name, shard, shards))
@@ -1,36 +1,131 @@
+from collections import defaultdict
 from datetime import timedelta
+from functools import reduce
 
-from django.db import models
-from django.db.models import F, Max, OuterRef, Q, Subquery
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from django.dispatch import receiver
 from django.utils.timezone import now
 
-from pretix.base.models import LogEntry, Quota
+from pretix.base.models import OrderPosition, Quota
+from pretix.base.services.periodic import periodic
 from pretix.celery_app import app
 
 from ..signals import periodic_task
 
+DIRTY_QUOTAS_KEY = 'pretix_dirty_quotas'
+MAX_CACHE_AGE = timedelta(hours=2)
+
+
+def _store_dirty_quotas(quota_ids):
+    if not quota_ids:
+        return
+    if settings.HAS_REDIS:
+        from django_redis import get_redis_connection
+
+        rc = get_redis_connection("redis")
+        rc.sadd(DIRTY_QUOTAS_KEY, *quota_ids)
+    else:
+        Quota.objects.filter(pk__in=quota_ids).update(cached_availability_time=None)
+
+
+def pop_dirty_quotas():
+    """
+    Returns the IDs of all quotas that have been marked as dirty and resets the set. Without redis,
+    dirty quotas are recognized by their empty ``cached_availability_time`` instead.
+    """
+    if settings.HAS_REDIS:
+        from django_redis import get_redis_connection
+
+        rc = get_redis_connection("redis")
+        pipe = rc.pipeline()
+        pipe.smembers(DIRTY_QUOTAS_KEY)
+        pipe.delete(DIRTY_QUOTAS_KEY)
+        members, _ = pipe.execute()
+        return {int(m) for m in members}
+    return set(Quota.objects.filter(cached_availability_time__isnull=True).values_list('pk', flat=True))
+
+
+def mark_quotas_dirty(quotas):
+    """
+    Marks the given quotas (or quota IDs) as changed, so their cached availability is recomputed
+    by the next run of :py:func:`refresh_quota_caches`. This only happens once the current
+    transaction has been committed.
+    """
+    quota_ids = {q if isinstance(q, int) else q.pk for q in quotas}
+    if quota_ids:
+        transaction.on_commit(lambda: _store_dirty_quotas(quota_ids))
+
+
+def get_quotas_for_products(products):
+    """
+    Returns a QuerySet of all quotas that count any of the given products.
+
+    :param products: An iterable of ``(item_id, variation_id, subevent_id)`` tuples
+    """
+    conditions = [
+        Q(variations__id=variation, subevent_id=subevent) if variation else Q(items__id=item, subevent_id=subevent)
+        for item, variation, subevent in set(products)
+    ]
+    if not conditions:
+        return Quota.objects.none()
+    return Quota.objects.filter(reduce(lambda a, b: a | b, conditions)).distinct()
+
+
+def mark_products_dirty(products):
+    """
+    Marks all quotas as dirty that count any of the given ``(item_id, variation_id, subevent_id)`` tuples.
+    """
+    products = set(products)
+    if products:
+        transaction.on_commit(
+            lambda: _store_dirty_quotas(list(get_quotas_for_products(products).values_list('pk', flat=True)))
+        )
+
+
+def mark_order_quotas_dirty(order_ids):
+    """
+    Marks all quotas as dirty that count any of the positions of the given orders.
+    """
+    order_ids = list(order_ids)
+    if order_ids:
+        transaction.on_commit(lambda: _store_dirty_quotas(list(get_quotas_for_products(
+            OrderPosition.objects.filter(order_id__in=order_ids).values_list('item_id', 'variation_id', 'subevent_id')
+        ).values_list('pk', flat=True))))
+
 
 @receiver(signal=periodic_task)
+@periodic()
 def build_all_quota_caches(sender, **kwargs):
     refresh_quota_caches.apply_async()
 
 
 @app.task
 def refresh_quota_caches():
-    last_activity = LogEntry.objects.filter(
-        event=OuterRef('event_id'),
-    ).order_by().values('event').annotate(
-        m=Max('datetime')
-    ).values(
-        'm'
-    )
-    quotas = Quota.objects.annotate(
-        last_activity=Subquery(last_activity, output_field=models.DateTimeField())
-    ).filter(
-        Q(cached_availability_time__isnull=True) |
-        Q(cached_availability_time__lt=F('last_activity')) |
-        Q(cached_availability_time__lt=now() - timedelta(hours=2), last_activity__gt=now() - timedelta(days=7))
-    )
-    for q in quotas:
-        q.availability()
+    """
+    Recomputes the cached availability of all quotas that have been marked as dirty. Additionally,
+    quotas of recently active events are recomputed if their cache is older than ``MAX_CACHE_AGE``,
+    to catch changes that have not been tracked, such as expiring carts. The work is split up into one
+    task per event.
+    """
+    quota_ids = pop_dirty_quotas()
+    quota_ids |= set(Quota.objects.filter(
+        cached_availability_time__lt=now() - MAX_CACHE_AGE,
+        event__last_activity__gt=now() - timedelta(days=7)
+    ).values_list('pk', flat=True))
+
+    by_event = defaultdict(list)
+    quota_ids = list(quota_ids)
+    for i in range(0, len(quota_ids), 1000):
+        for pk, event_id in Quota.objects.filter(pk__in=quota_ids[i:i + 1000]).values_list('pk', 'event_id'):
+            by_event[event_id].append(pk)
+
+    for event_id, ids in by_event.items():
+        refresh_event_quota_caches.apply_async(args=(event_id, ids))
+
+
+@app.task
+def refresh_event_quota_caches(event: int, quota_ids: list):
+    for q in Quota.objects.filter(event_id=event, pk__in=quota_ids).select_related('event'):
+        q.rebuild_cache()
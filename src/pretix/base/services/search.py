@@ -0,0 +1,224 @@
+import re
+import time
+
+from django.db import connections, transaction
+from django.db.models import Q
+from django.dispatch import receiver
+
+from pretix.base.models import (
+    InvoiceAddress, Order, OrderPosition, OrderSearchEntry, OrderSearchToken,
+)
+from pretix.base.services.periodic import periodic
+from pretix.base.signals import periodic_task
+
+CHUNK_SIZE = 500
+TIME_BUDGET = 300
+
+# Email addresses and domains are split up as well, such that e.g. "example.com" matches "foo@example.com"
+_split = re.compile(r'[\s,;:()<>"\'/+@.]+')
+
+
+def uses_trigrams():
+    return connections[OrderSearchEntry.objects.db].vendor == 'postgresql'
+
+
+def normalize(value) -> str:
+    return str(value).strip().lower()
+
+
+def _order_values(order: Order, invoice_address: InvoiceAddress=None):
+    yield order.code
+    yield '{}-{}'.format(order.event.slug, order.code)
+    yield order.email
+    yield order.comment
+    if not invoice_address:
+        try:
+            invoice_address = order.invoice_address
+        except InvoiceAddress.DoesNotExist:
+            return
+    yield invoice_address.name_cached
+    yield invoice_address.company
+
+
+def _position_values(position: OrderPosition):
+    yield position.attendee_name_cached
+    yield position.attendee_email
+    yield position.secret
+    if position.voucher_id:
+        yield position.voucher.code
+    if position.addon_to_id:
+        yield position.addon_to.attendee_name_cached
+
+
+def _build_entry(order: Order, position: OrderPosition, values):
+    return OrderSearchEntry(
+        event_id=order.event_id, order=order, position=position,
+        text='\n'.join(normalize(v) for v in values if v)
+    )
+
+
+def _tokens(text: str):
+    tokens = set()
+    for line in text.split('\n'):
+        tokens.add(line[:190])
+        tokens.update(w[:190] for w in _split.split(line) if w)
+    return tokens
+
+
+def _save_entries(entries):
+    if uses_trigrams():
+        OrderSearchEntry.objects.bulk_create(entries)
+        return
+    # bulk_create does not set primary keys on other databases, but we need them for the tokens
+    for e in entries:
+        e.save()
+    OrderSearchToken.objects.bulk_create([
+        OrderSearchToken(entry=e, token=t) for e in entries for t in _tokens(e.text)
+    ])
+
+
+def update_order_search_entry(order: Order, invoice_address: InvoiceAddress=None):
+    """
+    Rebuilds the search entry for the order-level values of an order.
+
+    :param invoice_address: The invoice address of the order, if it has just been changed
+    """
+    with transaction.atomic():
+        OrderSearchEntry.objects.filter(order=order, position__isnull=True).delete()
+        _save_entries([_build_entry(order, None, _order_values(order, invoice_address))])
+
+
+def update_position_search_entry(position: OrderPosition):
+    """
+    Rebuilds the search entries of an order position and its add-ons.
+    """
+    positions = [position] + list(position.addons.select_related('voucher', 'addon_to'))
+    with transaction.atomic():
+        OrderSearchEntry.objects.filter(position__in=positions).delete()
+        _save_entries([_build_entry(position.order, p, _position_values(p)) for p in positions])
+
+
+def rebuild_search_index(orders):
+    """
+    Rebuilds all search entries for the given QuerySet of orders.
+    """
+    orders = orders.select_related('event', 'invoice_address')
+    pks = list(orders.values_list('pk', flat=True))
+    for i in range(0, len(pks), CHUNK_SIZE):
+        chunk = list(orders.filter(pk__in=pks[i:i + CHUNK_SIZE]).prefetch_related(
+            'positions', 'positions__voucher', 'positions__addon_to'
+        ))
+        entries = []
+        for o in chunk:
+            entries.append(_build_entry(o, None, _order_values(o)))
+            for p in o.positions.all():
+                entries.append(_build_entry(o, p, _position_values(p)))
+        with transaction.atomic():
+            OrderSearchEntry.objects.filter(order__in=chunk).delete()
+            _save_entries(entries)
+
+
+def search_entries(query: str, event=None):
+    """
+    Returns a QuerySet of all search entries that match the given query, i.e. that contain the
+    query in one of the indexed values. On databases other than PostgreSQL, every word of the query
+    additionally needs to be the beginning of a word of one of the indexed values, where the parts
+    of email addresses and domains count as separate words. This allows to use the token index.
+    """
+    query = normalize(query)
+    code_query = normalize(Order.normalize_code(query))
+    qs = OrderSearchEntry.objects.all()
+    if event:
+        qs = qs.filter(event=event)
+
+    if not uses_trigrams():
+        for word in _split.split(query):
+            if word:
+                qs = qs.filter(pk__in=OrderSearchToken.objects.filter(
+                    Q(token__startswith=word[:190]) | Q(token__startswith=Order.normalize_code(word).lower()[:190])
+                ).values('entry_id'))
+    return qs.filter(Q(text__contains=query) | Q(text__contains=code_query))
+
+
+def _unindexed_orders(event=None):
+    qs = Order.objects.filter(search_entries__isnull=True)
+    if event:
+        qs = qs.filter(event=event)
+    return qs
+
+
+def _unindexed_order_lookup(query: str) -> Q:
+    # The lookups used before the search index existed, for orders that have not been indexed yet
+    code = Q(code__icontains=Order.normalize_code(query))
+    if '-' in query:
+        slug, c = query.rsplit('-', 1)
+        code |= Q(event__slug__iexact=slug) & Q(code__icontains=Order.normalize_code(c))
+    return (
+        code
+        | Q(email__icontains=query)
+        | Q(comment__icontains=query)
+        | Q(invoice_address__name_cached__icontains=query)
+        | Q(invoice_address__company__icontains=query)
+    )
+
+
+def _unindexed_position_lookup(query: str) -> Q:
+    return (
+        Q(attendee_name_cached__icontains=query)
+        | Q(attendee_email__icontains=query)
+        | Q(secret__istartswith=query)
+        | Q(voucher__code__istartswith=query)
+        | Q(addon_to__attendee_name_cached__icontains=query)
+    )
+
+
+def orders_matching(query: str, event=None) -> Q:
+    """
+    Returns a filter for ``Order`` QuerySets that matches all orders where either the order
+    itself or one of its positions matches the query. Orders that have not been indexed yet,
+    e.g. right after upgrading, are matched by looking at their fields directly.
+    """
+    query = query.strip()
+    unindexed = _unindexed_orders(event)
+    return (
+        Q(pk__in=search_entries(query, event).values('order_id'))
+        | Q(pk__in=unindexed.filter(_unindexed_order_lookup(query)).values('pk'))
+        | Q(pk__in=OrderPosition.objects.filter(
+            _unindexed_position_lookup(query), order__in=unindexed
+        ).values('order_id'))
+    )
+
+
+def positions_matching(query: str, event=None, prefix='') -> Q:
+    """
+    Returns a filter for ``OrderPosition`` QuerySets that matches all positions that either match
+    the query themselves or belong to an order that does. Set ``prefix`` to filter a relation
+    pointing to positions instead. Like :py:func:`orders_matching`, this also matches orders that
+    have not been indexed yet.
+    """
+    query = query.strip()
+    entries = search_entries(query, event)
+    unindexed = _unindexed_orders(event)
+    return (
+        Q(**{prefix + 'pk__in': entries.filter(position__isnull=False).values('position_id')})
+        | Q(**{prefix + 'order_id__in': entries.filter(position__isnull=True).values('order_id')})
+        | Q(**{prefix + 'order_id__in': unindexed.filter(_unindexed_order_lookup(query)).values('pk')})
+        | Q(**{prefix + 'pk__in': OrderPosition.objects.filter(
+            _unindexed_position_lookup(query), order__in=unindexed
+        ).values('pk')})
+    )
+
+
+@receiver(signal=periodic_task)
+@periodic()
+def index_missing_orders(sender, **kwargs):
+    """
+    Creates search entries for orders that do not have any, e.g. after upgrading or after data
+    has been changed without calling ``save()``.
+    """
+    deadline = time.monotonic() + TIME_BUDGET
+    while time.monotonic() < deadline:
+        pks = list(Order.objects.filter(search_entries__isnull=True).values_list('pk', flat=True)[:CHUNK_SIZE])
+        if not pks:
+            return
+        rebuild_search_index(Order.objects.filter(pk__in=pks))
@@ -11,9 +11,12 @@ from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
 
 from pretix.base.models import CachedFile, Event, cachedfile_name
+from pretix.base.services.logarchive import restore_archived_logentries
+from pretix.base.services.search import rebuild_search_index
 from pretix.base.services.tasks import ProfiledTask
 from pretix.base.shredder import ShredError
 from pretix.celery_app import app
+from pretix.helpers.zip import zip_write_file
 
 
 @app.task(base=ProfiledTask)
@@ -48,7 +51,9 @@ def export(event: str, shredders: List[str]) -> None:
                 if not it:
                     continue
                 for fname, ftype, content in it:
-                    zipfile.writestr(fname, content)
+                    zip_write_file(zipfile, fname, content)
+                    if hasattr(content, 'close'):
+                        content.close()
 
         rawfile.seek(0)
 
@@ -80,6 +85,8 @@ def shred(event: str, fileid: str, confirm_code: str) -> None:
     if event.logentry_set.filter(datetime__gte=parse(indexdata['time'])):
         raise ShredError(_("Something happened in your event after the export, please try again."))
 
+    restore_archived_logentries(event)
+
     for s in indexdata['shredders']:
         shredder = known_shredders.get(s)
         if not shredder:
@@ -87,5 +94,8 @@ def shred(event: str, fileid: str, confirm_code: str) -> None:
 
         shredder.shred_data()
 
+    # The shredders bypass save(), so the search index would still contain the shredded data
+    rebuild_search_index(event.orders.all())
+
     cf.file.delete(save=False)
     cf.delete()
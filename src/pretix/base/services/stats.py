@@ -1,13 +1,30 @@
+from datetime import datetime, time, timedelta
 from decimal import Decimal
 from typing import Any, Dict, Iterable, List, Tuple
 
-from django.db.models import Count, Sum
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.dispatch import receiver
+from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
 
-from pretix.base.models import Event, Item, ItemCategory, Order, OrderPosition
+from pretix.base.models import (
+    Event, Item, ItemCategory, Order, OrderPosition, SalesStatistic,
+    SalesStatisticsWatermark,
+)
 from pretix.base.models.event import SubEvent
 from pretix.base.models.orders import OrderFee
-from pretix.base.signals import order_fee_type_name
+from pretix.base.services.periodic import filter_event_shard, periodic
+from pretix.base.services.tasks import ProfiledTask
+from pretix.base.signals import order_fee_type_name, periodic_task
+from pretix.celery_app import app
+
+# Orders that are saved in a transaction that is committed later than another refresh has
+# been started might carry an older modification date, so we always look back a little further.
+WATERMARK_OVERLAP = timedelta(minutes=5)
+# Order changes are collected for this many seconds before the statistics of their event are refreshed
+REFRESH_DELAY = 30
 
 
 class DummyObject:
@@ -71,6 +88,119 @@ def dictsum(*dicts) -> dict:
     return res
 
 
+def _refresh_day(event: Event, day, tz) -> None:
+    start = tz.localize(datetime.combine(day, time.min))
+    end = tz.localize(datetime.combine(day + timedelta(days=1), time.min))
+    orders = Order.objects.filter(event=event, datetime__gte=start, datetime__lt=end)
+    rows = []
+
+    for p in OrderPosition.objects.filter(order__in=orders).values(
+        'subevent', 'item', 'variation', 'order__status'
+    ).annotate(cnt=Count('id'), price=Sum('price'), tax_value=Sum('tax_value')).order_by():
+        rows.append(SalesStatistic(
+            kind=SalesStatistic.KIND_POSITION, status=p['order__status'], subevent_id=p['subevent'],
+            item_id=p['item'], variation_id=p['variation'],
+            count=p['cnt'], price=p['price'], tax_value=p['tax_value']
+        ))
+
+    for f in OrderFee.objects.filter(order__in=orders).values(
+        'fee_type', 'internal_type', 'order__status'
+    ).annotate(cnt=Count('id'), value=Sum('value'), tax_value=Sum('tax_value')).order_by():
+        rows.append(SalesStatistic(
+            kind=SalesStatistic.KIND_FEE, status=f['order__status'], fee_type=f['fee_type'],
+            internal_type=f['internal_type'], count=f['cnt'], price=f['value'], tax_value=f['tax_value']
+        ))
+
+    for o in orders.values('status').annotate(cnt=Count('id'), total=Sum('total')).order_by():
+        rows.append(SalesStatistic(
+            kind=SalesStatistic.KIND_ORDER, status=o['status'], count=o['cnt'], price=o['total']
+        ))
+
+    if event.has_subevents:
+        for p in OrderPosition.objects.filter(order__in=orders).values(
+            'subevent', 'order__status'
+        ).annotate(cnt=Count('order', distinct=True)).order_by():
+            rows.append(SalesStatistic(
+                kind=SalesStatistic.KIND_ORDER, status=p['order__status'], subevent_id=p['subevent'],
+                count=p['cnt']
+            ))
+
+    for r in rows:
+        r.event = event
+        r.date = day
+    event.sales_statistics.filter(date=day).delete()
+    SalesStatistic.objects.bulk_create(rows)
+
+
+def refresh_sales_statistics(event: Event, rebuild: bool=False) -> None:
+    """
+    Brings the :py:class:`SalesStatistic` rows of an event up to date. Only the days on which
+    orders have been placed that changed since the last refresh are aggregated again. This is
+    scheduled in the background whenever orders change (see :py:func:`mark_sales_statistics_dirty`)
+    and periodically as a fallback, readers only read the existing rows.
+
+    :param rebuild: If ``True``, all rows are dropped and aggregated from scratch.
+    """
+    tz = event.timezone
+    with transaction.atomic():
+        # Locking the watermark makes sure that two refreshes of the same event never run concurrently
+        watermark, created = SalesStatisticsWatermark.objects.select_for_update().get_or_create(event=event)
+        started = now()
+
+        orders = Order.objects.filter(event=event)
+        if rebuild or not watermark.last_modified:
+            event.sales_statistics.all().delete()
+        else:
+            orders = orders.filter(last_modified__gte=watermark.last_modified - WATERMARK_OVERLAP)
+
+        days = {dt.astimezone(tz).date() for dt in orders.order_by().values_list('datetime', flat=True)}
+        for day in sorted(days):
+            _refresh_day(event, day, tz)
+
+        watermark.last_modified = started
+        watermark.save(update_fields=['last_modified'])
+
+
+@app.task(base=ProfiledTask)
+def refresh_sales_statistics_task(event: int, rebuild: bool=False) -> None:
+    refresh_sales_statistics(Event.objects.get(pk=event), rebuild=rebuild)
+
+
+def mark_sales_statistics_dirty(event_ids) -> None:
+    """
+    Schedules a refresh of the statistics of the given events (or event IDs) after the state or
+    total of some of their orders has changed. This only happens once the current transaction has
+    been committed. All further changes within the next ``REFRESH_DELAY`` seconds are picked up by
+    the same refresh.
+    """
+    event_ids = {e if isinstance(e, int) else e.pk for e in event_ids}
+
+    def schedule():
+        for e in event_ids:
+            if cache.add('pretix_sales_statistics_dirty_{}'.format(e), True, REFRESH_DELAY):
+                refresh_sales_statistics_task.apply_async(args=(e,), countdown=REFRESH_DELAY)
+
+    if event_ids:
+        transaction.on_commit(schedule)
+
+
+@receiver(signal=periodic_task)
+@periodic(interval=timedelta(minutes=10), shard_by_event=True)
+def refresh_all_sales_statistics(sender, **kwargs):
+    # Catches all changes that did not schedule a refresh themselves, e.g. because the task got lost
+    event_ids = set(filter_event_shard(
+        Order.objects.filter(
+            last_modified__gt=F('event__sales_statistics_watermark__last_modified') - WATERMARK_OVERLAP
+        ), **kwargs
+    ).order_by().values_list('event_id', flat=True).distinct())
+    # Events whose statistics have never been built, e.g. right after upgrading
+    event_ids |= set(filter_event_shard(
+        Event.objects.filter(sales_statistics_watermark__isnull=True, orders__isnull=False), 'id', **kwargs
+    ).order_by().values_list('id', flat=True).distinct())
+    for event_id in event_ids:
+        refresh_sales_statistics_task.apply_async(args=(event_id,))
+
+
 def order_overview(event: Event, subevent: SubEvent=None) -> Tuple[List[Tuple[ItemCategory, List[Item]]],
                                                                    Dict[str, Tuple[Decimal, Decimal]]]:
     items = event.items.all().select_related(
@@ -79,14 +209,12 @@ def order_overview(event: Event, subevent: SubEvent=None) -> Tuple[List[Tuple[It
         'variations'
     ).order_by('category__position', 'category_id', 'position', 'name')
 
-    qs = OrderPosition.objects
+    qs = event.sales_statistics.filter(kind=SalesStatistic.KIND_POSITION)
     if subevent:
         qs = qs.filter(subevent=subevent)
-    counters = qs.filter(
-        order__event=event
-    ).values(
-        'item', 'variation', 'order__status'
-    ).annotate(cnt=Count('id'), price=Sum('price'), tax_value=Sum('tax_value')).order_by()
+    counters = qs.values(
+        'item', 'variation', 'status'
+    ).annotate(cnt=Sum('count'), price=Sum('price'), tax_value=Sum('tax_value')).order_by()
 
     states = {
         'canceled': Order.STATUS_CANCELED,
@@ -99,7 +227,7 @@ def order_overview(event: Event, subevent: SubEvent=None) -> Tuple[List[Tuple[It
     for l, s in states.items():
         num[l] = {
             (p['item'], p['variation']): (p['cnt'], p['price'], p['price'] - p['tax_value'])
-            for p in counters if p['order__status'] == s
+            for p in counters if p['status'] == s
         }
 
     num['total'] = dictsum(num['pending'], num['paid'])
@@ -149,16 +277,16 @@ def order_overview(event: Event, subevent: SubEvent=None) -> Tuple[List[Tuple[It
     payment_items = []
 
     if not subevent:
-        counters = OrderFee.objects.filter(
-            order__event=event
+        counters = event.sales_statistics.filter(
+            kind=SalesStatistic.KIND_FEE
         ).values(
-            'fee_type', 'internal_type', 'order__status'
-        ).annotate(cnt=Count('id'), value=Sum('value'), tax_value=Sum('tax_value')).order_by()
+            'fee_type', 'internal_type', 'status'
+        ).annotate(cnt=Sum('count'), value=Sum('price'), tax_value=Sum('tax_value')).order_by()
 
         for l, s in states.items():
             num[l] = {
                 (o['fee_type'], o['internal_type']): (o['cnt'], o['value'], o['value'] - o['tax_value'])
-                for o in counters if o['order__status'] == s
+                for o in counters if o['status'] == s
             }
         num['total'] = dictsum(num['pending'], num['paid'])
 
@@ -0,0 +1,158 @@
+import json
+
+from django.db import transaction
+
+from pretix.base.models import (
+    CheckinList, Event, Quota, SubEvent, SubEventItem, SubEventItemVariation,
+    SubEventMetaValue, User,
+)
+from pretix.base.services.tasks import ProfiledTask
+from pretix.celery_app import app
+from pretix.helpers.database import bulk_create_with_pks
+from pretix.helpers.json import CustomJSONEncoder
+
+CHUNK_SIZE = 500
+DATE_FIELDS = ('date_from', 'date_to', 'date_admission', 'presale_start', 'presale_end')
+
+
+def _dump(instance):
+    return {
+        f.attname: f.value_from_object(instance)
+        for f in instance._meta.concrete_fields if not f.primary_key
+    }
+
+
+def _load(model, data):
+    return model(**{
+        f.attname: f.to_python(data[f.attname])
+        for f in model._meta.concrete_fields if f.attname in data
+    })
+
+
+def _clone(template, **kwargs):
+    # A fresh instance instead of copy.copy(), which would share the cache of related objects with the template
+    o = template.__class__(**_dump(template))
+    for k, v in kwargs.items():
+        setattr(o, k, v)
+    return o
+
+
+def dump_subevent_data(template: SubEvent, dates: list, meta_values=(), quotas=(), checkin_lists=(),
+                       item_prices=(), variation_prices=()) -> str:
+    """
+    Serializes everything :py:func:`bulk_create_subevents` needs, so it can be passed to the
+    :py:func:`create_subevents` task. See there for the parameters.
+    """
+    return json.dumps({
+        'template': _dump(template),
+        'dates': [[d.get(k) for k in DATE_FIELDS] for d in dates],
+        'meta_values': [_dump(v) for v in meta_values],
+        'quotas': [[_dump(q), list(items), list(variations)] for q, items, variations in quotas],
+        'checkin_lists': [[_dump(cl), list(items)] for cl, items in checkin_lists],
+        'item_prices': [_dump(p) for p in item_prices],
+        'variation_prices': [_dump(p) for p in variation_prices],
+    }, cls=CustomJSONEncoder)
+
+
+def bulk_create_subevents(event: Event, template: SubEvent, dates: list, meta_values=(), quotas=(),
+                          checkin_lists=(), item_prices=(), variation_prices=(),
+                          progress_callback=lambda v: None) -> list:
+    """
+    Creates one date of an event series for every entry of ``dates`` and inserts them, including all their
+    quotas, check-in lists, prices and meta data values, in bulk.
+
+    :param template: An unsaved :py:class:`SubEvent` that all new dates are copies of
+    :param dates: A list of dictionaries that contain the values of ``date_from``, ``date_to``, ``date_admission``,
+                  ``presale_start`` and ``presale_end`` for every new date
+    :param meta_values: Unsaved :py:class:`SubEventMetaValue` objects that are copied to every new date
+    :param quotas: A list of ``(quota, item_ids, variation_ids)`` tuples, where ``quota`` is an unsaved
+                   :py:class:`Quota` that is copied to every new date
+    :param checkin_lists: A list of ``(checkin_list, item_ids)`` tuples, where ``checkin_list`` is an unsaved
+                          :py:class:`CheckinList` that is copied to every new date
+    :param item_prices: Unsaved :py:class:`SubEventItem` objects that are copied to every new date
+    :param variation_prices: Unsaved :py:class:`SubEventItemVariation` objects that are copied to every new date
+    :return: The list of new dates
+    """
+    created = []
+    for i in range(0, len(dates), CHUNK_SIZE):
+        subevents = [
+            _clone(template, event=event, **{k: d.get(k) for k in DATE_FIELDS})
+            for d in dates[i:i + CHUNK_SIZE]
+        ]
+        bulk_create_with_pks(SubEvent, subevents)
+
+        SubEventMetaValue.objects.bulk_create([
+            _clone(v, subevent=se) for se in subevents for v in meta_values
+        ])
+        SubEventItem.objects.bulk_create([
+            _clone(p, subevent=se) for se in subevents for p in item_prices
+        ])
+        SubEventItemVariation.objects.bulk_create([
+            _clone(p, subevent=se) for se in subevents for p in variation_prices
+        ])
+
+        new_quotas = [
+            (_clone(q, event=event, subevent=se), items, variations)
+            for se in subevents for q, items, variations in quotas
+        ]
+        bulk_create_with_pks(Quota, [q for q, items, variations in new_quotas])
+        Quota.items.through.objects.bulk_create([
+            Quota.items.through(quota_id=q.pk, item_id=item) for q, items, variations in new_quotas for item in items
+        ])
+        Quota.variations.through.objects.bulk_create([
+            Quota.variations.through(quota_id=q.pk, itemvariation_id=var)
+            for q, items, variations in new_quotas for var in variations
+        ])
+
+        new_lists = [
+            (_clone(cl, event=event, subevent=se), items)
+            for se in subevents for cl, items in checkin_lists
+        ]
+        bulk_create_with_pks(CheckinList, [cl for cl, items in new_lists])
+        CheckinList.limit_products.through.objects.bulk_create([
+            CheckinList.limit_products.through(checkinlist_id=cl.pk, item_id=item)
+            for cl, items in new_lists for item in items
+        ])
+
+        created += subevents
+        progress_callback(round(len(created) / len(dates) * 100))
+
+    event.cache.clear()
+    return created
+
+
+@app.task(base=ProfiledTask, bind=True)
+def create_subevents(self, event: int, data: str, user: int=None, log_data: dict=None) -> int:
+    """
+    Creates dates of an event series in bulk from the output of :py:func:`dump_subevent_data` and logs
+    a single summary log entry for all of them.
+
+    :return: The number of new dates
+    """
+    def set_progress(val):
+        if not self.request.called_directly and not self.request.is_eager:
+            self.update_state(state='PROGRESS', meta={'value': val})
+
+    event = Event.objects.get(pk=event)
+    user = User.objects.get(pk=user) if user else None
+    data = json.loads(data)
+
+    with transaction.atomic():
+        subevents = bulk_create_subevents(
+            event,
+            template=_load(SubEvent, data['template']),
+            dates=[
+                {k: SubEvent._meta.get_field(k).to_python(v) for k, v in zip(DATE_FIELDS, d)}
+                for d in data['dates']
+            ],
+            meta_values=[_load(SubEventMetaValue, v) for v in data['meta_values']],
+            quotas=[(_load(Quota, q), items, variations) for q, items, variations in data['quotas']],
+            checkin_lists=[(_load(CheckinList, cl), items) for cl, items in data['checkin_lists']],
+            item_prices=[_load(SubEventItem, p) for p in data['item_prices']],
+            variation_prices=[_load(SubEventItemVariation, p) for p in data['variation_prices']],
+            progress_callback=set_progress,
+        )
+        log_data = dict(log_data or {})
+        log_data['count'] = len(subevents)
+        event.log_action('pretix.subevent.added.bulk', data=log_data, user=user)
+    return len(subevents)
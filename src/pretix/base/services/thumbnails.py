@@ -0,0 +1,20 @@
+import logging
+
+from pretix.base.services.tasks import ProfiledTask
+from pretix.celery_app import app
+from pretix.helpers.thumb import ThumbnailError, get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+
+@app.task(base=ProfiledTask)
+def pregenerate_thumbnails(source: str, sizes: list):
+    """
+    Creates the thumbnails of a newly uploaded file in the given sizes, so they do not need to be
+    created by the first requests that show the file.
+    """
+    for size in sizes:
+        try:
+            get_thumbnail(source, size)
+        except ThumbnailError:
+            logger.exception('Could not create thumbnail of {} in size {}'.format(source, size))
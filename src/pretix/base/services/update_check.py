@@ -12,6 +12,7 @@ from pretix import __version__
 from pretix.base.models import Event
 from pretix.base.plugins import get_all_plugins
 from pretix.base.services.mail import mail
+from pretix.base.services.periodic import periodic
 from pretix.base.settings import GlobalSettingsObject
 from pretix.base.signals import periodic_task
 from pretix.celery_app import app
@@ -19,6 +20,7 @@ from pretix.helpers.urls import build_absolute_uri
 
 
 @receiver(signal=periodic_task)
+@periodic()
 def run_update_check(sender, **kwargs):
     gs = GlobalSettingsObject()
     if not gs.settings.update_check_perform:
@@ -1,14 +1,118 @@
-import sys
+from collections import defaultdict
+from datetime import timedelta
 
+from django.db import transaction
+from django.db.models import Case, Value, When
 from django.dispatch import receiver
+from django.utils.timezone import now
 
-from pretix.base.models import Event, User, WaitingListEntry
-from pretix.base.models.waitinglist import WaitingListException
+from pretix.base.models import Event, LogEntry, User, Voucher, WaitingListEntry
+from pretix.base.models.vouchers import generate_codes
+from pretix.base.services.periodic import filter_event_shard, periodic
+from pretix.base.services.quotas import mark_products_dirty
 from pretix.base.services.tasks import ProfiledTask
 from pretix.base.signals import periodic_task
 from pretix.celery_app import app
 
 
+def plan_assignment(event, entries, quotas):
+    """
+    Decides which of the given waiting list entries can receive a voucher. Entries are processed
+    in the given order and the availability of every relevant quota is only computed once, after
+    which it is tracked in memory.
+
+    :param entries: Waiting list entries without a voucher, ordered by priority
+    :param quotas: All quotas that may be relevant for these entries, with prefetched items and variations
+    :return: The list of entries that should receive a voucher
+    """
+    item_quotas = defaultdict(list)
+    var_quotas = defaultdict(list)
+    for q in quotas:
+        for i in q.items.all():
+            item_quotas[i.pk, q.subevent_id].append(q)
+        for v in q.variations.all():
+            var_quotas[v.pk, q.subevent_id].append(q)
+
+    remaining = {}
+    running = {}
+    gone = set()
+    selected = []
+
+    for wle in entries:
+        key = (wle.item_id, wle.variation_id, wle.subevent_id)
+        if key in gone or '@' not in wle.email:
+            continue
+
+        if wle.subevent_id not in running:
+            ev = wle.subevent or event
+            running[wle.subevent_id] = ev.presale_is_running and (not wle.subevent or wle.subevent.active)
+        if not running[wle.subevent_id]:
+            continue
+
+        if wle.variation_id:
+            wle_quotas = var_quotas[wle.variation_id, wle.subevent_id]
+        else:
+            wle_quotas = item_quotas[wle.item_id, wle.subevent_id]
+        for q in wle_quotas:
+            if q.pk not in remaining:
+                remaining[q.pk] = q.availability(count_waitinglist=False)[1]
+
+        limits = [remaining[q.pk] for q in wle_quotas if remaining[q.pk] is not None]
+        if wle_quotas and not limits:
+            # Only unlimited quotas, nobody needs to wait for this product
+            continue
+        if limits and min(limits) < 1:
+            gone.add(key)
+            continue
+
+        for q in wle_quotas:
+            if remaining[q.pk] is not None:
+                remaining[q.pk] -= 1
+        selected.append(wle)
+
+    return selected
+
+
+def create_vouchers(event, entries, user=None, auth=None, batch_size=500):
+    """
+    Creates and assigns vouchers for all given waiting list entries in bulk. This does not
+    send out any emails.
+    """
+    valid_until = now() + timedelta(hours=event.settings.waiting_list_hours)
+    codes = generate_codes(len(entries))
+
+    with transaction.atomic():
+        vouchers = []
+        for wle, code in zip(entries, codes):
+            wle.event = event
+            vouchers.append(wle.build_voucher(valid_until=valid_until, code=code))
+        Voucher.objects.bulk_create(vouchers, batch_size=batch_size)
+
+        if any(v.pk is None for v in vouchers):
+            # bulk_create only sets primary keys on PostgreSQL
+            pks = {}
+            for i in range(0, len(codes), batch_size):
+                pks.update(Voucher.objects.filter(
+                    event=event, code__in=codes[i:i + batch_size]
+                ).values_list('code', 'pk'))
+            for v in vouchers:
+                v.pk = pks[v.code]
+
+        logentries = []
+        for i in range(0, len(entries), batch_size):
+            chunk = entries[i:i + batch_size]
+            for wle, v in zip(chunk, vouchers[i:i + batch_size]):
+                wle.voucher = v
+                logentries += wle.log_voucher(user=user, auth=auth, save=False)
+            WaitingListEntry.objects.filter(pk__in=[wle.pk for wle in chunk]).update(
+                voucher=Case(*[When(pk=wle.pk, then=Value(wle.voucher.pk)) for wle in chunk])
+            )
+        LogEntry.objects.bulk_create(logentries, batch_size=batch_size)
+        mark_products_dirty((wle.item_id, wle.variation_id, wle.subevent_id) for wle in entries)
+
+    event.cache.set('vouchers_exist', True)
+
+
 @app.task(base=ProfiledTask)
 def assign_automatically(event_id: int, user_id: int=None, subevent_id: int=None):
     event = Event.objects.get(id=event_id)
@@ -17,62 +121,33 @@ def assign_automatically(event_id: int, user_id: int=None, subevent_id: int=None
     else:
         user = None
 
-    quota_cache = {}
-    gone = set()
-
     qs = WaitingListEntry.objects.filter(
         event=event, voucher__isnull=True
-    ).select_related('item', 'variation').prefetch_related(
-        'item__quotas', 'variation__quotas'
-    ).order_by('-priority', 'created')
+    ).select_related('item', 'variation', 'subevent').order_by('-priority', 'created')
+    quotas = event.quotas.prefetch_related('items', 'variations')
 
     if subevent_id and event.has_subevents:
         subevent = event.subevents.get(id=subevent_id)
         qs = qs.filter(subevent=subevent)
-
-    sent = 0
+        quotas = quotas.filter(subevent=subevent)
 
     with event.lock():
-        for wle in qs:
-            if (wle.item, wle.variation) in gone:
-                continue
-
-            ev = (wle.subevent or event)
-            if not ev.presale_is_running or (wle.subevent and not wle.subevent.active):
-                continue
-
-            quotas = (wle.variation.quotas.filter(subevent=wle.subevent)
-                      if wle.variation
-                      else wle.item.quotas.filter(subevent=wle.subevent))
-            availability = (
-                wle.variation.check_quotas(count_waitinglist=False, _cache=quota_cache, subevent=wle.subevent)
-                if wle.variation
-                else wle.item.check_quotas(count_waitinglist=False, _cache=quota_cache, subevent=wle.subevent)
-            )
-            if availability[1] is None or availability[1] > 0:
-                try:
-                    wle.send_voucher(quota_cache, user=user)
-                    sent += 1
-                except WaitingListException:  # noqa
-                    continue
+        entries = plan_assignment(event, list(qs), list(quotas))
+        if entries:
+            create_vouchers(event, entries, user=user)
 
-                # Reduce affected quotas in cache
-                for q in quotas:
-                    quota_cache[q.pk] = (
-                        quota_cache[q.pk][0] if quota_cache[q.pk][0] > 1 else 0,
-                        quota_cache[q.pk][1] - 1 if quota_cache[q.pk][1] is not None else sys.maxsize
-                    )
-            else:
-                gone.add((wle.item, wle.variation))
+    for wle in entries:
+        wle.send_voucher_mail()
 
-    return sent
+    return len(entries)
 
 
 @receiver(signal=periodic_task)
+@periodic(shard_by_event=True)
 def process_waitinglist(sender, **kwargs):
-    qs = Event.objects.filter(
+    qs = filter_event_shard(Event.objects.filter(
         live=True
-    ).prefetch_related('_settings_objects', 'organizer___settings_objects').select_related('organizer')
+    ), 'id', **kwargs).prefetch_related('_settings_objects', 'organizer___settings_objects').select_related('organizer')
     for e in qs:
         if e.settings.waiting_list_auto and e.presale_is_running:
             assign_automatically.apply_async(args=(e.pk,))
@@ -0,0 +1,185 @@
+import hashlib
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.dispatch import receiver
+from django.utils.timezone import now
+
+from pretix.base.metrics import pretix_incoming_webhooks_total
+from pretix.base.models import IncomingWebhook
+from pretix.base.services.periodic import periodic
+from pretix.base.services.tasks import ProfiledTask
+from pretix.base.signals import periodic_task
+from pretix.celery_app import app
+
+logger = logging.getLogger(__name__)
+_processors = {}
+
+MAX_ATTEMPTS = 10
+RETRY_DELAY = 60
+LOCK_TIMEOUT = 300
+STALE_AFTER = timedelta(minutes=10)
+
+
+def webhook_processor(provider: str):
+    """
+    Registers the decorated function as the processor for all notifications received for the given
+    provider identifier. The function is called with the :py:class:`IncomingWebhook` instance
+    and is expected to raise an exception if processing should be retried later, e.g. because the
+    provider's API could not be reached.
+
+    Processors need to be registered in a module that is imported when your plugin is loaded, e.g. by
+    importing it in the ``ready()`` method of your ``AppConfig``.
+    """
+    def decorator(fn):
+        _processors[provider] = fn
+        return fn
+    return decorator
+
+
+def receive_webhook(provider: str, payload, external_id: str=None, reference: str=None, event=None,
+                    order=None, ordering_key: str=None):
+    """
+    Stores a notification received from a payment provider and schedules its processing. This should
+    be called outside of any database transaction, so the notification is visible to the workers.
+
+    :param payload: The notification, either as a JSON string or as a dictionary
+    :param external_id: The ID of the notification at the provider. If it is omitted, the notification is
+                        identified by a hash of its payload.
+    :param ordering_key: Defaults to the order, if given, or to the referenced object otherwise.
+    :return: The new :py:class:`IncomingWebhook`, or ``None`` if the notification has been received
+             before.
+    """
+    if not isinstance(payload, str):
+        payload = json.dumps(payload)
+    if not external_id:
+        external_id = hashlib.sha1(payload.encode()).hexdigest()
+    if not ordering_key:
+        if order:
+            ordering_key = 'order-{}'.format(order.pk)
+        else:
+            ordering_key = '{}-{}'.format(provider, reference or external_id)
+
+    try:
+        with transaction.atomic():
+            wh = IncomingWebhook.objects.create(
+                provider=provider, external_id=external_id[:190], ordering_key=ordering_key[:190],
+                reference=reference[:190] if reference else None, event=event, order=order, payload=payload
+            )
+    except IntegrityError:
+        if settings.METRICS_ENABLED:
+            pretix_incoming_webhooks_total.inc(1, provider=provider, result='duplicate')
+        return None
+
+    # If an earlier notification with the same key waits for its next attempt, ours has to wait as well
+    if not IncomingWebhook.objects.filter(
+        ordering_key=wh.ordering_key, state=IncomingWebhook.STATE_PENDING, next_attempt__gt=now()
+    ).exists():
+        process_webhooks.apply_async(args=(wh.ordering_key,))
+    return wh
+
+
+def _lock_key(ordering_key):
+    return 'pretix_webhook_lock_{}'.format(hashlib.sha1(ordering_key.encode()).hexdigest())
+
+
+def _process(wh: IncomingWebhook) -> bool:
+    """
+    Processes a single notification. Returns ``False`` if it should be retried later.
+    """
+    # Claim the notification, in case a stale one has been handed out twice
+    if not IncomingWebhook.objects.filter(pk=wh.pk, state=IncomingWebhook.STATE_PENDING).update(
+            state=IncomingWebhook.STATE_PROCESSING, attempts=wh.attempts + 1):
+        return True
+    wh.attempts += 1
+
+    processor = _processors.get(wh.provider)
+    if not processor:
+        logger.error('No processor registered for incoming webhooks of provider "{}".'.format(wh.provider))
+        wh.state = IncomingWebhook.STATE_FAILED
+        wh.save(update_fields=['state'])
+        return True
+
+    try:
+        processor(wh)
+    except Exception:
+        if wh.attempts >= MAX_ATTEMPTS:
+            logger.exception('Giving up on incoming webhook {} after {} attempts.'.format(wh.pk, wh.attempts))
+            wh.state = IncomingWebhook.STATE_FAILED
+        else:
+            logger.exception('Could not process incoming webhook {}, will retry.'.format(wh.pk))
+            wh.state = IncomingWebhook.STATE_PENDING
+            wh.next_attempt = now() + timedelta(seconds=RETRY_DELAY * wh.attempts)
+        wh.save(update_fields=['state', 'next_attempt'])
+        if settings.METRICS_ENABLED:
+            pretix_incoming_webhooks_total.inc(1, provider=wh.provider, result='error')
+        return wh.state == IncomingWebhook.STATE_FAILED
+
+    wh.state = IncomingWebhook.STATE_DONE
+    wh.processed = now()
+    wh.save(update_fields=['state', 'processed'])
+    if settings.METRICS_ENABLED:
+        pretix_incoming_webhooks_total.inc(1, provider=wh.provider, result='success')
+    return True
+
+
+@app.task(base=ProfiledTask)
+def process_webhooks(ordering_key: str):
+    """
+    Processes all pending notifications with the given ordering key in the order they have been received.
+    Only one task works on the same ordering key at a time, all others return immediately. If a notification
+    fails, all later notifications with the same key wait until it has been retried successfully or it
+    has been given up. Nothing is processed before the next attempt of a failed notification is due.
+    """
+    lock_key = _lock_key(ordering_key)
+    token = str(uuid.uuid4())
+    if not cache.add(lock_key, token, LOCK_TIMEOUT):
+        # Another task is working on this key and will pick up our notifications as well
+        return
+
+    retry_in = None
+    try:
+        while True:
+            wh = IncomingWebhook.objects.filter(
+                ordering_key=ordering_key, state=IncomingWebhook.STATE_PENDING
+            ).order_by('pk').first()
+            if not wh or (wh.next_attempt and wh.next_attempt > now()):
+                # The task scheduled for the retry of this notification will continue
+                break
+            if not _process(wh):
+                retry_in = RETRY_DELAY * wh.attempts
+                break
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+    if retry_in:
+        process_webhooks.apply_async(args=(ordering_key,), countdown=retry_in)
+
+
+@receiver(signal=periodic_task)
+@periodic(interval=timedelta(minutes=5))
+def process_stale_webhooks(sender, **kwargs):
+    """
+    Picks up notifications whose processing task has been lost, e.g. because a worker crashed. Notifications
+    that wait for a retry are only considered lost if the retry is overdue.
+    """
+    waiting = IncomingWebhook.objects.filter(
+        state=IncomingWebhook.STATE_PENDING, next_attempt__gte=now() - STALE_AFTER
+    ).values('ordering_key')
+    keys = IncomingWebhook.objects.filter(
+        state__in=(IncomingWebhook.STATE_PENDING, IncomingWebhook.STATE_PROCESSING),
+        received__lt=now() - STALE_AFTER,
+    ).exclude(ordering_key__in=waiting).order_by().values_list('ordering_key', flat=True).distinct()[:1000]
+    for key in keys:
+        if cache.get(_lock_key(key)):
+            continue
+        IncomingWebhook.objects.filter(
+            ordering_key=key, state=IncomingWebhook.STATE_PROCESSING
+        ).update(state=IncomingWebhook.STATE_PENDING)
+        process_webhooks.apply_async(args=(key,))
@@ -61,6 +61,9 @@ class BaseDataShredder:
         filename, a file type and file content.
 
         You can also implement this as a generator and ``yield`` those tuples instead of returning a list of them.
+        The file content can either be a string or a file-like object opened for reading. Please use the latter for
+        large files, e.g. files from storage, so they do not need to be loaded into memory. File-like objects are
+        closed after they have been added to the export.
         """
         raise NotImplementedError()  # NOQA
 
@@ -298,9 +301,7 @@ class InvoiceShredder(BaseDataShredder):
             if not i.file:
                 invoice_pdf_task.apply(args=(i.pk,))
                 i.refresh_from_db()
-            i.file.open('rb')
-            yield 'invoices/{}.pdf'.format(i.number), 'application/pdf', i.file.read()
-            i.file.close()
+            yield 'invoices/{}.pdf'.format(i.number), 'application/pdf', i.file.open('rb')
 
     @transaction.atomic
     def shred_data(self):
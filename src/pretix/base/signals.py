@@ -275,6 +275,17 @@ because an already-paid order has been split.
 As with all event-plugin signals, the ``sender`` keyword argument will contain the event.
 """
 
+order_expired = EventPluginSignal(
+    providing_args=["order"]
+)
+"""
+This signal is sent out every time an order is marked as expired. The order object is
+given as the first argument. If many orders expire at once, this signal is sent after
+all of them have been committed to the database.
+
+As with all event-plugin signals, the ``sender`` keyword argument will contain the event.
+"""
+
 logentry_display = EventPluginSignal(
     providing_args=["logentry"]
 )
@@ -367,6 +378,13 @@ time the periodic task cronjob runs. This interval is not sharply defined, it ca
 be everything between a minute and a day. The actions you perform should be
 idempotent, i.e. it should not make a difference if this is sent out more often
 than expected.
+
+Every receiver is run as a separate background task, and a receiver is never run twice
+at the same time. You can use the ``pretix.base.services.periodic.periodic`` decorator
+to define a minimum interval between two runs of your receiver or to split your work
+into shards by event. Receivers are called with the keyword arguments ``shard`` and
+``shards`` in the latter case. Receivers without this decorator are run together in
+one shared background task.
 """
 
 register_global_settings = django.dispatch.Signal()
@@ -67,6 +67,8 @@ class AsyncAction:
             'async_id': res.id,
             'ready': ready
         })
+        if not ready and res.state == 'PROGRESS' and isinstance(res.info, dict):
+            data['percentage'] = res.info.get('value')
         if ready:
             if res.successful() and not isinstance(res.info, Exception):
                 smes = self.get_success_message(res.info)
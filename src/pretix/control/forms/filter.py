@@ -7,9 +7,10 @@ from django.utils.timezone import now
 from django.utils.translation import pgettext_lazy, ugettext_lazy as _
 
 from pretix.base.models import (
-    Checkin, Event, Invoice, Item, Order, OrderPayment, OrderPosition,
-    OrderRefund, Organizer, Question, QuestionAnswer, SubEvent,
+    Checkin, Event, Invoice, Item, Order, OrderPayment, OrderRefund, Organizer,
+    Question, QuestionAnswer, SubEvent,
 )
+from pretix.base.services.search import orders_matching, positions_matching
 from pretix.base.signals import register_payment_providers
 from pretix.control.forms.widgets import Select2
 from pretix.helpers.database import FixedOrderBy, rolledback_transaction
@@ -115,33 +116,15 @@ class OrderFilterForm(FilterForm):
         if fdata.get('query'):
             u = fdata.get('query')
 
-            if "-" in u:
-                code = (Q(event__slug__icontains=u.rsplit("-", 1)[0])
-                        & Q(code__icontains=Order.normalize_code(u.rsplit("-", 1)[1])))
-            else:
-                code = Q(code__icontains=Order.normalize_code(u))
-
             matching_invoices = Invoice.objects.filter(
                 Q(invoice_no__iexact=u)
                 | Q(invoice_no__iexact=u.zfill(5))
                 | Q(full_invoice_no__iexact=u)
             ).values_list('order_id', flat=True)
 
-            matching_positions = OrderPosition.objects.filter(
-                Q(order=OuterRef('pk')) & Q(
-                    Q(attendee_name_cached__icontains=u) | Q(attendee_email__icontains=u)
-                    | Q(secret__istartswith=u)
-                )
-            ).values('id')
-
-            qs = qs.annotate(has_pos=Exists(matching_positions)).filter(
-                code
-                | Q(email__icontains=u)
-                | Q(invoice_address__name_cached__icontains=u)
-                | Q(invoice_address__company__icontains=u)
+            qs = qs.filter(
+                orders_matching(u, getattr(self, 'event', None))
                 | Q(pk__in=matching_invoices)
-                | Q(comment__icontains=u)
-                | Q(has_pos=True)
             )
 
         if fdata.get('status'):
@@ -611,16 +594,7 @@ class CheckInFilterForm(FilterForm):
 
         if fdata.get('user'):
             u = fdata.get('user')
-            qs = qs.filter(
-                Q(order__code__istartswith=u)
-                | Q(secret__istartswith=u)
-                | Q(order__email__icontains=u)
-                | Q(attendee_name_cached__icontains=u)
-                | Q(attendee_email__icontains=u)
-                | Q(voucher__code__istartswith=u)
-                | Q(order__invoice_address__name_cached__icontains=u)
-                | Q(order__invoice_address__company__icontains=u)
-            )
+            qs = qs.filter(positions_matching(u, self.event))
 
         if fdata.get('status'):
             s = fdata.get('status')
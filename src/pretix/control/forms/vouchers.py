@@ -205,11 +205,13 @@ class VoucherBulkForm(VoucherForm):
     def clean(self):
         data = super().clean()
 
-        vouchers = self.instance.event.vouchers.annotate(
-            code_lower=Lower('code')
-        ).filter(code_lower__in=[c.lower() for c in data['codes']])
-        if vouchers.exists():
-            raise ValidationError(_('A voucher with one of these codes already exists.'))
+        codes = [c.lower() for c in data['codes']]
+        for i in range(0, len(codes), 500):  # Work around SQLite's SQLITE_MAX_VARIABLE_NUMBER
+            vouchers = self.instance.event.vouchers.annotate(
+                code_lower=Lower('code')
+            ).filter(code_lower__in=codes[i:i + 500])
+            if vouchers.exists():
+                raise ValidationError(_('A voucher with one of these codes already exists.'))
 
         return data
 
@@ -218,11 +220,9 @@ class VoucherBulkForm(VoucherForm):
         for code in self.cleaned_data['codes']:
             obj = modelcopy(self.instance)
             obj.event = event
-            obj.code = code
-            data = dict(self.cleaned_data)
-            data['code'] = code
-            data['bulk'] = True
-            del data['codes']
+            obj.code = code.upper()
             objs.append(obj)
-        Voucher.objects.bulk_create(objs)
+        Voucher.objects.bulk_create(objs, batch_size=500)
+        event.cache.set('vouchers_exist', True)
+        Voucher.bulk_mark_quotas_dirty(objs)
         return objs
@@ -284,6 +284,7 @@ def pretixcontrol_logentry_display(sender: Event, logentry: LogEntry, **kwargs):
         'pretix.subevent.deleted': pgettext_lazy('subevent', 'The event date has been deleted.'),
         'pretix.subevent.changed': pgettext_lazy('subevent', 'The event date has been changed.'),
         'pretix.subevent.added': pgettext_lazy('subevent', 'The event date has been created.'),
+        'pretix.subevent.added.bulk': pgettext_lazy('subevent', '{count} event dates have been created.'),
         'pretix.subevent.quota.added': pgettext_lazy('subevent', 'A quota has been added to the event date.'),
         'pretix.subevent.quota.changed': pgettext_lazy('subevent', 'A quota has been changed on the event date.'),
         'pretix.subevent.quota.deleted': pgettext_lazy('subevent', 'A quota has been removed from the event date.'),
@@ -18,8 +18,8 @@ from django.utils.translation import pgettext, ugettext_lazy as _, ungettext
 
 from pretix.base.decimal import round_decimal
 from pretix.base.models import (
-    Item, Order, OrderPosition, OrderRefund, RequiredAction, SubEvent, Voucher,
-    WaitingListEntry,
+    Item, Order, OrderRefund, RequiredAction, SalesStatistic, SubEvent,
+    Voucher, WaitingListEntry,
 )
 from pretix.base.models.checkin import CheckinList
 from pretix.control.forms.event import CommentForm
@@ -42,32 +42,31 @@ def base_widgets(sender, subevent=None, **kwargs):
         (Q(available_from__isnull=True) | Q(available_from__lte=now()))
     ).count()
 
+    posstats = sender.sales_statistics.filter(kind=SalesStatistic.KIND_POSITION)
     if subevent:
-        opqs = OrderPosition.objects.filter(subevent=subevent)
-    else:
-        opqs = OrderPosition.objects
+        posstats = posstats.filter(subevent=subevent)
 
-    tickc = opqs.filter(
-        order__event=sender, item__admission=True,
-        order__status__in=(Order.STATUS_PAID, Order.STATUS_PENDING),
-    ).count()
+    tickc = posstats.filter(
+        item__admission=True,
+        status__in=(Order.STATUS_PAID, Order.STATUS_PENDING),
+    ).aggregate(sum=Sum('count'))['sum'] or 0
 
-    paidc = opqs.filter(
-        order__event=sender, item__admission=True,
-        order__status=Order.STATUS_PAID,
-    ).count()
+    paidc = posstats.filter(
+        item__admission=True,
+        status=Order.STATUS_PAID,
+    ).aggregate(sum=Sum('count'))['sum'] or 0
 
     if subevent:
-        rev = opqs.filter(
-            order__event=sender, order__status=Order.STATUS_PAID
+        rev = posstats.filter(
+            status=Order.STATUS_PAID
         ).aggregate(
             sum=Sum('price')
         )['sum'] or Decimal('0.00')
     else:
-        rev = Order.objects.filter(
-            event=sender,
+        rev = sender.sales_statistics.filter(
+            kind=SalesStatistic.KIND_ORDER, subevent__isnull=True,
             status=Order.STATUS_PAID
-        ).aggregate(sum=Sum('total'))['sum'] or Decimal('0.00')
+        ).aggregate(sum=Sum('price'))['sum'] or Decimal('0.00')
 
     return [
         {
@@ -35,8 +35,10 @@ from pretix.base.models import (
     TaxRule, Voucher,
 )
 from pretix.base.models.event import EventMetaValue
+from pretix.base.models.log import ArchivedLogEntryList
 from pretix.base.services import tickets
 from pretix.base.services.invoices import build_preview_invoice_pdf
+from pretix.base.services.thumbnails import pregenerate_thumbnails
 from pretix.base.signals import register_ticket_outputs
 from pretix.base.templatetags.money import money_filter
 from pretix.base.templatetags.rich_text import markdown_compile
@@ -49,13 +51,14 @@ from pretix.control.forms.event import (
 )
 from pretix.control.permissions import EventPermissionRequiredMixin
 from pretix.helpers.database import rolledback_transaction
+from pretix.helpers.thumb import LOGO_SIZES
 from pretix.helpers.urls import build_absolute_uri
 from pretix.multidomain.urlreverse import get_domain
 from pretix.plugins.stripe.payment import StripeSettingsHolder
 from pretix.presale.style import regenerate_css
 
-from . import CreateView, PaginationMixin, UpdateView
 from ..logdisplay import OVERVIEW_BLACKLIST
+from . import CreateView, PaginationMixin, UpdateView
 
 
 class EventSettingsViewMixin:
@@ -445,6 +448,10 @@ class DisplaySettings(EventSettingsViewMixin, EventSettingsFormView):
                     }
                 )
             regenerate_css.apply_async(args=(self.request.event.pk,))
+            if 'logo_image' in form.changed_data and self.request.event.settings.logo_image:
+                pregenerate_thumbnails.apply_async(args=(
+                    self.request.event.settings.get('logo_image', as_type=str)[7:], LOGO_SIZES
+                ))
             messages.success(self.request, _('Your changes have been saved. Please note that it can '
                                              'take a short period of time until your changes become '
                                              'active.'))
@@ -883,21 +890,28 @@ class EventLog(EventPermissionRequiredMixin, ListView):
             'user', 'content_type', 'api_token', 'oauth_application', 'device'
         ).order_by('-datetime')
         qs = qs.exclude(action_type__in=OVERVIEW_BLACKLIST)
+        archives = self.request.event.archived_logentries.exclude(action_type__in=OVERVIEW_BLACKLIST)
         if not self.request.user.has_event_permission(self.request.organizer, self.request.event, 'can_view_orders',
                                                       request=self.request):
             qs = qs.exclude(content_type=ContentType.objects.get_for_model(Order))
+            archives = archives.exclude(content_type=ContentType.objects.get_for_model(Order))
         if not self.request.user.has_event_permission(self.request.organizer, self.request.event, 'can_view_vouchers',
                                                       request=self.request):
             qs = qs.exclude(content_type=ContentType.objects.get_for_model(Voucher))
+            archives = archives.exclude(content_type=ContentType.objects.get_for_model(Voucher))
 
-        if self.request.GET.get('user') == 'yes':
+        user = self.request.GET.get('user')
+        if user == 'yes':
             qs = qs.filter(user__isnull=False)
-        elif self.request.GET.get('user') == 'no':
+            archives = archives.filter(user__isnull=False)
+        elif user == 'no':
             qs = qs.filter(user__isnull=True)
-        elif self.request.GET.get('user'):
-            qs = qs.filter(user_id=self.request.GET.get('user'))
+            archives = archives.filter(user__isnull=True)
+        elif user:
+            qs = qs.filter(user_id=user)
+            archives = archives.filter(user_id=user)
 
-        return qs
+        return ArchivedLogEntryList(qs, archives)
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data()
@@ -23,6 +23,7 @@ from pretix.base.models import (
 )
 from pretix.base.models.event import SubEvent
 from pretix.base.models.items import ItemAddOn
+from pretix.base.services.thumbnails import pregenerate_thumbnails
 from pretix.control.forms.item import (
     CategoryForm, ItemAddOnForm, ItemAddOnsFormSet, ItemCreateForm,
     ItemUpdateForm, ItemVariationForm, ItemVariationsFormSet, QuestionForm,
@@ -32,6 +33,7 @@ from pretix.control.permissions import (
     EventPermissionRequiredMixin, event_permission_required,
 )
 from pretix.control.signals import item_forms
+from pretix.helpers.thumb import ITEM_PICTURE_SIZES
 
 from . import ChartContainingView, CreateView, PaginationMixin, UpdateView
 
@@ -878,7 +880,10 @@ class ItemUpdateGeneral(ItemDetailMixin, EventPermissionRequiredMixin, UpdateVie
             CachedTicket.objects.filter(order_position__item=self.item).delete()
         for f in self.plugin_forms:
             f.save()
-        return super().form_valid(form)
+        resp = super().form_valid(form)
+        if 'picture' in form.changed_data and self.object.picture:
+            pregenerate_thumbnails.apply_async(args=(self.object.picture.name, ITEM_PICTURE_SIZES))
+        return resp
 
     def form_invalid(self, form):
         messages.error(self.request, _('We could not save your changes. See below for details.'))
@@ -17,6 +17,8 @@ from i18nfield.strings import LazyI18nString
 
 from pretix.base.i18n import language
 from pretix.base.models import Event, Organizer, Quota, Team
+from pretix.base.services.events import ASYNC_COPY_THRESHOLD, copy_event_data
+from pretix.base.views.tasks import AsyncAction
 from pretix.control.forms.event import (
     EventWizardBasicsForm, EventWizardCopyForm, EventWizardFoundationForm,
 )
@@ -97,7 +99,7 @@ def condition_copy(wizard):
     return EventWizardCopyForm.copy_from_queryset(wizard.request.user).exists()
 
 
-class EventWizard(SessionWizardView):
+class EventWizard(AsyncAction, SessionWizardView):
     form_list = [
         ('foundation', EventWizardFoundationForm),
         ('basics', EventWizardBasicsForm),
@@ -111,6 +113,25 @@ class EventWizard(SessionWizardView):
     condition_dict = {
         'copy': condition_copy
     }
+    task = copy_event_data
+
+    def get(self, request, *args, **kwargs):
+        if 'async_id' in request.GET and settings.HAS_CELERY:
+            return self.get_result(request)
+        return SessionWizardView.get(self, request, *args, **kwargs)
+
+    def get_success_message(self, value):
+        return None
+
+    def get_success_url(self, value):
+        event = Event.objects.select_related('organizer').get(pk=value)
+        return reverse('control:event.settings', kwargs={
+            'organizer': event.organizer.slug,
+            'event': event.slug,
+        }) + '?congratulations=1'
+
+    def get_error_url(self):
+        return reverse('control:events')
 
     def get_context_data(self, form, **kwargs):
         ctx = super().get_context_data(form, **kwargs)
@@ -143,6 +164,7 @@ class EventWizard(SessionWizardView):
         foundation_data = self.get_cleaned_data_for_step('foundation')
         basics_data = self.get_cleaned_data_for_step('basics')
         copy_data = self.get_cleaned_data_for_step('copy')
+        copy_async = False
 
         with transaction.atomic(), language(basics_data['locale']):
             event = form_dict['basics'].instance
@@ -191,7 +213,9 @@ class EventWizard(SessionWizardView):
 
             if copy_data and copy_data['copy_from_event']:
                 from_event = copy_data['copy_from_event']
-                event.copy_data_from(from_event)
+                copy_async = from_event.items.count() >= ASYNC_COPY_THRESHOLD
+                if not copy_async:
+                    event.copy_data_from(from_event)
             elif event.has_subevents:
                 event.checkin_lists.create(
                     name=str(se),
@@ -208,6 +232,14 @@ class EventWizard(SessionWizardView):
             event.settings.set('locale', basics_data['locale'])
             event.settings.set('locales', foundation_data['locales'])
 
+        if copy_async:
+            # The copied settings would override the ones we just set, so they are set again after copying
+            return self.do(event.pk, from_event.pk, {
+                'timezone': basics_data['timezone'],
+                'locale': basics_data['locale'],
+                'locales': foundation_data['locales'],
+            })
+
         if (copy_data and copy_data['copy_from_event']) or event.has_subevents:
             return redirect(reverse('control:event.settings', kwargs={
                 'organizer': event.organizer.slug,
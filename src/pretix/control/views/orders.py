@@ -34,6 +34,7 @@ from pretix.base.models import (
     generate_position_secret, generate_secret,
 )
 from pretix.base.models.event import SubEvent
+from pretix.base.models.log import ArchivedLogEntryList
 from pretix.base.models.orders import OrderFee, OrderPayment, OrderRefund
 from pretix.base.models.tax import EU_COUNTRIES
 from pretix.base.payment import PaymentException
@@ -1357,11 +1358,11 @@ class OrderEmailHistory(EventPermissionRequiredMixin, OrderViewMixin, ListView):
             event=self.request.event,
             code=self.kwargs['code'].upper()
         ).first()
-        qs = order.all_logentries()
-        qs = qs.filter(
-            action_type__contains="order.email"
+        logs = order.all_logentries_with_archive()
+        return ArchivedLogEntryList(
+            logs.qs.filter(action_type__contains="order.email"),
+            logs.archives.filter(action_type__contains="order.email"),
         )
-        return qs
 
 
 class AnswerDownload(EventPermissionRequiredMixin, OrderViewMixin, ListView):
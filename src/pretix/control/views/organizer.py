@@ -22,6 +22,7 @@ from pretix.base.models import Device, Organizer, Team, TeamInvite, User
 from pretix.base.models.event import EventMetaProperty
 from pretix.base.models.organizer import TeamAPIToken
 from pretix.base.services.mail import SendMailException, mail
+from pretix.base.services.thumbnails import pregenerate_thumbnails
 from pretix.control.forms.filter import OrganizerFilterForm
 from pretix.control.forms.organizer import (
     DeviceForm, EventMetaPropertyForm, OrganizerDeleteForm,
@@ -34,6 +35,7 @@ from pretix.control.permissions import (
 from pretix.control.signals import nav_organizer
 from pretix.control.views import PaginationMixin
 from pretix.helpers.dicts import merge_dicts
+from pretix.helpers.thumb import LOGO_SIZES
 from pretix.helpers.urls import build_absolute_uri
 from pretix.presale.style import regenerate_organizer_css
 
@@ -164,6 +166,10 @@ class OrganizerDisplaySettings(OrganizerSettingsFormView):
                     }
                 )
             regenerate_organizer_css.apply_async(args=(self.request.organizer.pk,))
+            if 'organizer_logo_image' in form.changed_data and self.request.organizer.settings.organizer_logo_image:
+                pregenerate_thumbnails.apply_async(args=(
+                    self.request.organizer.settings.get('organizer_logo_image', as_type=str)[7:], LOGO_SIZES
+                ))
             messages.success(self.request, _('Your changes have been saved. Please note that it can '
                                              'take a short period of time until your changes become '
                                              'active.'))
@@ -1,7 +1,9 @@
 import copy
+import json
 from datetime import datetime
 
 from dateutil.rrule import DAILY, MONTHLY, WEEKLY, YEARLY, rrule, rruleset
+from django.conf import settings
 from django.contrib import messages
 from django.db import transaction
 from django.db.models import F, IntegerField, OuterRef, Prefetch, Subquery, Sum
@@ -22,6 +24,8 @@ from pretix.base.models.items import (
     ItemVariation, Quota, SubEventItem, SubEventItemVariation,
 )
 from pretix.base.reldate import RelativeDate, RelativeDateWrapper
+from pretix.base.services.subevents import create_subevents, dump_subevent_data
+from pretix.base.views.tasks import AsyncAction
 from pretix.control.forms.checkin import CheckinListForm
 from pretix.control.forms.filter import SubEventFilterForm
 from pretix.control.forms.item import QuotaForm
@@ -33,6 +37,7 @@ from pretix.control.forms.subevents import (
 from pretix.control.permissions import EventPermissionRequiredMixin
 from pretix.control.views import PaginationMixin
 from pretix.control.views.event import MetaDataEditorMixin
+from pretix.helpers.json import CustomJSONEncoder
 from pretix.helpers.models import modelcopy
 
 
@@ -531,17 +536,18 @@ class SubEventBulkAction(EventPermissionRequiredMixin, View):
         })
 
 
-class SubEventBulkCreate(SubEventEditorMixin, EventPermissionRequiredMixin, CreateView):
+class SubEventBulkCreate(SubEventEditorMixin, EventPermissionRequiredMixin, AsyncAction, CreateView):
     model = SubEvent
     template_name = 'pretixcontrol/subevents/bulk.html'
     permission = 'can_change_settings'
     context_object_name = 'subevent'
     form_class = SubEventBulkForm
+    task = create_subevents
 
     def is_valid(self, form):
         return self.rrule_formset.is_valid() and super().is_valid(form)
 
-    def get_success_url(self) -> str:
+    def get_success_url(self, value=None) -> str:
         return reverse('control:event.subevents', kwargs={
             'organizer': self.request.event.organizer.slug,
             'event': self.request.event.slug,
@@ -650,14 +656,11 @@ class SubEventBulkCreate(SubEventEditorMixin, EventPermissionRequiredMixin, Crea
 
         return s
 
-    @transaction.atomic
     def form_valid(self, form):
-
         tz = self.request.event.timezone
-        cnt = 0
+        dates = []
         for rdate in self.get_rrule_set():
             se = copy.copy(form.instance)
-
             se.date_from = make_aware(datetime.combine(rdate, form.cleaned_data['time_from']), tz)
             se.date_to = (
                 make_aware(datetime.combine(rdate, form.cleaned_data['time_to']), tz)
@@ -669,70 +672,66 @@ class SubEventBulkCreate(SubEventEditorMixin, EventPermissionRequiredMixin, Crea
                 if form.cleaned_data.get('time_admission')
                 else None
             )
-            se.presale_start = (
-                form.cleaned_data['rel_presale_start'].datetime(se)
-                if form.cleaned_data.get('rel_presale_start')
-                else None
-            )
-            se.presale_end = (
-                form.cleaned_data['rel_presale_end'].datetime(se)
-                if form.cleaned_data.get('rel_presale_end')
-                else None
-            )
-            se.save()
-            se.log_action('pretix.subevent.added', data=dict(form.cleaned_data), user=self.request.user)
+            dates.append({
+                'date_from': se.date_from,
+                'date_to': se.date_to,
+                'date_admission': se.date_admission,
+                'presale_start': (
+                    form.cleaned_data['rel_presale_start'].datetime(se)
+                    if form.cleaned_data.get('rel_presale_start')
+                    else None
+                ),
+                'presale_end': (
+                    form.cleaned_data['rel_presale_end'].datetime(se)
+                    if form.cleaned_data.get('rel_presale_end')
+                    else None
+                ),
+            })
 
-            for f in self.meta_forms:
-                if f.cleaned_data.get('value'):
-                    i = copy.copy(f.instance)
-                    i.subevent = se
-                    i.save()
+        quotas = []
+        for f in self.formset.forms:
+            if self.formset._should_delete_form(f):
+                continue
+            itemvars = f.cleaned_data.get('itemvars', [])
+            quotas.append((
+                f.instance,
+                list(self.request.event.items.filter(id__in=[
+                    i.split('-')[0] for i in itemvars
+                ]).values_list('id', flat=True)),
+                list(ItemVariation.objects.filter(item__event=self.request.event, id__in=[
+                    i.split('-')[1] for i in itemvars if '-' in i
+                ]).values_list('id', flat=True)),
+            ))
+
+        checkin_lists = [
+            (f.instance, [i.pk for i in f.cleaned_data.get('limit_products', [])])
+            for f in self.cl_formset.forms if not self.cl_formset._should_delete_form(f)
+        ]
+
+        data = dump_subevent_data(
+            form.instance, dates,
+            meta_values=[f.instance for f in self.meta_forms if f.cleaned_data.get('value')],
+            quotas=quotas,
+            checkin_lists=checkin_lists,
+            item_prices=[f.instance for f in self.itemvar_forms if isinstance(f.instance, SubEventItem)],
+            variation_prices=[f.instance for f in self.itemvar_forms if isinstance(f.instance, SubEventItemVariation)],
+        )
+        log_data = json.loads(json.dumps(dict(form.cleaned_data), cls=CustomJSONEncoder))
+        return self.do(self.request.event.pk, data, self.request.user.pk, log_data)
 
-            for f in self.formset.forms:
-                if self.formset._should_delete_form(f):
-                    continue
-                i = copy.copy(f.instance)
-                i.subevent = se
-                i.event = se.event
-                i.save()
-                selected_items = set(list(self.request.event.items.filter(id__in=[
-                    i.split('-')[0] for i in f.cleaned_data.get('itemvars', [])
-                ])))
-                selected_variations = list(ItemVariation.objects.filter(item__event=self.request.event, id__in=[
-                    i.split('-')[1] for i in f.cleaned_data.get('itemvars', []) if '-' in i
-                ]))
-                i.items.add(*[_i for _i in selected_items])
-                i.variations.add(*[_i for _i in selected_variations])
-
-                change_data = {k: f.cleaned_data.get(k) for k in f.changed_data}
-                change_data['id'] = i.pk
-                i.log_action(action='pretix.event.quota.added', user=self.request.user, data=change_data)
-                se.log_action('pretix.subevent.quota.added', user=self.request.user, data=change_data)
-
-            for f in self.cl_formset.forms:
-                if self.cl_formset._should_delete_form(f):
-                    continue
-                i = copy.copy(f.instance)
-                i.subevent = se
-                i.event = se.event
-                i.save()
-                i.limit_products.add(*f.cleaned_data.get('limit_products', []))
-                change_data = {k: f.cleaned_data.get(k) for k in f.changed_data}
-                change_data['id'] = i.pk
-                i.log_action(action='pretix.event.checkinlist.added', user=self.request.user, data=change_data)
-
-            for f in self.itemvar_forms:
-                i = copy.copy(f.instance)
-                i.subevent = se
-                i.save()
-
-            cnt += 1
-
-        messages.success(self.request, pgettext_lazy('subevent', '{} new dates have been created.').format(cnt))
-        return redirect(reverse('control:event.subevents', kwargs={
+    def get(self, request, *args, **kwargs):
+        if 'async_id' in request.GET and settings.HAS_CELERY:
+            return self.get_result(request)
+        return CreateView.get(self, request, *args, **kwargs)
+
+    def get_success_message(self, value):
+        return pgettext_lazy('subevent', '{} new dates have been created.').format(value)
+
+    def get_error_url(self):
+        return reverse('control:event.subevents.bulk', kwargs={
             'organizer': self.request.event.organizer.slug,
             'event': self.request.event.slug,
-        }))
+        })
 
     def post(self, request, *args, **kwargs):
         form = self.get_form()
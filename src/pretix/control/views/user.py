@@ -479,6 +479,18 @@ class UserNotificationsEditView(TemplateView):
                 reverse('control:user.settings.notifications') +
                 ('?event={}'.format(self.event.pk) if self.event else '')
             )
+        elif "notifications_digest" in request.POST:
+            request.user.notifications_digest = request.POST.get("notifications_digest", "") == "on"
+            request.user.save()
+
+            messages.success(request, _('Your notification settings have been saved.'))
+            self.request.user.log_action('pretix.user.settings.changed', user=self.request.user, data={
+                'notifications_digest': request.user.notifications_digest
+            })
+            return redirect(
+                reverse('control:user.settings.notifications') +
+                ('?event={}'.format(self.event.pk) if self.event else '')
+            )
         else:
             for method, __ in NotificationSetting.CHANNELS:
                 old_enabled = self.currently_set[method]
@@ -18,7 +18,7 @@ from django.views.generic import (
 )
 
 from pretix.base.models import LogEntry, Voucher
-from pretix.base.models.vouchers import _generate_random_code
+from pretix.base.models.vouchers import generate_codes
 from pretix.control.forms.filter import VoucherFilterForm
 from pretix.control.forms.vouchers import VoucherBulkForm, VoucherForm
 from pretix.control.permissions import EventPermissionRequiredMixin
@@ -267,13 +267,18 @@ class VoucherBulkCreate(EventPermissionRequiredMixin, CreateView):
     def form_valid(self, form):
         log_entries = []
         form.save(self.request.event)
+        data = dict(form.cleaned_data)
+        codes = [c.upper() for c in data.pop('codes')]
+        data['bulk'] = True
         # We need to query them again as form.save() uses bulk_create which does not fill in .pk values on databases
         # other than PostgreSQL
-        for v in self.request.event.vouchers.filter(code__in=form.cleaned_data['codes']):
-            log_entries.append(
-                v.log_action('pretix.voucher.added', data=form.cleaned_data, user=self.request.user, save=False)
-            )
-        LogEntry.objects.bulk_create(log_entries)
+        for i in range(0, len(codes), 500):  # Work around SQLite's SQLITE_MAX_VARIABLE_NUMBER
+            for v in self.request.event.vouchers.filter(code__in=codes[i:i + 500]):
+                data['code'] = v.code
+                log_entries.append(
+                    v.log_action('pretix.voucher.added', data=data, user=self.request.user, save=False)
+                )
+        LogEntry.objects.bulk_create(log_entries, batch_size=500)
         messages.success(self.request, _('The new vouchers have been created.'))
         return HttpResponseRedirect(self.get_success_url())
 
@@ -299,22 +304,13 @@ class VoucherRNG(EventPermissionRequiredMixin, View):
     permission = 'can_change_vouchers'
 
     def get(self, request, *args, **kwargs):
-        codes = set()
         try:
             num = int(request.GET.get('num', '5'))
         except ValueError:  # NOQA
             return HttpResponseBadRequest()
 
-        prefix = request.GET.get('prefix')
-        while len(codes) < num:
-            new_codes = set()
-            for i in range(min(num - len(codes), 500)):  # Work around SQLite's SQLITE_MAX_VARIABLE_NUMBER
-                new_codes.add(_generate_random_code(prefix=prefix))
-            new_codes -= set([v['code'] for v in Voucher.objects.filter(code__in=new_codes).values('code')])
-            codes |= new_codes
-
         return JsonResponse({
-            'codes': list(codes)
+            'codes': generate_codes(num, prefix=request.GET.get('prefix'))
         })
 
     def get_success_url(self) -> str:
@@ -1,6 +1,6 @@
 import contextlib
 
-from django.db import transaction
+from django.db import connections, transaction
 from django.db.models import Aggregate
 from django.db.models.expressions import OrderBy
 
@@ -38,6 +38,21 @@ def casual_reads():
     yield
 
 
+def bulk_create_with_pks(model, objects, batch_size=500):
+    """
+    Inserts all given instances of ``model`` and makes sure their primary keys are set afterwards, so
+    they can be referenced by other objects. On databases that return the new primary keys from bulk
+    inserts, such as PostgreSQL, this uses ``bulk_create``, i.e. ``save()`` is not called. On all
+    other databases, every instance is saved on its own.
+    """
+    if connections[model.objects.db].features.can_return_ids_from_bulk_insert:
+        model.objects.bulk_create(objects, batch_size=batch_size)
+    else:
+        for o in objects:
+            o.save()
+    return objects
+
+
 class FixedOrderBy(OrderBy):
     # Workaround for https://code.djangoproject.com/ticket/28848
     template = '%(expression)s %(ordering)s'
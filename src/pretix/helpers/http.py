@@ -1,4 +1,9 @@
+import hashlib
+
+from django.conf import settings
 from django.http import StreamingHttpResponse
+from django.utils.crypto import get_random_string
+from django.utils.http import quote_etag
 
 
 class ChunkBasedFileResponse(StreamingHttpResponse):
@@ -9,3 +14,22 @@ class ChunkBasedFileResponse(StreamingHttpResponse):
         streaming_content = streaming_content.chunks(self.block_size)
         super().__init__(streaming_content, *args, **kwargs)
         self['Content-Length'] = filelike.size
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a quoted ETag value from any number of values that together describe the state
+    of a resource, e.g. the request path and the time of the last relevant change.
+    """
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def event_generation(event):
+    """
+    Returns a random token that changes whenever the cache of the given event is cleared, i.e.
+    whenever the event or one of its products, quotas, etc. is modified. Returns ``None`` if no
+    real cache backend is configured, as we can not detect those changes in that case.
+    """
+    if not settings.REAL_CACHE_USED:
+        return None
+    return event.cache.get_or_set('etag_generation', lambda: get_random_string(length=16), timeout=3600)
@@ -1,13 +1,25 @@
 import hashlib
+import time
 from io import BytesIO
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from PIL import Image
+from django.db import IntegrityError, transaction
+from PIL import Image, features
 from PIL.Image import LANCZOS
 
 from pretix.helpers.models import Thumbnail
 
+# Sizes used by our templates, these are created right away when a new file is uploaded
+ITEM_PICTURE_SIZES = ('60x60^',)
+LOGO_SIZES = ('5000x120',)
+
+CACHE_TIMEOUT = 3600 * 24
+LOCK_TIMEOUT = 60
+LOCK_WAIT = 5
+
 
 class ThumbnailError(Exception):
     pass
@@ -48,10 +60,18 @@ def get_sizes(size, imgsize):
             return (int(imgsize[0] * hfactor), size[1]), None
 
 
+def _cache_key(prefix, source, size):
+    return 'pretix_thumb_{}_{}'.format(prefix, hashlib.sha1('{}@{}'.format(source, size).encode()).hexdigest())
+
+
+def _use_webp():
+    return settings.PRETIX_THUMBNAILS_WEBP and features.check_module('webp')
+
+
 def create_thumbnail(sourcename, size):
     source = default_storage.open(sourcename)
-    image = Image.open(BytesIO(source.read()))
     try:
+        image = Image.open(BytesIO(source.read()))
         image.load()
     except:
         raise ThumbnailError('Could not load image')
@@ -62,21 +82,68 @@ def create_thumbnail(sourcename, size):
         image = image.crop(crop)
 
     checksum = hashlib.md5(image.tobytes()).hexdigest()
-    name = checksum + '.' + size.replace('^', 'c') + '.png'
     buffer = BytesIO()
-    if image.mode not in ("1", "L", "RGB", "RGBA"):
-        image = image.convert('RGB')
-    image.save(fp=buffer, format='PNG')
+    if _use_webp():
+        name = checksum + '.' + size.replace('^', 'c') + '.webp'
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert('RGBA' if 'A' in image.mode or 'transparency' in image.info else 'RGB')
+        image.save(fp=buffer, format='WEBP', quality=90)
+    else:
+        name = checksum + '.' + size.replace('^', 'c') + '.png'
+        if image.mode not in ("1", "L", "RGB", "RGBA"):
+            image = image.convert('RGB')
+        image.save(fp=buffer, format='PNG')
     imgfile = ContentFile(buffer.getvalue())
 
-    t = Thumbnail.objects.create(source=sourcename, size=size)
-    t.thumb.save(name, imgfile)
+    # Store the file first, so there never is a database entry without a file
+    t = Thumbnail(source=sourcename, size=size)
+    t.thumb.save(name, imgfile, save=False)
+    try:
+        with transaction.atomic():
+            t.save()
+    except IntegrityError:
+        # Somebody else has been faster
+        return Thumbnail.objects.get(source=sourcename, size=size)
     return t
 
 
+def _create_thumbnail_once(source, size):
+    """
+    Creates a thumbnail unless another process is already creating the same one, in which case we
+    wait for that process instead of resizing the same image again.
+    """
+    lock_key = _cache_key('lock', source, size)
+    if cache.add(lock_key, 'locked', LOCK_TIMEOUT):
+        try:
+            t = Thumbnail.objects.filter(source=source, size=size).first()
+            return t or create_thumbnail(source, size)
+        finally:
+            cache.delete(lock_key)
+
+    deadline = time.time() + LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(.1)
+        t = Thumbnail.objects.filter(source=source, size=size).first()
+        if t:
+            return t
+    raise ThumbnailError('Timed out waiting for the thumbnail to be created')
+
+
 def get_thumbnail(source, size):
+    """
+    Returns a :py:class:`Thumbnail` of the given source file. The location of existing thumbnails is
+    looked up in the cache first, in which case the returned object has not been loaded from the
+    database and is only meant to be used for its ``thumb`` file.
+    """
     # Assumes files are immutable
+    key = _cache_key('name', source, size)
+    name = cache.get(key)
+    if name:
+        return Thumbnail(source=source, size=size, thumb=name)
+
     try:
-        return Thumbnail.objects.get(source=source, size=size)
+        t = Thumbnail.objects.get(source=source, size=size)
     except Thumbnail.DoesNotExist:
-        return create_thumbnail(source, size)
+        t = _create_thumbnail_once(source, size)
+    cache.set(key, t.thumb.name, CACHE_TIMEOUT)
+    return t
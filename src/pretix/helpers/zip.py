@@ -0,0 +1,25 @@
+import shutil
+import sys
+import tempfile
+from zipfile import ZipFile
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def zip_write_file(zipf: ZipFile, arcname: str, content):
+    """
+    Adds a member to a zip file opened for writing. ``content`` can be a string, bytes or a file-like
+    object opened for reading. File contents are copied in chunks, so they never need to fit into memory
+    completely.
+    """
+    if isinstance(content, (str, bytes)):
+        zipf.writestr(arcname, content)
+    elif sys.version_info >= (3, 6):
+        with zipf.open(arcname, 'w', force_zip64=True) as dest:
+            shutil.copyfileobj(content, dest, CHUNK_SIZE)
+    else:
+        # Python 3.5 can only add files from the filesystem without reading them into memory at once
+        with tempfile.NamedTemporaryFile() as tmp:
+            shutil.copyfileobj(content, tmp, CHUNK_SIZE)
+            tmp.flush()
+            zipf.write(tmp.name, arcname)
@@ -0,0 +1,23 @@
+# Generated by Django 2.1.1 on 2018-12-07 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banktransfer', '0005_auto_20181023_2209'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bankimportjob',
+            name='rows_processed',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='bankimportjob',
+            name='rows_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
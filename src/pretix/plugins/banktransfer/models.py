@@ -20,6 +20,8 @@ class BankImportJob(models.Model):
     organizer = models.ForeignKey('pretixbase.Organizer', null=True, on_delete=models.CASCADE)
     created = models.DateTimeField(auto_now_add=True)
     state = models.CharField(max_length=32, choices=STATES, default=STATE_PENDING)
+    rows_total = models.PositiveIntegerField(default=0)
+    rows_processed = models.PositiveIntegerField(default=0)
 
     @property
     def owner_kwargs(self):
@@ -169,6 +169,9 @@ var bankimport_transactionlist = {
     check_state: function () {
         $.getJSON($("[data-job-waiting-url]").attr("data-job-waiting-url"), function (data) {
             if (data.state == 'running' || data.state == 'pending') {
+                if (data.rows_total) {
+                    $("[data-job-progress]").text(data.rows_processed + " / " + data.rows_total);
+                }
                 window.setTimeout(bankimport_transactionlist.check_state, 750);
             } else {
                 location.reload();
@@ -1,5 +1,6 @@
 import logging
 import re
+from collections import defaultdict
 from decimal import Decimal
 
 from celery.exceptions import MaxRetriesExceededError
@@ -18,36 +19,19 @@ from pretix.celery_app import app
 from .models import BankImportJob, BankTransaction
 
 logger = logging.getLogger(__name__)
+amount_pattern = re.compile("[^0-9.-]")
 
+CHUNK_SIZE = 1000
+LOCK_BATCH_SIZE = 100
 
-def _handle_transaction(trans: BankTransaction, code: str, event: Event=None, organizer: Organizer=None,
-                        slug: str=None):
-    if event:
-        try:
-            trans.order = event.orders.get(code=code)
-        except Order.DoesNotExist:
-            normalized_code = Order.normalize_code(code)
-            try:
-                trans.order = event.orders.get(code=normalized_code)
-            except Order.DoesNotExist:
-                trans.state = BankTransaction.STATE_NOMATCH
-                trans.save()
-                return
-    else:
-        qs = Order.objects.filter(event__organizer=organizer)
-        if slug:
-            qs = qs.filter(event__slug__iexact=slug)
-        try:
-            trans.order = qs.get(code=code)
-        except Order.DoesNotExist:
-            normalized_code = Order.normalize_code(code)
-            try:
-                trans.order = qs.get(code=normalized_code)
-            except Order.DoesNotExist:
-                trans.state = BankTransaction.STATE_NOMATCH
-                trans.save()
-                return
 
+def _handle_transaction(trans: BankTransaction):
+    """
+    Checks the order of a matched transaction and confirms a payment for it. Invoices and emails are
+    left to the caller, such that they are not processed while the event is locked. If the order has
+    been marked as paid, the payment is returned and :py:meth:`OrderPayment.process_order_paid`
+    needs to be called on it.
+    """
     if trans.order.status == Order.STATUS_PAID and trans.order.pending_sum <= Decimal('0.00'):
         trans.state = BankTransaction.STATE_DUPLICATE
     elif trans.order.status == Order.STATUS_REFUNDED:
@@ -71,65 +55,133 @@ def _handle_transaction(trans: BankTransaction, code: str, event: Event=None, or
             'payer': trans.payer,
             'trans_id': trans.pk
         }
+        paid = False
         try:
-            p.confirm()
+            paid = p.mark_confirmed()
         except Quota.QuotaExceededException:
-            trans.state = BankTransaction.STATE_VALID
-            trans.order.payments.filter(
-                provider='banktransfer',
-                state__in=(OrderPayment.PAYMENT_STATE_CREATED, OrderPayment.PAYMENT_STATE_PENDING),
-            ).update(state=OrderPayment.PAYMENT_STATE_CANCELED)
-        except SendMailException:
-            trans.state = BankTransaction.STATE_VALID
-            trans.order.payments.filter(
-                provider='banktransfer',
-                state__in=(OrderPayment.PAYMENT_STATE_CREATED, OrderPayment.PAYMENT_STATE_PENDING),
-            ).update(state=OrderPayment.PAYMENT_STATE_CANCELED)
-        else:
-            trans.state = BankTransaction.STATE_VALID
-            trans.order.payments.filter(
-                provider='banktransfer',
-                state__in=(OrderPayment.PAYMENT_STATE_CREATED, OrderPayment.PAYMENT_STATE_PENDING),
-            ).update(state=OrderPayment.PAYMENT_STATE_CANCELED)
+            pass
+        trans.state = BankTransaction.STATE_VALID
+        trans.order.payments.filter(
+            provider='banktransfer',
+            state__in=(OrderPayment.PAYMENT_STATE_CREATED, OrderPayment.PAYMENT_STATE_PENDING),
+        ).update(state=OrderPayment.PAYMENT_STATE_CANCELED)
+        trans.save()
+        return p if paid else None
     trans.save()
 
 
-def _get_unknown_transactions(job: BankImportJob, data: list, event: Event=None, organizer: Organizer=None):
-    amount_pattern = re.compile("[^0-9.-]")
-    known_checksums = set(t['checksum'] for t in BankTransaction.objects.filter(
-        Q(event=event) if event else Q(organizer=organizer)
-    ).values('checksum'))
-
+def _parse_amount(amount):
+    if isinstance(amount, Decimal):
+        return amount
+    if ',' in amount and '.' in amount:
+        # Handle thousand-seperator , or .
+        if amount.find(',') < amount.find('.'):
+            amount = amount.replace(',', '')
+        else:
+            amount = amount.replace('.', '')
+    amount = amount_pattern.sub("", amount.replace(',', '.'))
+    try:
+        return Decimal(amount)
+    except:
+        logger.exception('Could not parse amount of transaction: {}'.format(amount))
+        return Decimal("0.00")
+
+
+def _get_unknown_transactions(job: BankImportJob, data: list, seen_checksums: set, event: Event=None,
+                              organizer: Organizer=None):
+    """
+    Creates transactions for all rows of ``data`` that have not been imported before and returns them.
+    ``seen_checksums`` contains the checksums of all rows of the current import that have been looked
+    at before and is updated in place, all other checksums are looked up in the database.
+    """
     transactions = []
     for row in data:
-        amount = row['amount']
-        if not isinstance(amount, Decimal):
-            if ',' in amount and '.' in amount:
-                # Handle thousand-seperator , or .
-                if amount.find(',') < amount.find('.'):
-                    amount = amount.replace(',', '')
-                else:
-                    amount = amount.replace('.', '')
-            amount = amount_pattern.sub("", amount.replace(',', '.'))
-            try:
-                amount = Decimal(amount)
-            except:
-                logger.exception('Could not parse amount of transaction: {}'.format(amount))
-                amount = Decimal("0.00")
-
         trans = BankTransaction(event=event, organizer=organizer, import_job=job,
                                 payer=row.get('payer', ''),
                                 reference=row['reference'],
-                                amount=amount,
-                                date=row['date'])
+                                amount=_parse_amount(row['amount']),
+                                date=row['date'],
+                                state=BankTransaction.STATE_UNCHECKED)
         trans.checksum = trans.calculate_checksum()
-        if trans.checksum not in known_checksums:
-            trans.state = BankTransaction.STATE_UNCHECKED
-            trans.save()
+        if trans.checksum not in seen_checksums:
+            seen_checksums.add(trans.checksum)
             transactions.append(trans)
-            known_checksums.add(trans.checksum)
 
-    return transactions
+    known_checksums = set(BankTransaction.objects.filter(
+        Q(event=event) if event else Q(organizer=organizer),
+        checksum__in=[t.checksum for t in transactions]
+    ).values_list('checksum', flat=True))
+    transactions = [t for t in transactions if t.checksum not in known_checksums]
+    BankTransaction.objects.bulk_create(transactions)
+
+    # bulk_create does not set primary keys on all databases, so we need to fetch the objects again
+    return list(job.transactions.filter(
+        state=BankTransaction.STATE_UNCHECKED,
+        checksum__in=[t.checksum for t in transactions]
+    ).order_by('pk'))
+
+
+def _match_transactions(job: BankImportJob, transactions: list, pattern):
+    """
+    Looks up the orders referenced by the given transactions with as few queries as possible and then
+    handles all matched transactions, grouped by event. The event lock is only acquired once for every
+    ``LOCK_BATCH_SIZE`` transactions of an event.
+    """
+    references = {}
+    for trans in transactions:
+        match = pattern.search(trans.reference.replace(" ", "").replace("\n", "").upper())
+        if match:
+            if job.event:
+                references[trans] = (None, match.group(1))
+            else:
+                references[trans] = (match.group(1), match.group(2))
+
+    codes = {c for s, c in references.values()} | {Order.normalize_code(c) for s, c in references.values()}
+    if job.event:
+        qs = Order.objects.filter(event=job.event)
+    else:
+        qs = Order.objects.filter(event__organizer=job.organizer)
+    orders = {}
+    for o in qs.filter(code__in=codes).select_related('event'):
+        if job.event:
+            o.event = job.event
+            orders[None, o.code] = o
+        else:
+            orders[o.event.slug.upper(), o.code] = o
+
+    nomatch = []
+    by_event = defaultdict(list)
+    for trans in transactions:
+        if trans not in references:
+            nomatch.append(trans.pk)
+            continue
+        slug, code = references[trans]
+        trans.order = orders.get((slug, code)) or orders.get((slug, Order.normalize_code(code)))
+        if trans.order:
+            by_event[trans.order.event_id].append(trans)
+        else:
+            nomatch.append(trans.pk)
+
+    BankTransaction.objects.filter(pk__in=nomatch).update(state=BankTransaction.STATE_NOMATCH)
+
+    for event_transactions in by_event.values():
+        # Use the same event object for all orders, so the lock we take here is reused by OrderPayment.confirm()
+        event = event_transactions[0].order.event
+        for trans in event_transactions:
+            trans.order.event = event
+        for i in range(0, len(event_transactions), LOCK_BATCH_SIZE):
+            paid = []
+            with event.lock():
+                for trans in event_transactions[i:i + LOCK_BATCH_SIZE]:
+                    with transaction.atomic():
+                        p = _handle_transaction(trans)
+                    if p:
+                        paid.append(p)
+            for p in paid:
+                try:
+                    p.process_order_paid()
+                except SendMailException:
+                    logger.exception('Order paid email could not be sent')
 
 
 @app.task(base=TransactionAwareTask, bind=True, max_retries=5, default_retry_delay=1)
@@ -137,40 +189,29 @@ def process_banktransfers(self, job: int, data: list) -> None:
     with language("en"):  # We'll translate error messages at display time
         job = BankImportJob.objects.get(pk=job)
         job.state = BankImportJob.STATE_RUNNING
+        job.rows_total = len(data)
+        job.rows_processed = 0
         job.save()
-        prefixes = []
 
         try:
             # Delete left-over transactions from a failed run before so they can reimported
             BankTransaction.objects.filter(state=BankTransaction.STATE_UNCHECKED, **job.owner_kwargs).delete()
 
-            transactions = _get_unknown_transactions(job, data, **job.owner_kwargs)
-
             code_len = settings.ENTROPY['order_code']
             if job.event:
                 pattern = re.compile(job.event.slug.upper() + r"[ \-_]*([A-Z0-9]{%s})" % code_len)
             else:
-                if not prefixes:
-                    prefixes = [e.slug.upper().replace(".", r"\.").replace("-", r"[\- ]*")
-                                for e in job.organizer.events.all()]
+                prefixes = [e.slug.upper().replace(".", r"\.").replace("-", r"[\- ]*")
+                            for e in job.organizer.events.all()]
                 pattern = re.compile("(%s)[ \\-_]*([A-Z0-9]{%s})" % ("|".join(prefixes), code_len))
 
-            for trans in transactions:
-                match = pattern.search(trans.reference.replace(" ", "").replace("\n", "").upper())
-
-                if match:
-                    if job.event:
-                        code = match.group(1)
-                        with transaction.atomic():
-                            _handle_transaction(trans, code, event=job.event)
-                    else:
-                        slug = match.group(1)
-                        code = match.group(2)
-                        with transaction.atomic():
-                            _handle_transaction(trans, code, organizer=job.organizer, slug=slug)
-                else:
-                    trans.state = BankTransaction.STATE_NOMATCH
-                    trans.save()
+            seen_checksums = set()
+            for i in range(0, len(data), CHUNK_SIZE):
+                chunk = data[i:i + CHUNK_SIZE]
+                transactions = _get_unknown_transactions(job, chunk, seen_checksums, **job.owner_kwargs)
+                _match_transactions(job, transactions, pattern)
+                job.rows_processed = i + len(chunk)
+                job.save(update_fields=['rows_processed'])
         except LockTimeoutException:
             try:
                 self.retry()
@@ -229,7 +229,9 @@ class JobDetailView(DetailView):
     def get(self, request, *args, **kwargs):
         if 'ajax' in request.GET:
             return JsonResponse({
-                'state': self.job.state
+                'state': self.job.state,
+                'rows_total': self.job.rows_total,
+                'rows_processed': self.job.rows_processed,
             })
 
         context = self.get_context_data()
@@ -16,7 +16,7 @@ class PaypalApp(AppConfig):
         description = _("This plugin allows you to receive payments via PayPal")
 
     def ready(self):
-        from . import signals  # NOQA
+        from . import signals, tasks  # NOQA
 
     @cached_property
     def compatibility_errors(self):
@@ -0,0 +1,99 @@
+import json
+import logging
+from decimal import Decimal
+
+import paypalrestsdk
+from django.db.models import Sum
+
+from pretix.base.models import OrderPayment, OrderRefund, Quota
+from pretix.base.services.webhooks import webhook_processor
+from pretix.plugins.paypal.models import ReferencedPayPalObject
+from pretix.plugins.paypal.payment import Paypal
+
+logger = logging.getLogger('pretix.plugins.paypal')
+
+
+@webhook_processor('paypal')
+def process_webhook(wh):
+    event_json = wh.data
+    saleid = wh.reference
+
+    refs = [saleid]
+    if event_json['resource'].get('parent_payment'):
+        refs.append(event_json['resource'].get('parent_payment'))
+    rso = ReferencedPayPalObject.objects.select_related('order', 'order__event', 'payment').filter(
+        reference__in=refs
+    ).first()
+    event = rso.order.event if rso else wh.event
+
+    prov = Paypal(event)
+    prov.init_api()
+
+    try:
+        sale = paypalrestsdk.Sale.find(saleid)
+    except:
+        logger.exception('PayPal error on webhook. Event data: %s' % str(event_json))
+        raise
+
+    if rso and rso.payment:
+        payment = rso.payment
+    else:
+        payments = OrderPayment.objects.filter(order__event=event, provider='paypal',
+                                               info__icontains=sale['id'])
+        payment = None
+        for p in payments:
+            payment_info = p.info_data
+            for res in payment_info['transactions'][0]['related_resources']:
+                for k, v in res.items():
+                    if k == 'sale' and v['id'] == sale['id']:
+                        payment = p
+                        break
+
+    if not payment:
+        return
+
+    payment.order.log_action('pretix.plugins.paypal.event', data=event_json)
+
+    if payment.state == OrderPayment.PAYMENT_STATE_CONFIRMED and sale['state'] in ('partially_refunded', 'refunded'):
+        if event_json['resource_type'] == 'refund':
+            try:
+                refund = paypalrestsdk.Refund.find(event_json['resource']['id'])
+            except:
+                logger.exception('PayPal error on webhook. Event data: %s' % str(event_json))
+                raise
+
+            known_refunds = {r.info_data.get('id'): r for r in payment.refunds.all()}
+            if refund['id'] not in known_refunds:
+                payment.create_external_refund(
+                    amount=abs(Decimal(refund['amount']['total'])),
+                    info=json.dumps(refund.to_dict() if not isinstance(refund, dict) else refund)
+                )
+            elif known_refunds.get(refund['id']).state in (
+                    OrderRefund.REFUND_STATE_CREATED, OrderRefund.REFUND_STATE_TRANSIT) and refund['state'] == 'completed':
+                known_refunds.get(refund['id']).done()
+
+            if 'total_refunded_amount' in refund:
+                known_sum = payment.refunds.filter(
+                    state__in=(OrderRefund.REFUND_STATE_DONE, OrderRefund.REFUND_STATE_TRANSIT,
+                               OrderRefund.REFUND_STATE_CREATED, OrderRefund.REFUND_SOURCE_EXTERNAL)
+                ).aggregate(s=Sum('amount'))['s'] or Decimal('0.00')
+                total_refunded_amount = Decimal(refund['total_refunded_amount']['value'])
+                if known_sum < total_refunded_amount:
+                    payment.create_external_refund(
+                        amount=total_refunded_amount - known_sum
+                    )
+        elif sale['state'] == 'refunded':
+            known_sum = payment.refunds.filter(
+                state__in=(OrderRefund.REFUND_STATE_DONE, OrderRefund.REFUND_STATE_TRANSIT,
+                           OrderRefund.REFUND_STATE_CREATED, OrderRefund.REFUND_SOURCE_EXTERNAL)
+            ).aggregate(s=Sum('amount'))['s'] or Decimal('0.00')
+
+            if known_sum < payment.amount:
+                payment.create_external_refund(
+                    amount=payment.amount - known_sum
+                )
+    elif payment.state in (OrderPayment.PAYMENT_STATE_PENDING, OrderPayment.PAYMENT_STATE_CREATED) and sale['state'] == 'completed':
+        try:
+            payment.confirm()
+        except Quota.QuotaExceededException:
+            pass
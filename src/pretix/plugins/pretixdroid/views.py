@@ -23,6 +23,7 @@ from pretix.base.models.event import SubEvent
 from pretix.base.services.checkin import (
     CheckInError, RequiredQuestionsError, perform_checkin,
 )
+from pretix.base.services.search import positions_matching
 from pretix.control.permissions import EventPermissionRequiredMixin
 from pretix.helpers.urls import build_absolute_uri
 from pretix.multidomain.urlreverse import (
@@ -300,13 +301,7 @@ class ApiSearchView(ApiView):
                     Q(secret__istartswith=query)
                 )[:25]
             else:
-                ops = qs.filter(
-                    Q(secret__istartswith=query)
-                    | Q(attendee_name_cached__icontains=query)
-                    | Q(addon_to__attendee_name_cached__icontains=query)
-                    | Q(order__code__istartswith=query)
-                    | Q(order__invoice_address__name_cached__icontains=query)
-                )[:25]
+                ops = qs.filter(positions_matching(query, self.event))[:25]
 
             response['results'] = [serialize_op(op, bool(op.last_checked_in), self.config.list) for op in ops]
         else:
@@ -134,8 +134,8 @@ class Report(ReportlabExportMixin, BaseExporter):
     def identifier(self) -> str:
         raise NotImplementedError()
 
-    def __init__(self, event):
-        super().__init__(event)
+    def __init__(self, event, **kwargs):
+        super().__init__(event, **kwargs)
 
 
 class OverviewReport(Report):
@@ -2,6 +2,7 @@ import logging
 from datetime import timedelta
 
 from django.contrib import messages
+from django.contrib.contenttypes.models import ContentType
 from django.db.models import Q
 from django.http import Http404
 from django.shortcuts import redirect
@@ -11,8 +12,11 @@ from django.utils.translation import ugettext_lazy as _
 from django.views.generic import FormView, ListView
 
 from pretix.base.i18n import LazyI18nString, language
-from pretix.base.models import LogEntry, Order
+from pretix.base.models import Event, LogEntry, LogEntryArchive, Order
 from pretix.base.models.event import SubEvent
+from pretix.base.models.log import (
+    ArchivedLogEntryList, read_archived_logentries,
+)
 from pretix.control.permissions import EventPermissionRequiredMixin
 from pretix.multidomain.urlreverse import build_absolute_uri
 from pretix.plugins.sendmail.tasks import send_mails
@@ -22,6 +26,20 @@ from . import forms
 logger = logging.getLogger('pretix.plugins.sendmail')
 
 
+def _archived_logentries(event):
+    return LogEntryArchive.objects.filter(
+        content_type=ContentType.objects.get_for_model(Event), object_id=event.pk,
+        action_type='pretix.plugins.sendmail.sent'
+    )
+
+
+def _get_archived_logentry(event, logentry_id):
+    for le in read_archived_logentries(_archived_logentries(event)):
+        if str(le.pk) == str(logentry_id):
+            return le
+    raise LogEntry.DoesNotExist()
+
+
 class SenderView(EventPermissionRequiredMixin, FormView):
     template_name = 'pretixplugins/sendmail/send_form.html'
     permission = 'can_change_orders'
@@ -33,11 +51,11 @@ class SenderView(EventPermissionRequiredMixin, FormView):
         if 'from_log' in self.request.GET:
             try:
                 from_log_id = self.request.GET.get('from_log')
-                logentry = LogEntry.objects.get(
+                logentry = LogEntry.objects.filter(
                     id=from_log_id,
                     event=self.request.event,
                     action_type='pretix.plugins.sendmail.sent'
-                )
+                ).first() or _get_archived_logentry(self.request.event, from_log_id)
                 kwargs['initial'] = {
                     'message': LazyI18nString(logentry.parsed_data['message']),
                     'subject': LazyI18nString(logentry.parsed_data['subject']),
@@ -144,7 +162,7 @@ class EmailHistoryView(EventPermissionRequiredMixin, ListView):
             event=self.request.event,
             action_type='pretix.plugins.sendmail.sent'
         )
-        return qs
+        return ArchivedLogEntryList(qs, _archived_logentries(self.request.event))
 
     def get_context_data(self, **kwargs):
         ctx = super().get_context_data()
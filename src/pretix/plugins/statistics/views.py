@@ -3,12 +3,12 @@ import json
 
 import dateutil.parser
 import dateutil.rrule
-from django.db.models import Count, DateTimeField, Max, OuterRef, Subquery
+from django.db.models import DateTimeField, Max, OuterRef, Subquery, Sum
 from django.utils import timezone
 from django.views.generic import TemplateView
 
 from pretix.base.models import (
-    Item, Order, OrderPayment, OrderPosition, SubEvent,
+    Item, Order, OrderPayment, OrderPosition, SalesStatistic, SubEvent,
 )
 from pretix.control.permissions import EventPermissionRequiredMixin
 from pretix.control.views import ChartContainingView
@@ -63,10 +63,12 @@ class IndexView(EventPermissionRequiredMixin, ChartContainingView, TemplateView)
             if subevent:
                 oqs = oqs.filter(positions__subevent_id=subevent).distinct()
 
-            ordered_by_day = {}
-            for o in oqs.filter(event=self.request.event).values('datetime'):
-                day = o['datetime'].astimezone(tz).date()
-                ordered_by_day[day] = ordered_by_day.get(day, 0) + 1
+            ordered_by_day = {
+                o['date']: o['cnt']
+                for o in self.request.event.sales_statistics.filter(
+                    kind=SalesStatistic.KIND_ORDER, subevent=subevent
+                ).values('date').annotate(cnt=Sum('count')).order_by()
+            }
             paid_by_day = {}
             for o in oqs.filter(event=self.request.event, payment_date__isnull=False).values('payment_date'):
                 day = o['payment_date'].astimezone(tz).date()
@@ -93,22 +95,21 @@ class IndexView(EventPermissionRequiredMixin, ChartContainingView, TemplateView)
         # Orders by product
         ctx['obp_data'] = cache.get('statistics_obp_data' + ckey)
         if not ctx['obp_data']:
-            opqs = OrderPosition.objects
+            opqs = self.request.event.sales_statistics.filter(kind=SalesStatistic.KIND_POSITION)
             if subevent:
                 opqs = opqs.filter(subevent=subevent)
             num_ordered = {
                 p['item']: p['cnt']
                 for p in (opqs
-                          .filter(order__event=self.request.event)
                           .values('item')
-                          .annotate(cnt=Count('id')).order_by())
+                          .annotate(cnt=Sum('count')).order_by())
             }
             num_paid = {
                 p['item']: p['cnt']
                 for p in (opqs
-                          .filter(order__event=self.request.event, order__status=Order.STATUS_PAID)
+                          .filter(status=Order.STATUS_PAID)
                           .values('item')
-                          .annotate(cnt=Count('id')).order_by())
+                          .annotate(cnt=Sum('count')).order_by())
             }
             item_names = {
                 i.id: str(i)
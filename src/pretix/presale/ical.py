@@ -5,58 +5,134 @@ import pytz
 import vobject
 from django.conf import settings
 from django.utils.formats import date_format
-from django.utils.translation import ugettext as _
+from django.utils.translation import get_language, ugettext as _
 
 from pretix.base.models import Event
 from pretix.multidomain.urlreverse import build_absolute_uri
 
+# Serialized dates are cached in the cache of their event, which is cleared whenever the event or
+# one of its dates changes
+ICAL_CACHE_TIMEOUT = 3600
 
-def get_ical(events):
+
+def _new_calendar():
     cal = vobject.iCalendar()
     cal.add('prodid').value = '-//pretix//{}//'.format(settings.PRETIX_INSTANCE_NAME.replace(" ", "_"))
-    creation_time = datetime.datetime.now(pytz.utc)
+    return cal
 
-    for ev in events:
-        event = ev if isinstance(ev, Event) else ev.event
-        tz = pytz.timezone(event.settings.timezone)
-        if isinstance(ev, Event):
-            url = build_absolute_uri(event, 'presale:event.index')
-        else:
-            url = build_absolute_uri(event, 'presale:event.index', {
-                'subevent': ev.pk
-            })
-
-        vevent = cal.add('vevent')
-        vevent.add('summary').value = str(ev.name)
-        vevent.add('dtstamp').value = creation_time
-        if ev.location:
-            vevent.add('location').value = str(ev.location)
-        vevent.add('uid').value = 'pretix-{}-{}-{}@{}'.format(
-            event.organizer.slug, event.slug,
-            ev.pk if not isinstance(ev, Event) else '0',
-            urlparse(url).netloc
-        )
 
+def _add_vevent(cal, ev, creation_time):
+    event = ev if isinstance(ev, Event) else ev.event
+    tz = pytz.timezone(event.settings.timezone)
+    if isinstance(ev, Event):
+        url = build_absolute_uri(event, 'presale:event.index')
+    else:
+        url = build_absolute_uri(event, 'presale:event.index', {
+            'subevent': ev.pk
+        })
+
+    vevent = cal.add('vevent')
+    vevent.add('summary').value = str(ev.name)
+    vevent.add('dtstamp').value = creation_time
+    if ev.location:
+        vevent.add('location').value = str(ev.location)
+    vevent.add('uid').value = 'pretix-{}-{}-{}@{}'.format(
+        event.organizer.slug, event.slug,
+        ev.pk if not isinstance(ev, Event) else '0',
+        urlparse(url).netloc
+    )
+
+    if event.settings.show_times:
+        vevent.add('dtstart').value = ev.date_from.astimezone(tz)
+    else:
+        vevent.add('dtstart').value = ev.date_from.astimezone(tz).date()
+
+    if event.settings.show_date_to and ev.date_to:
         if event.settings.show_times:
-            vevent.add('dtstart').value = ev.date_from.astimezone(tz)
+            vevent.add('dtend').value = ev.date_to.astimezone(tz)
         else:
-            vevent.add('dtstart').value = ev.date_from.astimezone(tz).date()
+            vevent.add('dtend').value = ev.date_to.astimezone(tz).date()
 
-        if event.settings.show_date_to and ev.date_to:
-            if event.settings.show_times:
-                vevent.add('dtend').value = ev.date_to.astimezone(tz)
-            else:
-                vevent.add('dtend').value = ev.date_to.astimezone(tz).date()
+    descr = []
+    descr.append(_('Tickets: {url}').format(url=url))
+
+    if ev.date_admission:
+        descr.append(str(_('Admission: {datetime}')).format(
+            datetime=date_format(ev.date_admission.astimezone(tz), 'SHORT_DATETIME_FORMAT')
+        ))
 
-        descr = []
-        descr.append(_('Tickets: {url}').format(url=url))
+    descr.append(_('Organizer: {organizer}').format(organizer=event.organizer.name))
 
-        if ev.date_admission:
-            descr.append(str(_('Admission: {datetime}')).format(
-                datetime=date_format(ev.date_admission.astimezone(tz), 'SHORT_DATETIME_FORMAT')
-            ))
+    vevent.add('description').value = '\n'.join(descr)
 
-        descr.append(_('Organizer: {organizer}').format(organizer=event.organizer.name))
 
-        vevent.add('description').value = '\n'.join(descr)
+def get_ical(events):
+    cal = _new_calendar()
+    creation_time = datetime.datetime.now(pytz.utc)
+
+    for ev in events:
+        _add_vevent(cal, ev, creation_time)
     return cal
+
+
+def _split_components(data: str) -> list:
+    """
+    Splits a serialized calendar into its components, e.g. VTIMEZONE and VEVENT, and returns them
+    as a list of ``(name, serialized component)`` tuples.
+    """
+    components = []
+    lines = []
+    depth = 0
+    for line in data.split('\r\n'):
+        # Folded lines start with a whitespace, so this can not match inside of a property value
+        if line.startswith('BEGIN:'):
+            depth += 1
+        if depth >= 2:
+            lines.append(line)
+        if line.startswith('END:'):
+            depth -= 1
+            if depth == 1:
+                components.append((lines[0][6:], '\r\n'.join(lines) + '\r\n'))
+                lines = []
+    return components
+
+
+def get_ical_string(events) -> str:
+    """
+    Returns the same calendar as :py:func:`get_ical`, but already serialized. The calendar is assembled
+    from pre-serialized fragments of every single date, which are cached in the cache of the respective
+    event for the current language, so only new or changed dates need to be serialized again.
+    """
+    cache_key = 'ical_fragments:{}'.format(get_language())
+    creation_time = datetime.datetime.now(pytz.utc)
+    fragments_by_event = {}
+    changed = set()
+    timezones = {}
+    vevents = []
+
+    for ev in events:
+        event = ev if isinstance(ev, Event) else ev.event
+        if event.pk not in fragments_by_event:
+            fragments_by_event[event.pk] = (event, event.cache.get(cache_key) or {})
+        fragments = fragments_by_event[event.pk][1]
+
+        key = 0 if isinstance(ev, Event) else ev.pk
+        if key not in fragments:
+            cal = vobject.iCalendar()
+            _add_vevent(cal, ev, creation_time)
+            fragments[key] = _split_components(cal.serialize())
+            changed.add(event.pk)
+
+        for name, component in fragments[key]:
+            if name == 'VTIMEZONE':
+                tzid = next(line for line in component.split('\r\n') if line.startswith('TZID'))
+                timezones.setdefault(tzid, component)
+            else:
+                vevents.append(component)
+
+    for pk in changed:
+        event, fragments = fragments_by_event[pk]
+        event.cache.set(cache_key, fragments, ICAL_CACHE_TIMEOUT)
+
+    head = _new_calendar().serialize().rsplit('END:VCALENDAR', 1)[0]
+    return ''.join([head] + list(timezones.values()) + vevents + ['END:VCALENDAR\r\n'])
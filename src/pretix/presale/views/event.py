@@ -10,19 +10,23 @@ from django.core.exceptions import PermissionDenied
 from django.db.models import Count, Prefetch
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
 from django.utils.timezone import now
-from django.utils.translation import pgettext_lazy, ugettext_lazy as _
+from django.utils.translation import (
+    get_language, pgettext_lazy, ugettext_lazy as _,
+)
 from django.views import View
 from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import TemplateView
 
 from pretix.base.models import ItemVariation, Quota
 from pretix.base.models.event import SubEvent
+from pretix.helpers.http import make_etag
 from pretix.multidomain.urlreverse import eventreverse
-from pretix.presale.ical import get_ical
+from pretix.presale.ical import get_ical_string
 from pretix.presale.views.organizer import (
-    add_subevents_for_days, weeks_for_template,
+    CALENDAR_CACHE_TIMEOUT, add_subevents_for_days, weeks_for_template,
 )
 
 from . import (
@@ -274,13 +278,24 @@ class EventIndex(EventViewMixin, CartMixin, TemplateView):
             context['before'] = before
             context['after'] = after
 
-            ebd = defaultdict(list)
-            add_subevents_for_days(
-                self.request.event.subevents_annotated(self.request.sales_channel),
-                before, after, ebd, set(), self.request.event,
-                kwargs.get('cart_namespace')
+            def build():
+                ebd = defaultdict(list)
+                add_subevents_for_days(
+                    self.request.event.subevents_annotated(self.request.sales_channel),
+                    before, after, ebd, set(), self.request.event,
+                    kwargs.get('cart_namespace'),
+                    show_avail=self.request.event.settings.event_list_availability
+                )
+                return dict(ebd)
+
+            # The event's cache is cleared every time one of its dates, quotas or products changes
+            ebd = self.request.event.cache.get_or_set(
+                'calendar:{}-{}:{}:{}:{}'.format(
+                    self.year, self.month, get_language(), self.request.sales_channel,
+                    kwargs.get('cart_namespace') or ''
+                ),
+                build, CALENDAR_CACHE_TIMEOUT
             )
-
             context['weeks'] = weeks_for_template(ebd, self.year, self.month)
             context['months'] = [date(self.year, i + 1, 1) for i in range(12)]
             context['years'] = range(now().year - 2, now().year + 3)
@@ -320,12 +335,16 @@ class EventIcalDownload(EventViewMixin, View):
                 raise Http404(pgettext_lazy('subevent', 'Unknown date selected.'))
 
         event = self.request.event
-        cal = get_ical([subevent or event])
-
-        resp = HttpResponse(cal.serialize(), content_type='text/calendar')
-        resp['Content-Disposition'] = 'attachment; filename="{}-{}-{}.ics"'.format(
-            event.organizer.slug, event.slug, subevent.pk if subevent else '0',
-        )
+        cal = get_ical_string([subevent or event])
+        etag = make_etag(cal)
+
+        resp = get_conditional_response(request, etag=etag)
+        if resp is None:
+            resp = HttpResponse(cal, content_type='text/calendar')
+            resp['Content-Disposition'] = 'attachment; filename="{}-{}-{}.ics"'.format(
+                event.organizer.slug, event.slug, subevent.pk if subevent else '0',
+            )
+        resp['ETag'] = etag
         return resp
 
 
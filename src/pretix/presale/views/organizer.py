@@ -1,4 +1,5 @@
 import calendar
+import hashlib
 from collections import defaultdict
 from datetime import date, datetime, timedelta
 
@@ -7,22 +8,42 @@ from django.conf import settings
 from django.db.models import Exists, Max, Min, OuterRef, Q
 from django.db.models.functions import Coalesce, Greatest
 from django.http import Http404, HttpResponse
-from django.utils.decorators import method_decorator
+from django.utils.cache import get_conditional_response
 from django.utils.timezone import now
+from django.utils.translation import get_language
 from django.views import View
-from django.views.decorators.cache import cache_page
 from django.views.generic import ListView, TemplateView
 from pytz import UTC
 
+from pretix.base.cache import ObjectRelatedCache
 from pretix.base.i18n import language
 from pretix.base.models import (
-    Event, EventMetaValue, SubEvent, SubEventMetaValue,
+    Event, EventMetaValue, Quota, SubEvent, SubEventMetaValue,
 )
 from pretix.helpers.daterange import daterange
+from pretix.helpers.http import make_etag
 from pretix.multidomain.urlreverse import eventreverse
-from pretix.presale.ical import get_ical
+from pretix.presale.ical import ICAL_CACHE_TIMEOUT, get_ical_string
 from pretix.presale.views import OrganizerViewMixin
 
+# Calendars are cached for as long as quota availability may be cached, see Quota.cache_is_hot()
+CALENDAR_CACHE_TIMEOUT = 120
+
+
+def organizer_cache_key(request, *parts):
+    """
+    Returns a key for data in the organizer's cache that depends on all public events of the organizer,
+    the current language and the attribute filters of the request. The key changes as soon as the cache of
+    one of the events is cleared, which happens every time one of its dates, quotas or products changes.
+    """
+    events = request.organizer.events.filter(is_public=True, live=True).only('pk').order_by('pk')
+    attrs = sorted((k, v) for k, v in request.GET.items() if k.startswith('attr['))
+    return ':'.join([str(p) for p in parts] + [
+        get_language(),
+        hashlib.sha1(repr(attrs).encode()).hexdigest(),
+        ObjectRelatedCache.version_of(events),
+    ])
+
 
 def filter_qs_by_attr(qs, request):
     """
@@ -143,7 +164,79 @@ class OrganizerIndex(OrganizerViewMixin, ListView):
         return ctx
 
 
-def add_events_for_days(request, baseqs, before, after, ebd, timezones):
+def _calendar_settings(settings):
+    # Read all settings the calendar needs at once, so they are not looked up for every single date
+    return {
+        k: getattr(settings, k)
+        for k in ('timezone', 'show_times', 'show_date_to', 'waiting_list_enabled', 'presale_start_show_date')
+    }
+
+
+def calendar_entry_status(obj, conf, show_avail):
+    """
+    Returns the sales status of an event or event date as shown in the calendar, i.e. one of
+    ``on_sale``, ``waitinglist``, ``reserved``, ``soldout``, ``over``, ``from`` or ``soon``, or
+    ``None`` if nothing should be shown. ``conf`` is the result of ``_calendar_settings()``. Availability
+    information is only used if ``show_avail`` is set and requires the object to be fetched through
+    ``annotated()``.
+    """
+    if obj.presale_is_running and show_avail:
+        state = obj.best_availability_state
+        if state is None:
+            return None
+        if state == Quota.AVAILABILITY_OK:
+            return 'on_sale'
+        elif conf['waiting_list_enabled'] and state >= 0:
+            return 'waitinglist'
+        elif state == Quota.AVAILABILITY_RESERVED:
+            return 'reserved'
+        elif state < Quota.AVAILABILITY_RESERVED:
+            return 'soldout'
+        return None
+    elif obj.presale_is_running:
+        return 'on_sale'
+    elif obj.presale_has_ended:
+        return 'over'
+    elif conf['presale_start_show_date'] and obj.presale_start:
+        return 'from'
+    return 'soon'
+
+
+def _calendar_entries(obj, conf, url, before, after, show_avail):
+    """
+    Yields the days on which ``obj`` is shown in the calendar together with a dictionary holding
+    everything the calendar template needs to render it, so it can be cached without model instances.
+    """
+    tz = pytz.timezone(conf['timezone'])
+    datetime_from = obj.date_from.astimezone(tz)
+    date_from = datetime_from.date()
+    entry = {
+        'name': str(obj.name),
+        'url': url,
+        'timezone': conf['timezone'],
+        'status': calendar_entry_status(obj, conf, show_avail),
+        'presale_start': obj.presale_start,
+    }
+    if conf['show_date_to'] and obj.date_to:
+        date_to = obj.date_to.astimezone(tz).date()
+        d = max(date_from, before.date())
+        while d <= date_to and d <= after.date():
+            first = d == date_from
+            yield d, dict(
+                entry,
+                continued=not first,
+                time=datetime_from.time().replace(tzinfo=None) if first and conf['show_times'] else None,
+            )
+            d += timedelta(days=1)
+    else:
+        yield date_from, dict(
+            entry,
+            continued=False,
+            time=datetime_from.time().replace(tzinfo=None) if conf['show_times'] else None,
+        )
+
+
+def add_events_for_days(request, baseqs, before, after, ebd, timezones, show_avail=False):
     qs = baseqs.filter(is_public=True, live=True, has_subevents=False).filter(
         Q(Q(date_to__gte=before) & Q(date_from__lte=after)) |
         Q(Q(date_from__lte=after) & Q(date_to__gte=before)) |
@@ -156,35 +249,14 @@ def add_events_for_days(request, baseqs, before, after, ebd, timezones):
     if hasattr(request, 'organizer'):
         qs = filter_qs_by_attr(qs, request)
     for event in qs:
-        timezones.add(event.settings.timezones)
-        tz = pytz.timezone(event.settings.timezone)
-        datetime_from = event.date_from.astimezone(tz)
-        date_from = datetime_from.date()
-        if event.settings.show_date_to and event.date_to:
-            date_to = event.date_to.astimezone(tz).date()
-            d = max(date_from, before.date())
-            while d <= date_to and d <= after.date():
-                first = d == date_from
-                ebd[d].append({
-                    'event': event,
-                    'continued': not first,
-                    'time': datetime_from.time().replace(tzinfo=None) if first and event.settings.show_times else None,
-                    'url': eventreverse(event, 'presale:event.index'),
-                    'timezone': event.settings.timezone,
-                })
-                d += timedelta(days=1)
-
-        else:
-            ebd[date_from].append({
-                'event': event,
-                'continued': False,
-                'time': datetime_from.time().replace(tzinfo=None) if event.settings.show_times else None,
-                'url': eventreverse(event, 'presale:event.index'),
-                'timezone': event.settings.timezone,
-            })
+        conf = _calendar_settings(event.settings)
+        timezones.add(conf['timezone'])
+        url = eventreverse(event, 'presale:event.index')
+        for d, entry in _calendar_entries(event, conf, url, before, after, show_avail):
+            ebd[d].append(entry)
 
 
-def add_subevents_for_days(qs, before, after, ebd, timezones, event=None, cart_namespace=None):
+def add_subevents_for_days(qs, before, after, ebd, timezones, event=None, cart_namespace=None, show_avail=False):
     qs = qs.filter(active=True).filter(
         Q(Q(date_to__gte=before) & Q(date_from__lte=after)) |
         Q(Q(date_from__lte=after) & Q(date_to__gte=before)) |
@@ -192,38 +264,19 @@ def add_subevents_for_days(qs, before, after, ebd, timezones, event=None, cart_n
     ).order_by(
         'date_from'
     )
+    confs = {}
     for se in qs:
         kwargs = {'subevent': se.pk}
         if cart_namespace:
             kwargs['cart_namespace'] = cart_namespace
 
-        settings = event.settings if event else se.event.settings
-        timezones.add(settings.timezones)
-        tz = pytz.timezone(settings.timezone)
-        datetime_from = se.date_from.astimezone(tz)
-        date_from = datetime_from.date()
-        if se.event.settings.show_date_to and se.date_to:
-            date_to = se.date_to.astimezone(tz).date()
-            d = max(date_from, before.date())
-            while d <= date_to and d <= after.date():
-                first = d == date_from
-                ebd[d].append({
-                    'continued': not first,
-                    'timezone': settings.timezone,
-                    'time': datetime_from.time().replace(tzinfo=None) if first and settings.show_times else None,
-                    'event': se,
-                    'url': eventreverse(se.event, 'presale:event.index', kwargs=kwargs)
-                })
-                d += timedelta(days=1)
+        if se.event_id not in confs:
+            confs[se.event_id] = _calendar_settings(event.settings if event else se.event.settings)
+            timezones.add(confs[se.event_id]['timezone'])
 
-        else:
-            ebd[date_from].append({
-                'event': se,
-                'continued': False,
-                'time': datetime_from.time().replace(tzinfo=None) if se.event.settings.show_times else None,
-                'url': eventreverse(se.event, 'presale:event.index', kwargs=kwargs),
-                'timezone': se.event.settings.timezone,
-            })
+        url = eventreverse(event or se.event, 'presale:event.index', kwargs=kwargs)
+        for d, entry in _calendar_entries(se, confs[se.event_id], url, before, after, show_avail):
+            ebd[d].append(entry)
 
 
 def weeks_for_template(ebd, year, month):
@@ -312,57 +365,73 @@ class CalendarView(OrganizerViewMixin, TemplateView):
         return ctx
 
     def _events_by_day(self, before, after):
-        ebd = defaultdict(list)
-        timezones = set()
-        add_events_for_days(self.request, Event.annotated(self.request.organizer.events, 'web'), before, after, ebd, timezones)
-        add_subevents_for_days(filter_qs_by_attr(SubEvent.annotated(SubEvent.objects.filter(
-            event__organizer=self.request.organizer,
-            event__is_public=True,
-            event__live=True,
-        ).prefetch_related(
-            'event___settings_objects', 'event__organizer___settings_objects'
-        )), self.request), before, after, ebd, timezones)
-        self._multiple_timezones = len(timezones) > 1
+        def build():
+            ebd = defaultdict(list)
+            timezones = set()
+            show_avail = self.request.organizer.settings.event_list_availability
+            add_events_for_days(self.request, Event.annotated(self.request.organizer.events, 'web'), before, after,
+                                ebd, timezones, show_avail=show_avail)
+            add_subevents_for_days(filter_qs_by_attr(SubEvent.annotated(SubEvent.objects.filter(
+                event__organizer=self.request.organizer,
+                event__is_public=True,
+                event__live=True,
+            ).prefetch_related(
+                'event___settings_objects', 'event__organizer___settings_objects'
+            )), self.request), before, after, ebd, timezones, show_avail=show_avail)
+            return dict(ebd), len(timezones) > 1
+
+        key = organizer_cache_key(self.request, 'calendar', '{}-{}'.format(self.year, self.month))
+        ebd, self._multiple_timezones = self.request.organizer.cache.get_or_set(key, build, CALENDAR_CACHE_TIMEOUT)
         return ebd
 
 
-@method_decorator(cache_page(300), name='dispatch')
 class OrganizerIcalDownload(OrganizerViewMixin, View):
     def get(self, request, *args, **kwargs):
-        events = list(
-            filter_qs_by_attr(
-                self.request.organizer.events.filter(is_public=True, live=True, has_subevents=False),
-                request
-            ).order_by(
-                'date_from'
-            ).prefetch_related(
-                '_settings_objects', 'organizer___settings_objects'
-            )
-        )
-        events += list(
-            filter_qs_by_attr(
-                SubEvent.objects.filter(
-                    event__organizer=self.request.organizer,
-                    event__is_public=True,
-                    event__live=True,
-                    active=True
-                ),
-                request
-            ).prefetch_related(
-                'event___settings_objects', 'event__organizer___settings_objects'
-            ).order_by(
-                'date_from'
-            )
-        )
-
         if 'locale' in request.GET and request.GET.get('locale') in dict(settings.LANGUAGES):
             with language(request.GET.get('locale')):
-                cal = get_ical(events)
+                cal, etag = self._get_ical(request)
         else:
-            cal = get_ical(events)
+            cal, etag = self._get_ical(request)
 
-        resp = HttpResponse(cal.serialize(), content_type='text/calendar')
-        resp['Content-Disposition'] = 'attachment; filename="{}.ics"'.format(
-            request.organizer.slug
-        )
+        resp = get_conditional_response(request, etag=etag)
+        if resp is None:
+            resp = HttpResponse(cal, content_type='text/calendar')
+            resp['Content-Disposition'] = 'attachment; filename="{}.ics"'.format(
+                request.organizer.slug
+            )
+        resp['ETag'] = etag
         return resp
+
+    def _get_ical(self, request):
+        def build():
+            events = list(
+                filter_qs_by_attr(
+                    self.request.organizer.events.filter(is_public=True, live=True, has_subevents=False),
+                    request
+                ).order_by(
+                    'date_from'
+                ).prefetch_related(
+                    '_settings_objects', 'organizer___settings_objects'
+                )
+            )
+            events += list(
+                filter_qs_by_attr(
+                    SubEvent.objects.filter(
+                        event__organizer=self.request.organizer,
+                        event__is_public=True,
+                        event__live=True,
+                        active=True
+                    ),
+                    request
+                ).prefetch_related(
+                    'event___settings_objects', 'event__organizer___settings_objects'
+                ).order_by(
+                    'date_from'
+                )
+            )
+            cal = get_ical_string(events)
+            return cal, make_etag(cal)
+
+        return self.request.organizer.cache.get_or_set(
+            organizer_cache_key(request, 'ical'), build, ICAL_CACHE_TIMEOUT
+        )
@@ -1,16 +1,19 @@
 import hashlib
 import json
 import logging
+import time
 from urllib.parse import urljoin
 
 from django.conf import settings
 from django.contrib.staticfiles import finders
 from django.core.files.base import ContentFile
 from django.core.files.storage import default_storage
-from django.db.models import Q
+from django.db.models import Max, Q
 from django.http import FileResponse, Http404, HttpResponse, JsonResponse
 from django.template import Context, Engine
 from django.template.loader import get_template
+from django.utils import translation
+from django.utils.cache import get_conditional_response
 from django.utils.formats import date_format
 from django.utils.timezone import now
 from django.utils.translation import gettext
@@ -28,6 +31,7 @@ from pretix.base.models import CartPosition, Voucher
 from pretix.base.services.cart import error_messages
 from pretix.base.settings import GlobalSettingsObject
 from pretix.base.templatetags.rich_text import rich_text
+from pretix.helpers.http import event_generation, make_etag
 from pretix.helpers.thumb import get_thumbnail
 from pretix.multidomain.urlreverse import build_absolute_uri
 from pretix.presale.views.cart import get_or_create_cart_id
@@ -152,6 +156,7 @@ def get_picture(event, picture):
 
 
 class WidgetAPIProductList(View):
+    etag_max_age = 60
 
     def _get_items(self):
         items, display_add_to_cart = get_grouped_items(
@@ -220,7 +225,31 @@ class WidgetAPIProductList(View):
         else:
             return super().dispatch(request, *args, **kwargs)
 
+    def _get_etag(self, request):
+        generation = event_generation(request.event)
+        if not generation:
+            return None
+        # Changes to products, quotas, etc. clear the event cache and every order or cart modification changes
+        # one of the other values. Availability can also change without any write, e.g. when carts expire, so we
+        # additionally limit the validity of an ETag to the current minute.
+        return make_etag(
+            request.get_full_path(),
+            translation.get_language(),
+            get_or_create_cart_id(request, create=False) if 'voucher' in request.GET else None,
+            generation,
+            request.event.orders.aggregate(m=Max('last_modified'))['m'],
+            CartPosition.objects.filter(event=request.event).aggregate(m=Max('id'))['m'],
+            int(time.time() // self.etag_max_age),
+        )
+
     def get(self, request, **kwargs):
+        etag = self._get_etag(request)
+        if etag:
+            resp = get_conditional_response(request, etag=etag)
+            if resp is not None:
+                resp['Access-Control-Allow-Origin'] = '*'
+                return resp
+
         data = {
             'currency': request.event.currency,
             'display_net_prices': request.event.settings.display_net_prices,
@@ -293,4 +322,6 @@ class WidgetAPIProductList(View):
 
         resp = JsonResponse(data)
         resp['Access-Control-Allow-Origin'] = '*'
+        if etag:
+            resp['ETag'] = etag
         return resp
@@ -100,6 +100,8 @@ PRETIX_REGISTRATION = config.getboolean('pretix', 'registration', fallback=True)
 PRETIX_PASSWORD_RESET = config.getboolean('pretix', 'password_reset', fallback=True)
 PRETIX_LONG_SESSIONS = config.getboolean('pretix', 'long_sessions', fallback=True)
 PRETIX_ADMIN_AUDIT_COMMENTS = config.getboolean('pretix', 'audit_comments', fallback=False)
+PRETIX_LOG_ARCHIVE_DAYS = config.getint('pretix', 'log_archive_days', fallback=0)
+PRETIX_THUMBNAILS_WEBP = config.getboolean('pretix', 'thumbnails_webp', fallback=False)
 PRETIX_SESSION_TIMEOUT_RELATIVE = 3600 * 3
 PRETIX_SESSION_TIMEOUT_ABSOLUTE = 3600 * 12
 
@@ -209,6 +211,7 @@ if HAS_CELERY:
     CELERY_RESULT_BACKEND = config.get('celery', 'backend')
 else:
     CELERY_TASK_ALWAYS_EAGER = True
+PERIODIC_TASK_SHARDS = max(1, config.getint('celery', 'periodic_shards', fallback=1))
 
 SESSION_COOKIE_DOMAIN = config.get('pretix', 'cookie_domain', fallback=None)
 
@@ -576,6 +579,7 @@ CELERY_TASK_QUEUES = (
     Queue('mail', routing_key='mail.#'),
     Queue('background', routing_key='background.#'),
     Queue('notifications', routing_key='notifications.#'),
+    Queue('webhooks', routing_key='webhooks.#'),
 )
 CELERY_TASK_ROUTES = ([
     ('pretix.base.services.cart.*', {'queue': 'checkout'}),
@@ -585,8 +589,10 @@ CELERY_TASK_ROUTES = ([
     ('pretix.base.services.update_check.*', {'queue': 'background'}),
     ('pretix.base.services.quotas.*', {'queue': 'background'}),
     ('pretix.base.services.waitinglist.*', {'queue': 'background'}),
+    ('pretix.base.services.thumbnails.*', {'queue': 'background'}),
     ('pretix.base.services.notifications.*', {'queue': 'notifications'}),
     ('pretix.api.webhooks.*', {'queue': 'notifications'}),
+    ('pretix.base.services.webhooks.*', {'queue': 'webhooks'}),
     ('pretix.plugins.banktransfer.*', {'queue': 'background'}),
 ],)
 
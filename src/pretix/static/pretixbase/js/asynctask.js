@@ -34,7 +34,11 @@ function async_task_check_callback(data, jqXHR, status) {
     }
     async_task_timeout = window.setTimeout(async_task_check, 250);
 
-    if (async_task_is_long) {
+    if (typeof data.percentage === "number") {
+        $("#loadingmodal p.status").text(gettext(
+            'Your request is being processed. Current progress: {percentage} %'
+        ).replace(/\{percentage\}/, Math.round(data.percentage)));
+    } else if (async_task_is_long) {
         $("#loadingmodal p.status").text(gettext(
             'Your request has been queued on the server and will now be ' +
             'processed. Depending on the size of your event, this might take up to a ' +
@@ -6,6 +6,7 @@ from unittest import mock
 
 import pytest
 from django.core import mail as djmail
+from django.test import override_settings
 from django.utils.timezone import now
 from django_countries.fields import Country
 from pytz import UTC
@@ -214,6 +215,82 @@ TEST_ORDER_RES = {
 }
 
 
+@pytest.mark.django_db
+def test_order_list_cursor(token_client, organizer, event):
+    dt = datetime.datetime(2017, 12, 1, 10, 0, 0, tzinfo=UTC)
+    for i in range(5):
+        Order.objects.create(
+            code='FOO{}'.format(i), event=event, email='dummy@dummy.test',
+            status=Order.STATUS_PENDING, datetime=dt + datetime.timedelta(hours=i // 2),
+            expires=dt + datetime.timedelta(days=10), total=23, locale='en'
+        )
+
+    with mock.patch('pretix.api.pagination.CursorOrPageNumberPagination.page_size', 2):
+        codes = []
+        url = '/api/v1/organizers/{}/events/{}/orders/?cursor='.format(organizer.slug, event.slug)
+        while url:
+            resp = token_client.get(url)
+            assert resp.status_code == 200
+            assert 'count' not in resp.data
+            codes += [o['code'] for o in resp.data['results']]
+            url = resp.data['next']
+            if len(codes) == 2:
+                Order.objects.create(
+                    code='BAR', event=event, email='dummy@dummy.test', status=Order.STATUS_PENDING,
+                    datetime=dt - datetime.timedelta(hours=1),
+                    expires=dt + datetime.timedelta(days=10), total=23, locale='en'
+                )
+        assert codes == ['FOO0', 'FOO1', 'FOO2', 'FOO3', 'FOO4']
+
+        resp = token_client.get('/api/v1/organizers/{}/events/{}/orders/?cursor=&ordering=-datetime'.format(
+            organizer.slug, event.slug))
+        assert [o['code'] for o in resp.data['results']] == ['FOO4', 'FOO3']
+
+    resp = token_client.get('/api/v1/organizers/{}/events/{}/orders/?cursor=foo'.format(organizer.slug, event.slug))
+    assert resp.status_code == 404
+
+
+@pytest.mark.django_db
+def test_order_list_conditional(token_client, organizer, event, order):
+    with override_settings(REAL_CACHE_USED=True, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }}):
+        url = '/api/v1/organizers/{}/events/{}/orders/'.format(organizer.slug, event.slug)
+        resp = token_client.get(url)
+        assert resp.status_code == 200
+        etag = resp['ETag']
+        assert resp['Last-Modified']
+
+        resp = token_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 304
+        resp = token_client.get(url + '?status=p', HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 200
+
+        order.email = 'foo@example.org'
+        order.save()
+        resp = token_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert resp.status_code == 200
+
+
+@pytest.mark.django_db
+def test_order_stream(token_client, organizer, event, order, item, taxrule, question):
+    res = dict(TEST_ORDER_RES)
+    res["positions"][0]["id"] = order.positions.first().pk
+    res["positions"][0]["item"] = item.pk
+    res["positions"][0]["answers"][0]["question"] = question.pk
+    res["last_modified"] = order.last_modified.isoformat().replace('+00:00', 'Z')
+    res["fees"][0]["tax_rule"] = taxrule.pk
+
+    resp = token_client.get('/api/v1/organizers/{}/events/{}/orders/stream/'.format(organizer.slug, event.slug))
+    assert resp.status_code == 200
+    assert resp['Content-Type'] == 'application/x-ndjson'
+    lines = b''.join(resp.streaming_content).decode().splitlines()
+    assert [json.loads(line) for line in lines] == [json.loads(json.dumps(res))]
+
+    resp = token_client.get('/api/v1/organizers/{}/events/{}/orders/stream/?status=p'.format(organizer.slug, event.slug))
+    assert b''.join(resp.streaming_content) == b''
+
+
 @pytest.mark.django_db
 def test_order_list(token_client, organizer, event, order, item, taxrule, question):
     res = dict(TEST_ORDER_RES)
@@ -1,5 +1,6 @@
 import copy
 import datetime
+import json
 from decimal import Decimal
 
 import pytest
@@ -1010,3 +1011,137 @@ def test_create_multiple_vouchers_duplicate_code(token_client, organizer, event,
     assert resp.status_code == 400
     assert resp.data == [{}, {'code': ['Duplicate voucher code in request.']}]
     assert Voucher.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_multiple_vouchers_generate_codes(token_client, organizer, event, item):
+    resp = token_client.post(
+        '/api/v1/organizers/{}/events/{}/vouchers/batch_create/'.format(organizer.slug, event.slug),
+        data=[
+            {
+                'max_usages': 1,
+                'price_mode': 'set',
+                'value': '12.00',
+                'item': item.pk,
+            }
+            for i in range(3)
+        ] + [
+            {
+                'code': 'abcdefghi',
+                'max_usages': 1,
+                'price_mode': 'set',
+                'value': '12.00',
+                'item': item.pk,
+            }
+        ], format='json'
+    )
+    assert resp.status_code == 201
+    assert Voucher.objects.count() == 4
+    assert len(set(v['code'] for v in resp.data)) == 4
+    assert resp.data[3]['code'] == 'ABCDEFGHI'
+    assert all(v['id'] for v in resp.data)
+    assert event.logentry_set.filter(action_type='pretix.voucher.added').count() == 4
+
+
+def _batch_import_results(resp):
+    return [json.loads(line) for line in b''.join(resp.streaming_content).decode().splitlines()]
+
+
+@pytest.mark.django_db
+def test_batch_import_json(token_client, organizer, event, item, quota):
+    quota.size = 3
+    quota.save()
+    resp = token_client.post(
+        '/api/v1/organizers/{}/events/{}/vouchers/batch_import/'.format(organizer.slug, event.slug),
+        data=[
+            {'code': 'ABCDEFGHI', 'item': item.pk, 'block_quota': True, 'max_usages': 2},
+            {'code': 'J', 'item': item.pk},
+            {'code': 'abcdefghi', 'item': item.pk},
+            {'item': item.pk, 'block_quota': True, 'max_usages': 2},
+            {'item': item.pk, 'block_quota': True},
+        ], format='json'
+    )
+    assert resp.status_code == 200
+    res = _batch_import_results(resp)
+    assert [r['row'] for r in res] == [0, 1, 2, 3, 4]
+    assert res[0]['code'] == 'ABCDEFGHI'
+    assert res[1]['errors'] == {'code': ['Ensure this field has at least 5 characters.']}
+    assert res[2]['errors'] == {'code': ['Duplicate voucher code in request.']}
+    assert 'sold out' in res[3]['errors']['non_field_errors'][0]
+    assert res[4]['id']
+    assert Voucher.objects.count() == 2
+    assert event.logentry_set.filter(action_type='pretix.voucher.added').count() == 2
+
+
+@pytest.mark.django_db
+def test_batch_import_csv(token_client, organizer, event, item, quota):
+    event.vouchers.create(item=item, code='EXISTING')
+    resp = token_client.post(
+        '/api/v1/organizers/{}/events/{}/vouchers/batch_import/'.format(organizer.slug, event.slug),
+        data='code,item,max_usages,tag\nFOOBAR,{item},3,\nexisting,{item},1,Foo\n,{item},1,Bar\n'.format(item=item.pk),
+        content_type='text/csv'
+    )
+    assert resp.status_code == 200
+    res = _batch_import_results(resp)
+    assert res[0]['code'] == 'FOOBAR'
+    assert res[1]['errors'] == {'code': ['A voucher with this code already exists.']}
+    assert 'errors' not in res[2]
+    v = Voucher.objects.get(pk=res[2]['id'])
+    assert v.tag == 'Bar'
+    assert Voucher.objects.get(code='FOOBAR').max_usages == 3
+
+
+@pytest.mark.django_db
+def test_batch_import_structural_checks(token_client, organizer, event, item, quota, subevent):
+    item2 = event.items.create(name="Shirt", default_price=12)
+    item2.variations.create(value="XL")
+    resp = token_client.post(
+        '/api/v1/organizers/{}/events/{}/vouchers/batch_import/'.format(organizer.slug, event.slug),
+        data=[
+            {'item': item.pk, 'block_quota': True},
+            {'item': item2.pk, 'block_quota': True, 'subevent': subevent.pk},
+            {'block_quota': True, 'subevent': subevent.pk},
+            {'item': item.pk},
+        ], format='json'
+    )
+    res = _batch_import_results(resp)
+    assert 'specific date' in res[0]['errors']['non_field_errors'][0]
+    assert 'specific product variation' in res[1]['errors']['non_field_errors'][0]
+    assert 'either a quota or a product' in res[2]['errors']['non_field_errors'][0]
+    assert res[3]['id']
+    assert Voucher.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_batch_import_chunks(token_client, organizer, event, item, monkeypatch):
+    monkeypatch.setattr('pretix.api.views.voucher.BATCH_IMPORT_CHUNK_SIZE', 2)
+    resp = token_client.post(
+        '/api/v1/organizers/{}/events/{}/vouchers/batch_import/'.format(organizer.slug, event.slug),
+        data=''.join(
+            json.dumps({'code': c, 'item': item.pk}) + '\n' for c in ('FOOBAR', 'BARBAZ', 'foobar', 'BAZFOO', 'QUUX')
+        ),
+        content_type='application/x-ndjson'
+    )
+    res = _batch_import_results(resp)
+    assert [r['row'] for r in res] == [0, 1, 2, 3, 4]
+    assert res[2]['errors'] == {'code': ['A voucher with this code already exists.']}
+    assert res[3]['code'] == 'BAZFOO'
+    assert res[4]['errors'] == {'code': ['Ensure this field has at least 5 characters.']}
+    assert Voucher.objects.count() == 3
+
+
+@pytest.mark.django_db
+def test_batch_import_integrity_error(token_client, organizer, event, item, monkeypatch):
+    event.vouchers.create(item=item, code='EXISTING')
+    monkeypatch.setattr('pretix.api.views.voucher.VoucherViewSet._batch_existing_codes', lambda self, codes: set())
+    resp = token_client.post(
+        '/api/v1/organizers/{}/events/{}/vouchers/batch_import/'.format(organizer.slug, event.slug),
+        data=[
+            {'code': 'FOOBAR', 'item': item.pk},
+            {'code': 'EXISTING', 'item': item.pk},
+        ], format='json'
+    )
+    res = _batch_import_results(resp)
+    assert res[0]['code'] == 'FOOBAR'
+    assert res[1]['errors'] == {'code': ['A voucher with this code already exists.']}
+    assert Voucher.objects.count() == 2
@@ -4,6 +4,7 @@ from django.core.cache import cache as django_cache
 from django.test import TestCase, override_settings
 from django.utils.timezone import now
 
+from pretix.base.cache import ObjectRelatedCache
 from pretix.base.models import Event, Organizer
 
 
@@ -53,3 +54,10 @@ class CacheTest(TestCase):
         }
         self.cache.set_many(inp)
         self.assertEqual(inp, self.cache.get_many(inp.keys()))
+
+    def test_version_of(self):
+        version = ObjectRelatedCache.version_of([self.event])
+        self.assertEqual(version, ObjectRelatedCache.version_of([self.event]))
+        self.cache.clear()
+        self.assertNotEqual(version, ObjectRelatedCache.version_of([self.event]))
+        self.assertNotEqual(ObjectRelatedCache.version_of([self.event]), ObjectRelatedCache.version_of([]))
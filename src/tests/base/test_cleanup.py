@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils.timezone import now
+
+from pretix.base.models import (
+    CachedCombinedTicket, CachedFile, CachedTicket, Order,
+)
+from pretix.base.services import cleanup
+
+
+@pytest.mark.django_db
+def test_clean_cached_files():
+    expired = CachedFile.objects.create(expires=now() - timedelta(hours=1), filename='a.txt', type='text/plain')
+    expired.file.save('a.txt', ContentFile(b'foo'))
+    name = expired.file.name
+    valid = CachedFile.objects.create(expires=now() + timedelta(hours=1), filename='b.txt', type='text/plain')
+    assert default_storage.exists(name)
+
+    cleanup.clean_cached_files(None)
+
+    assert not CachedFile.objects.filter(pk=expired.pk).exists()
+    assert CachedFile.objects.filter(pk=valid.pk).exists()
+    assert not default_storage.exists(name)
+
+
+@pytest.mark.django_db
+def test_delete_in_chunks_time_budget(monkeypatch):
+    monkeypatch.setattr(cleanup, 'CHUNK_SIZE', 2)
+    for i in range(5):
+        CachedFile.objects.create(expires=now() - timedelta(hours=1), filename='a.txt', type='text/plain')
+
+    qs = CachedFile.objects.filter(expires__lt=now())
+    assert not cleanup.delete_in_chunks('test', qs, file_fields=('file',), deadline=1)
+    assert qs.count() == 3
+    assert cleanup.delete_in_chunks('test', qs, file_fields=('file',))
+    assert qs.count() == 0
+
+
+@pytest.mark.parametrize('model', [CachedFile, CachedTicket, CachedCombinedTicket])
+def test_file_models_not_referenced(model):
+    # delete_in_chunks deletes these without model signals and therefore without cascades
+    assert not model._meta.related_objects
+
+
+@pytest.mark.django_db
+def test_delete_in_chunks_refuses_referenced_models():
+    with pytest.raises(ValueError):
+        cleanup.delete_in_chunks('test', Order.objects.all(), file_fields=('code',))
+
+
+@pytest.mark.django_db
+def test_run_jobs_shares_time_budget(monkeypatch):
+    monkeypatch.setattr(cleanup, 'CHUNK_SIZE', 1)
+    monkeypatch.setattr(cleanup, 'TIME_BUDGET', 0)
+    for i in range(3):
+        CachedFile.objects.create(expires=now() - timedelta(hours=1), filename='a.txt', type='text/plain')
+        CachedFile.objects.create(filename='b.txt', type='text/plain', date=now() - timedelta(hours=1))
+
+    first = CachedFile.objects.filter(expires__isnull=False)
+    second = CachedFile.objects.filter(expires__isnull=True)
+    cleanup._run_jobs([('first', first), ('second', second)], file_fields=('file',))
+    assert first.count() == 2
+    assert second.count() == 2
@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+import pytest
+from django.utils.timezone import now
+
+from pretix.base.models import IncomingWebhook
+from pretix.base.services import webhooks
+from pretix.base.services.webhooks import (
+    process_stale_webhooks, process_webhooks, receive_webhook,
+    webhook_processor,
+)
+
+
+@pytest.fixture
+def processed(monkeypatch):
+    monkeypatch.setattr(webhooks, '_processors', {})
+    calls = []
+
+    @webhook_processor('dummy')
+    def process(wh):
+        calls.append(wh.data['id'])
+        if wh.data.get('fail'):
+            raise ValueError()
+
+    return calls
+
+
+@pytest.mark.django_db
+def test_deduplicate(processed):
+    assert receive_webhook('dummy', {'id': 'a'}, external_id='a', reference='ch_1')
+    assert receive_webhook('dummy', {'id': 'a'}, external_id='a', reference='ch_1') is None
+    assert receive_webhook('dummy', {'id': 'b'}) is not None
+    assert receive_webhook('dummy', {'id': 'b'}) is None
+    assert processed == ['a', 'b']
+    assert IncomingWebhook.objects.filter(state=IncomingWebhook.STATE_DONE).count() == 2
+
+
+@pytest.mark.django_db
+def test_failure_blocks_later_notifications(processed, monkeypatch):
+    monkeypatch.setattr(process_webhooks, 'apply_async', lambda *args, **kwargs: None)
+    receive_webhook('dummy', {'id': 'a', 'fail': True}, ordering_key='order-1')
+    receive_webhook('dummy', {'id': 'b'}, ordering_key='order-1')
+    receive_webhook('dummy', {'id': 'c'}, ordering_key='order-2')
+
+    process_webhooks('order-1')
+    process_webhooks('order-2')
+    assert processed == ['a', 'c']
+    assert IncomingWebhook.objects.get(state=IncomingWebhook.STATE_PENDING, attempts=0).data['id'] == 'b'
+
+    monkeypatch.setattr(webhooks, 'MAX_ATTEMPTS', 2)
+    IncomingWebhook.objects.update(next_attempt=now())
+    process_webhooks('order-1')
+    assert processed == ['a', 'c', 'a', 'b']
+    assert list(IncomingWebhook.objects.values_list('state', flat=True)) == [
+        IncomingWebhook.STATE_FAILED, IncomingWebhook.STATE_DONE, IncomingWebhook.STATE_DONE
+    ]
+
+
+@pytest.mark.django_db
+def test_backoff(processed, monkeypatch):
+    scheduled = []
+    monkeypatch.setattr(process_webhooks, 'apply_async', lambda args, **kwargs: scheduled.append(args[0]))
+    receive_webhook('dummy', {'id': 'a', 'fail': True}, ordering_key='order-1')
+    process_webhooks('order-1')
+    wh = IncomingWebhook.objects.get()
+    assert wh.next_attempt > now() + timedelta(seconds=30)
+    assert scheduled == ['order-1', 'order-1']
+
+    # A new notification for the same order neither triggers an early retry nor gets processed before
+    receive_webhook('dummy', {'id': 'b'}, ordering_key='order-1')
+    assert scheduled == ['order-1', 'order-1']
+    process_webhooks('order-1')
+    assert processed == ['a']
+
+    # The stale sweep leaves waiting notifications alone until their retry is overdue
+    IncomingWebhook.objects.update(received=now() - timedelta(hours=1))
+    process_stale_webhooks(None)
+    assert scheduled == ['order-1', 'order-1']
+    IncomingWebhook.objects.update(next_attempt=now() - timedelta(hours=1))
+    process_stale_webhooks(None)
+    assert scheduled == ['order-1', 'order-1', 'order-1']
@@ -1,6 +1,7 @@
 import json
 from datetime import date, timedelta
 from decimal import Decimal
+from zipfile import ZipFile
 
 import pytest
 from django.core.serializers.json import DjangoJSONEncoder
@@ -8,11 +9,14 @@ from django.db import DatabaseError, transaction
 from django.utils.timezone import now
 from django_countries.fields import Country
 
+from pretix.base.exporters import invoices as invoices_exporter
+from pretix.base.exporters.invoices import InvoiceExporter
 from pretix.base.models import (
-    Event, Invoice, InvoiceAddress, Item, ItemVariation, Order, OrderPosition,
-    Organizer,
+    CachedFile, Event, Invoice, InvoiceAddress, Item, ItemVariation, Order,
+    OrderPosition, Organizer,
 )
 from pretix.base.models.orders import OrderFee
+from pretix.base.services.export import export
 from pretix.base.services.invoices import (
     build_preview_invoice_pdf, generate_cancellation, generate_invoice,
     invoice_pdf_task, regenerate_invoice,
@@ -254,6 +258,62 @@ def test_pdf_generation(env):
     assert invoice_pdf_task(cancellation.pk)
 
 
+@pytest.fixture
+def monkeypatch_on_commit(monkeypatch):
+    monkeypatch.setattr("django.db.transaction.on_commit", lambda t: t())
+
+
+@pytest.mark.django_db
+def test_export_renders_missing_files(env, monkeypatch_on_commit):
+    event, order = env
+    inv = generate_invoice(order)
+    cancellation = generate_cancellation(inv)
+    Invoice.objects.update(file=None)
+
+    fname, ftype, f = InvoiceExporter(event).render({})
+    assert fname == 'dummy_invoices.zip'
+    with f:
+        assert sorted(ZipFile(f).namelist()) == sorted(['{}.pdf'.format(inv.number),
+                                                        '{}.pdf'.format(cancellation.number)])
+    assert not Invoice.objects.filter(file='').exists()
+
+
+@pytest.mark.django_db
+def test_export_renders_inline_when_workers_are_busy(env, monkeypatch):
+    event, order = env
+    invoices = [generate_invoice(order)]
+    invoices.append(generate_cancellation(invoices[0]))
+    invoices.append(generate_invoice(order))
+    Invoice.objects.update(file=None)
+
+    queued = []
+    monkeypatch.setattr(invoices_exporter, 'PDF_WAIT_TIMEOUT', 0)
+    monkeypatch.setattr(invoices_exporter, 'PDF_QUEUE_AHEAD', 2)
+    monkeypatch.setattr(invoices_exporter.invoice_pdf_task, 'apply_async', lambda args: queued.append(args[0]))
+
+    fname, ftype, f = InvoiceExporter(event).render({})
+    with f:
+        assert len(ZipFile(f).namelist()) == 3
+    # After the first timeout, nothing is queued any more that we render ourselves
+    assert queued == [invoices[0].pk, invoices[1].pk]
+    assert not Invoice.objects.filter(file='').exists()
+
+
+@pytest.mark.django_db
+def test_export_task_with_reports_plugin(env, monkeypatch_on_commit):
+    event, order = env
+    event.plugins += ',pretix.plugins.reports'
+    event.save()
+    inv = generate_invoice(order)
+    file = CachedFile.objects.create(filename='export', type='application/octet-stream')
+
+    export.apply(args=(event.pk, str(file.id), 'invoices', {}))
+    file.refresh_from_db()
+    assert file.filename == 'dummy_invoices.zip'
+    with file.file.open('rb') as f:
+        assert ZipFile(f).namelist() == ['{}.pdf'.format(inv.number)]
+
+
 @pytest.mark.django_db
 def test_pdf_generation_custom_text(env):
     event, order = env
@@ -29,6 +29,17 @@ def test_locking_exclusive(event):
                 pass
 
 
+@pytest.mark.django_db
+def test_locking_nested(event):
+    with event.lock():
+        with event.lock():
+            pass
+        with pytest.raises(LockTimeoutException):
+            ev = Event.objects.get(id=event.id)
+            with ev.lock():
+                pass
+
+
 @pytest.mark.django_db
 def test_locking_different_events(event):
     other = Event.objects.create(
@@ -0,0 +1,108 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.contenttypes.models import ContentType
+from django.utils.timezone import now
+
+from pretix.base.models import (
+    Event, LogEntry, LogEntryArchive, Organizer, Quota,
+)
+from pretix.base.models.log import ArchivedLogEntryList
+from pretix.base.services.logarchive import (
+    archive_logentries, restore_archived_logentries,
+)
+
+
+@pytest.fixture
+def event():
+    o = Organizer.objects.create(name='Dummy', slug='dummy')
+    return Event.objects.create(
+        organizer=o, name='Dummy', slug='dummy',
+        date_from=now(),
+    )
+
+
+def _log(obj, action, days_ago):
+    le = obj.log_action(action, data={'days': days_ago})
+    LogEntry.objects.filter(pk=le.pk).update(datetime=now() - timedelta(days=days_ago))
+    return le
+
+
+@pytest.mark.django_db
+def test_archive_and_read_through(event):
+    quota = Quota.objects.create(event=event, name='Quota', size=2)
+    for i in range(4):
+        _log(quota, 'pretix.event.quota.changed', days_ago=400 + i)
+    new = _log(quota, 'pretix.event.quota.changed', days_ago=1)
+    _log(event, 'pretix.event.settings', days_ago=500)
+
+    assert archive_logentries(now() - timedelta(days=365))
+    assert LogEntry.objects.count() == 1
+    assert LogEntryArchive.objects.filter(event=event).count() == 2
+    assert LogEntryArchive.objects.get(
+        content_type=ContentType.objects.get_for_model(Quota), object_id=quota.pk
+    ).count == 4
+
+    logs = quota.all_logentries_with_archive()
+    assert logs.count() == 5
+    assert logs[0].pk == new.pk
+    assert [le.parsed_data['days'] for le in logs] == [1, 400, 401, 402, 403]
+    assert [le.parsed_data['days'] for le in logs[2:4]] == [401, 402]
+    assert logs[4].event == event
+
+
+@pytest.mark.django_db
+def test_restore(event):
+    le = _log(event, 'pretix.event.settings', days_ago=500)
+    archive_logentries(now() - timedelta(days=365))
+    assert not LogEntry.objects.exists()
+
+    restore_archived_logentries(event)
+    assert not LogEntryArchive.objects.exists()
+    restored = LogEntry.objects.get()
+    assert restored.pk == le.pk
+    assert restored.parsed_data == {'days': 500}
+
+
+@pytest.mark.django_db
+def test_deleted_with_event(event):
+    _log(event, 'pretix.event.settings', days_ago=500)
+    archive_logentries(now() - timedelta(days=365))
+    assert LogEntryArchive.objects.exists()
+
+    event.delete()
+    assert not LogEntryArchive.objects.exists()
+
+
+@pytest.mark.django_db
+def test_last_activity(event, monkeypatch):
+    monkeypatch.setattr("django.db.transaction.on_commit", lambda t: t())
+    before = now()
+    event.log_action('pretix.event.settings', data={})
+    event.refresh_from_db()
+    assert before <= event.last_activity <= now()
+
+
+@pytest.mark.django_db
+def test_filter_and_paginate_without_unpacking(event, monkeypatch):
+    for i in range(3):
+        _log(event, 'pretix.event.settings', days_ago=600 + i)
+    for i in range(3):
+        _log(event, 'pretix.event.changed', days_ago=500 + i)
+    archive_logentries(now() - timedelta(days=365))
+    assert LogEntryArchive.objects.filter(event=event).count() == 2
+
+    unpacked = []
+    get_logentries = LogEntryArchive.get_logentries
+    monkeypatch.setattr(LogEntryArchive, 'get_logentries', lambda a: unpacked.append(a.action_type) or get_logentries(a))
+
+    logs = ArchivedLogEntryList(LogEntry.objects.none(), event.archived_logentries.all())
+    assert logs.count() == 6
+    assert not unpacked
+    assert [le.parsed_data['days'] for le in logs[1:3]] == [501, 502]
+    assert unpacked == ['pretix.event.changed']
+
+    logs = ArchivedLogEntryList(LogEntry.objects.none(),
+                                event.archived_logentries.filter(action_type='pretix.event.settings'))
+    assert logs.count() == 3
+    assert [le.parsed_data['days'] for le in logs] == [600, 601, 602]
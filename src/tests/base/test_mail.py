@@ -1,4 +1,5 @@
 import os
+import re
 
 import pytest
 from django.conf import settings
@@ -6,6 +7,7 @@ from django.core import mail as djmail
 from django.utils.timezone import now
 from django.utils.translation import ugettext_lazy as _
 
+from pretix.base.email import ClassicMailRenderer
 from pretix.base.models import Event, Organizer, User
 from pretix.base.services.mail import mail
 
@@ -100,3 +102,22 @@ def test_sendmail_placeholder(env):
     assert len(djmail.outbox) == 1
     assert djmail.outbox[0].to == [user.email]
     assert djmail.outbox[0].subject == 'Dummy Test subject'
+
+
+@pytest.mark.django_db
+def test_precompiled_wrapper(env):
+    event, user, organizer = env
+    event.settings.set('primary_color', '#123456')
+    renderer = ClassicMailRenderer(event)
+    html = renderer.render('Hello\n\n[Click here](https://example.org)', 'Signature', 'Hello <you>', None)
+    assert '<!--pretix-mail' not in html
+    # The stylesheet has been inlined, only the conditional one for Outlook is left
+    assert 'table.layout >' not in html
+    assert 'Hello &lt;you&gt;' in html
+    assert 'Signature' in html
+    assert re.search(r'<a [^>]*href="https://example.org"[^>]*style="color: #123456', html)
+
+    renderer.precompile_wrapper = False
+    assert html.count('style=') == renderer.render(
+        'Hello\n\n[Click here](https://example.org)', 'Signature', 'Hello <you>', None
+    ).count('style=')
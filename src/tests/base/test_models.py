@@ -2,6 +2,7 @@ import datetime
 import sys
 from datetime import date, timedelta
 from decimal import Decimal
+from unittest import mock
 
 import pytest
 import pytz
@@ -21,6 +22,7 @@ from pretix.base.models import (
 )
 from pretix.base.models.event import SubEvent
 from pretix.base.models.items import SubEventItem, SubEventItemVariation
+from pretix.base.models.vouchers import generate_codes
 from pretix.base.reldate import RelativeDate, RelativeDateWrapper
 from pretix.base.services.orders import OrderError, cancel_order, perform_order
 
@@ -579,6 +581,18 @@ class VoucherTestCase(BaseQuotaTestCase):
         v = Voucher.objects.create(event=self.event, price_mode='percent', value=Decimal('23.00'))
         assert v.calculate_price(Decimal('100.00')) == Decimal('77.00')
 
+    def test_generate_codes(self):
+        codes = generate_codes(1200, prefix='abc')
+        assert len(codes) == 1200
+        assert len(set(codes)) == 1200
+        assert all(c.startswith('ABC') for c in codes)
+
+    def test_generate_codes_skips_existing(self):
+        Voucher.objects.create(event=self.event, code='FOOBAR')
+        with mock.patch('pretix.base.models.vouchers._generate_random_code') as grc:
+            grc.side_effect = ['FOOBAR', 'FOOBAZ']
+            assert generate_codes(1) == ['FOOBAZ']
+
 
 class OrderTestCase(BaseQuotaTestCase):
     def setUp(self):
@@ -1184,6 +1198,8 @@ class EventTest(TestCase):
         q1.variations.add(v1)
         que1 = event1.questions.create(question="Age", type="N")
         que1.items.add(i1)
+        que2 = event1.questions.create(question="Size", type="C")
+        que2.options.create(answer="XL")
         event1.settings.foo_setting = 23
         event1.settings.tax_rate_default = tr7
         cl1 = event1.checkin_lists.create(name="All", all_products=False)
@@ -1212,9 +1228,11 @@ class EventTest(TestCase):
         q1new = event2.quotas.first()
         assert q1new.size == q1.size
         assert q1new.items.get(pk=i1new.pk)
-        que1new = event2.questions.first()
+        assert q1new.variations.get() == i1new.variations.get()
+        que1new = event2.questions.get(type="N")
         assert que1new.type == que1.type
         assert que1new.items.get(pk=i1new.pk)
+        assert str(event2.questions.get(type="C").options.get().answer) == "XL"
         assert event2.settings.foo_setting == '23'
         assert event2.settings.tax_rate_default == trnew
         assert event2.checkin_lists.count() == 1
@@ -9,6 +9,10 @@ from django.utils.timezone import now
 from pretix.base.models import (
     Event, Item, Order, OrderPosition, Organizer, User,
 )
+from pretix.base.models.log import buffered_logging
+from pretix.base.services.notifications import (
+    deliver_notifications, send_notification_mail, send_queued_notifications,
+)
 
 
 @pytest.fixture
@@ -64,6 +68,7 @@ def test_notification_trigger_event_specific(event, order, user, monkeypatch_on_
     )
     with transaction.atomic():
         order.log_action('pretix.event.order.paid', {})
+    send_queued_notifications(None)
     assert len(djmail.outbox) == 1
 
 
@@ -75,7 +80,82 @@ def test_notification_trigger_global(event, order, user, monkeypatch_on_commit):
     )
     with transaction.atomic():
         order.log_action('pretix.event.order.paid', {})
+    send_queued_notifications(None)
+    assert len(djmail.outbox) == 1
+
+
+@pytest.mark.django_db
+def test_notification_trigger_buffered(event, order, user, monkeypatch_on_commit):
+    djmail.outbox = []
+    user.notification_settings.create(
+        method='mail', event=None, action_type='pretix.event.order.paid', enabled=True
+    )
+    with transaction.atomic():
+        with buffered_logging():
+            order.log_action('pretix.event.order.paid', {})
+            order.log_action('pretix.event.order.paid', {})
+            order.log_action('pretix.event.order.comment', {})
+            assert not order.all_logentries().exists()
+            assert len(djmail.outbox) == 0
+        assert order.all_logentries().count() == 3
+    send_queued_notifications(None)
+    assert len(djmail.outbox) == 1
+    assert djmail.outbox[0].subject.endswith('2 new notifications')
+
+
+@pytest.mark.django_db
+def test_notification_digest(event, order, user, monkeypatch_on_commit):
+    djmail.outbox = []
+    user.notifications_digest = True
+    user.save()
+    user.notification_settings.create(
+        method='mail', event=None, action_type='pretix.event.order.paid', enabled=True
+    )
+    with transaction.atomic():
+        order.log_action('pretix.event.order.paid', {})
+    send_queued_notifications(None)
+    assert len(djmail.outbox) == 0
+
+    user.queued_notifications.update(created=now() - timedelta(hours=2))
+    send_queued_notifications(None)
+    assert len(djmail.outbox) == 1
+    assert not user.queued_notifications.exists()
+
+
+@pytest.mark.django_db
+def test_notification_delivered_immediately(event, order, user, monkeypatch_on_commit):
+    djmail.outbox = []
+    user.notification_settings.create(
+        method='mail', event=None, action_type='pretix.event.order.paid', enabled=True
+    )
+    with transaction.atomic():
+        order.log_action('pretix.event.order.paid', {})
+    assert len(djmail.outbox) == 1
+    assert not user.queued_notifications.exists()
+
+
+@pytest.mark.django_db
+def test_notification_kept_on_failure(event, order, user, monkeypatch_on_commit, monkeypatch):
+    djmail.outbox = []
+    user.notifications_digest = True
+    user.save()
+    user.notification_settings.create(
+        method='mail', event=None, action_type='pretix.event.order.paid', enabled=True
+    )
+    with transaction.atomic():
+        order.log_action('pretix.event.order.paid', {})
+
+    def fail(*args, **kwargs):
+        raise OSError()
+
+    monkeypatch.setattr('pretix.base.services.notifications.send_notification_mail', fail)
+    deliver_notifications.apply(args=(user.pk, 'mail'))
+    assert user.queued_notifications.count() == 1
+
+    monkeypatch.setattr('pretix.base.services.notifications.send_notification_mail', send_notification_mail)
+    deliver_notifications.apply(args=(user.pk, 'mail'))
     assert len(djmail.outbox) == 1
+    assert not user.queued_notifications.exists()
 
 
 @pytest.mark.django_db
@@ -86,6 +166,7 @@ def test_notification_trigger_global_wildcard(event, order, user, monkeypatch_on
     )
     with transaction.atomic():
         order.log_action('pretix.event.order.changed.item', {})
+    send_queued_notifications(None)
     assert len(djmail.outbox) == 1
 
 
@@ -100,6 +181,7 @@ def test_notification_enabled_global_ignored_specific(event, order, user, monkey
     )
     with transaction.atomic():
         order.log_action('pretix.event.order.paid', {})
+    send_queued_notifications(None)
     assert len(djmail.outbox) == 0
 
 
@@ -111,6 +193,7 @@ def test_notification_ignore_same_user(event, order, user, monkeypatch_on_commit
     )
     with transaction.atomic():
         order.log_action('pretix.event.order.paid', {}, user=user)
+    send_queued_notifications(None)
     assert len(djmail.outbox) == 0
 
 
@@ -124,6 +207,7 @@ def test_notification_ignore_insufficient_permissions(event, order, user, team,
     )
     with transaction.atomic():
         order.log_action('pretix.event.order.paid', {})
+    send_queued_notifications(None)
     assert len(djmail.outbox) == 0
 
 # TODO: Test email content
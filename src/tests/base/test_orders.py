@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from decimal import Decimal
+from unittest import mock
 
 import pytest
 import pytz
@@ -19,8 +20,10 @@ from pretix.base.reldate import RelativeDate, RelativeDateWrapper
 from pretix.base.services.invoices import generate_invoice
 from pretix.base.services.orders import (
     OrderChangeManager, OrderError, _create_order, approve_order, deny_order,
-    expire_orders, send_download_reminders, send_expiry_warnings,
+    expire_orders, mark_orders_expired, send_download_reminders,
+    send_expiry_warnings,
 )
+from pretix.base.signals import order_expired
 
 
 @pytest.fixture
@@ -165,6 +168,52 @@ def test_expiring(event):
     assert o2.invoices.last().is_cancellation is True
 
 
+@pytest.mark.django_db
+def test_expiring_bulk(event):
+    orders = [
+        Order.objects.create(
+            code='FO{}'.format(i), event=event, email='dummy@dummy.test',
+            status=Order.STATUS_PENDING, locale='en',
+            datetime=now(), expires=now() - timedelta(days=10),
+            total=12,
+        ) for i in range(5)
+    ]
+    orders[4].status = Order.STATUS_PAID
+    orders[4].save()
+    generate_invoice(orders[0])
+
+    with mock.patch.object(order_expired, 'send') as send:
+        expired = mark_orders_expired(event, [o.pk for o in orders], batch_size=2)
+
+    assert sorted(expired) == sorted(o.pk for o in orders[:4])
+    assert sorted(c[1]['order'].pk for c in send.call_args_list) == sorted(expired)
+    for o in orders[:4]:
+        o.refresh_from_db()
+        assert o.status == Order.STATUS_EXPIRED
+        assert o.all_logentries().filter(action_type='pretix.event.order.expired').count() == 1
+    orders[4].refresh_from_db()
+    assert orders[4].status == Order.STATUS_PAID
+    assert orders[0].invoices.count() == 2
+    assert orders[0].invoices.last().is_cancellation is True
+
+
+@pytest.mark.django_db
+def test_expiring_bulk_updates_last_activity(event, monkeypatch):
+    monkeypatch.setattr("django.db.transaction.on_commit", lambda t: t())
+    o = Order.objects.create(
+        code='FOO', event=event, email='dummy@dummy.test',
+        status=Order.STATUS_PENDING, locale='en',
+        datetime=now(), expires=now() - timedelta(days=10),
+        total=12,
+    )
+    Event.objects.filter(pk=event.pk).update(last_activity=None)
+    before = now()
+
+    assert mark_orders_expired(event, [o.pk]) == [o.pk]
+    event.refresh_from_db()
+    assert before <= event.last_activity <= now()
+
+
 @pytest.mark.django_db
 def test_expiring_paid_invoice(event):
     o2 = Order.objects.create(
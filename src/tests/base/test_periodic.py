@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+import pytest
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils.timezone import now
+
+from pretix.base.models import Event, Organizer
+from pretix.base.services.periodic import (
+    filter_event_shard, get_receiver_name, get_receivers, periodic,
+    run_receiver,
+)
+from pretix.base.signals import periodic_task
+
+calls = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+
+@periodic(interval=timedelta(minutes=30))
+def _sample_receiver(sender, **kwargs):
+    calls.append(kwargs)
+
+
+@pytest.fixture
+def receiver():
+    calls.clear()
+    periodic_task.connect(_sample_receiver)
+    yield get_receiver_name(_sample_receiver)
+    periodic_task.disconnect(_sample_receiver)
+
+
+def test_registry(receiver):
+    assert get_receivers()[receiver].periodic_interval == timedelta(minutes=30)
+    assert 'pretix.base.services.quotas.build_all_quota_caches' in get_receivers()
+
+
+def test_signal_skips_decorated_receivers(receiver):
+    periodic_task.send_robust(sender=None)
+    assert not calls
+    _sample_receiver(None, foo='bar')
+    assert calls == [{'foo': 'bar'}]
+
+
+@override_settings(CACHES=CACHES)
+def test_run_receiver_interval(receiver):
+    cache.clear()
+    assert run_receiver(receiver) == 'success'
+    assert run_receiver(receiver) == 'skipped'
+    assert len(calls) == 1
+    assert calls[0]['shard'] == 0
+    assert calls[0]['shards'] == 1
+
+
+@override_settings(CACHES=CACHES)
+def test_run_receiver_locked(receiver):
+    cache.clear()
+    cache.add('pretix_periodic_{}_0_1_lock'.format(receiver), 'other', 60)
+    assert run_receiver(receiver) == 'locked'
+    assert not calls
+
+
+@pytest.mark.django_db
+def test_filter_event_shard():
+    o = Organizer.objects.create(name='Dummy', slug='dummy')
+    events = [
+        Event.objects.create(organizer=o, name='Dummy', slug='dummy{}'.format(i), date_from=now())
+        for i in range(4)
+    ]
+    qs = Event.objects.all()
+    assert filter_event_shard(qs, 'id').count() == 4
+    shards = [set(filter_event_shard(qs, 'id', shard=i, shards=2)) for i in range(2)]
+    assert shards[0] | shards[1] == set(events)
+    assert not shards[0] & shards[1]
@@ -0,0 +1,74 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+
+from pretix.base.models import (
+    Event, Item, Order, OrderPosition, Organizer, Quota, Voucher,
+)
+from pretix.base.services.quotas import (
+    mark_order_quotas_dirty, refresh_quota_caches,
+)
+
+
+@pytest.fixture
+def event():
+    o = Organizer.objects.create(name='Dummy', slug='dummy')
+    return Event.objects.create(
+        organizer=o, name='Dummy', slug='dummy',
+        date_from=now(),
+    )
+
+
+@pytest.fixture
+def quota(event):
+    item = Item.objects.create(event=event, name='Ticket', default_price=Decimal('23.00'))
+    q = Quota.objects.create(event=event, name='Quota', size=1)
+    q.items.add(item)
+    q.availability()
+    return q
+
+
+@pytest.mark.django_db(transaction=True)
+def test_refresh_dirty_quotas(event, quota):
+    o = Order.objects.create(
+        code='FOO', event=event, email='dummy@dummy.test', status=Order.STATUS_PAID,
+        datetime=now(), expires=now() + timedelta(days=10), total=Decimal('23.00'),
+    )
+    OrderPosition.objects.create(order=o, item=quota.items.first(), variation=None, price=Decimal('23.00'))
+
+    refresh_quota_caches()
+    quota.refresh_from_db()
+    assert quota.cached_availability_state == Quota.AVAILABILITY_OK
+
+    mark_order_quotas_dirty([o.pk])
+    refresh_quota_caches()
+    quota.refresh_from_db()
+    assert quota.cached_availability_state == Quota.AVAILABILITY_GONE
+
+
+@pytest.mark.django_db(transaction=True)
+def test_refresh_after_bulk_created_vouchers(event, quota):
+    refresh_quota_caches()
+    vouchers = [Voucher(event=event, item=quota.items.first(), block_quota=True)]
+    Voucher.objects.bulk_create(vouchers)
+    Voucher.bulk_mark_quotas_dirty(vouchers)
+    refresh_quota_caches()
+    quota.refresh_from_db()
+    assert quota.cached_availability_state == Quota.AVAILABILITY_RESERVED
+
+
+@pytest.mark.django_db
+def test_refresh_stale_quotas_of_active_events(event, quota):
+    Quota.objects.filter(pk=quota.pk).update(cached_availability_time=now() - timedelta(hours=3),
+                                             cached_availability_state=Quota.AVAILABILITY_GONE)
+
+    refresh_quota_caches()
+    quota.refresh_from_db()
+    assert quota.cached_availability_state == Quota.AVAILABILITY_GONE
+
+    Event.objects.filter(pk=event.pk).update(last_activity=now())
+    refresh_quota_caches()
+    quota.refresh_from_db()
+    assert quota.cached_availability_state == Quota.AVAILABILITY_OK
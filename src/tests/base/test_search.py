@@ -0,0 +1,117 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+
+from pretix.base.models import (
+    Event, InvoiceAddress, Item, Order, OrderPosition, OrderSearchEntry,
+    Organizer,
+)
+from pretix.base.services.search import (
+    index_missing_orders, orders_matching, positions_matching,
+)
+
+
+@pytest.fixture
+def event():
+    o = Organizer.objects.create(name='Dummy', slug='dummy')
+    return Event.objects.create(
+        organizer=o, name='Dummy', slug='dummy',
+        date_from=now(),
+    )
+
+
+@pytest.fixture
+def order(event):
+    item = Item.objects.create(event=event, name='Ticket', default_price=Decimal('23.00'), admission=True)
+    o = Order.objects.create(
+        code='FOO', event=event, email='dummy@dummy.test', status=Order.STATUS_PENDING,
+        datetime=now(), expires=now() + timedelta(days=10), total=Decimal('23.00'),
+    )
+    OrderPosition.objects.create(order=o, item=item, variation=None, price=Decimal('23.00'),
+                                 attendee_name_parts={'full_name': 'Peter Meier'}, secret='abcdefgh')
+    return o
+
+
+def _orders(event, query):
+    return list(Order.objects.filter(orders_matching(query, event)).values_list('code', flat=True))
+
+
+def _positions(event, query):
+    return list(OrderPosition.objects.filter(positions_matching(query, event)).values_list('order__code', flat=True))
+
+
+@pytest.mark.django_db
+def test_search_order_fields(event, order):
+    assert _orders(event, 'foo') == ['FOO']
+    assert _orders(event, 'dummy-foo') == ['FOO']
+    assert _orders(event, 'dummy@dummy') == ['FOO']
+    assert _orders(event, 'meier') == ['FOO']
+    assert _orders(event, 'abcd') == ['FOO']
+    assert _orders(event, 'bar') == []
+
+
+@pytest.mark.django_db
+def test_search_updated_on_save(event, order):
+    order.email = 'other@example.org'
+    order.save()
+    assert _orders(event, 'dummy@dummy') == []
+    assert _orders(event, 'other@example') == ['FOO']
+
+    InvoiceAddress.objects.create(order=order, company='Acme Corp')
+    assert _orders(event, 'acme') == ['FOO']
+
+    p = order.positions.first()
+    p.attendee_name_parts = {'full_name': 'Paul Schulz'}
+    p.save()
+    assert _positions(event, 'meier') == []
+    assert _positions(event, 'schulz') == ['FOO']
+
+
+@pytest.mark.django_db
+def test_search_email_domain(event, order):
+    assert _orders(event, 'dummy.test') == ['FOO']
+    assert _orders(event, 'other.test') == []
+
+
+@pytest.mark.django_db
+def test_search_not_rebuilt_without_changes(event, order):
+    entries = set(OrderSearchEntry.objects.values_list('pk', flat=True))
+    p = OrderPosition.objects.get(order=order)
+    p.price = Decimal('42.00')
+    p.save()
+    p.save(update_fields=['price'])
+    o = Order.objects.get(pk=order.pk)
+    o.status = Order.STATUS_PAID
+    o.save()
+    assert set(OrderSearchEntry.objects.values_list('pk', flat=True)) == entries
+
+    p.attendee_email = 'peter@example.org'
+    p.save(update_fields=['attendee_email'])
+    assert _positions(event, 'example.org') == ['FOO']
+
+
+@pytest.mark.django_db
+def test_search_positions_by_order(event, order):
+    assert _positions(event, 'dummy@dummy') == ['FOO']
+
+
+@pytest.mark.django_db
+def test_search_unindexed_orders(event, order):
+    OrderSearchEntry.objects.all().delete()
+    assert _orders(event, 'foo') == ['FOO']
+    assert _orders(event, 'dummy-foo') == ['FOO']
+    assert _orders(event, 'dummy@dummy') == ['FOO']
+    assert _orders(event, 'meier') == ['FOO']
+    assert _orders(event, 'bar') == []
+    assert _positions(event, 'abcd') == ['FOO']
+    assert _positions(event, 'dummy@dummy') == ['FOO']
+
+
+@pytest.mark.django_db
+def test_index_missing_orders(event, order):
+    OrderSearchEntry.objects.all().delete()
+    index_missing_orders(None)
+    assert OrderSearchEntry.objects.filter(order=order).count() == 2
+    assert _orders(event, 'foo') == ['FOO']
@@ -2,16 +2,18 @@ import json
 import os
 from datetime import timedelta
 from decimal import Decimal
+from zipfile import ZipFile
 
 import pytest
 from django.core.files.base import ContentFile
 from django.utils.timezone import now
 
 from pretix.base.models import (
-    CachedCombinedTicket, CachedTicket, Event, InvoiceAddress, Order,
-    OrderPayment, OrderPosition, Organizer, QuestionAnswer,
+    CachedCombinedTicket, CachedFile, CachedTicket, Event, InvoiceAddress,
+    Order, OrderPayment, OrderPosition, Organizer, QuestionAnswer,
 )
 from pretix.base.services.invoices import generate_invoice, invoice_pdf_task
+from pretix.base.services.shredder import export
 from pretix.base.services.tickets import generate
 from pretix.base.shredder import (
     AttendeeNameShredder, CachedTicketShredder, EmailAddressShredder,
@@ -355,3 +357,21 @@ def test_shred_constraint_60_days_subevents(event):
         date_to=now() - timedelta(days=52)
     )
     assert shred_constraints(event)
+
+
+@pytest.mark.django_db
+def test_export_zip(event, order):
+    inv = generate_invoice(order)
+    invoice_pdf_task.apply(args=(inv.pk,))
+    inv.refresh_from_db()
+    with inv.file.open('rb'):
+        pdf = inv.file.read()
+
+    cf = CachedFile.objects.get(pk=export(event.pk, ['order_emails', 'invoices']))
+    with cf.file.open('rb'):
+        zipf = ZipFile(cf.file)
+        assert set(zipf.namelist()) == {
+            'CONFIRM_CODE.txt', 'index.json', 'emails-by-order.json', 'emails-by-attendee.json',
+            'invoices/{}.pdf'.format(inv.number)
+        }
+        assert zipf.read('invoices/{}.pdf'.format(inv.number)) == pdf
@@ -0,0 +1,111 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import pytest
+from django.utils.timezone import now
+
+from pretix.base.models import (
+    Event, Item, Order, OrderPosition, Organizer, SalesStatistic,
+    SalesStatisticsWatermark,
+)
+from pretix.base.models.orders import OrderFee
+from pretix.base.services.stats import (
+    order_overview, refresh_all_sales_statistics, refresh_sales_statistics,
+)
+
+
+@pytest.fixture
+def event():
+    o = Organizer.objects.create(name='Dummy', slug='dummy')
+    return Event.objects.create(
+        organizer=o, name='Dummy', slug='dummy',
+        date_from=now(),
+    )
+
+
+@pytest.fixture
+def item(event):
+    return Item.objects.create(event=event, name='Ticket', default_price=Decimal('23.00'), admission=True)
+
+
+def _order(event, item, code, status=Order.STATUS_PENDING, days_ago=0):
+    o = Order.objects.create(
+        code=code, event=event, email='dummy@dummy.test', status=status,
+        datetime=now() - timedelta(days=days_ago), expires=now() + timedelta(days=10),
+        total=Decimal('25.00'),
+    )
+    OrderPosition.objects.create(order=o, item=item, variation=None, price=Decimal('23.00'))
+    OrderFee.objects.create(order=o, fee_type=OrderFee.FEE_TYPE_PAYMENT, value=Decimal('2.00'),
+                            tax_value=Decimal('0.00'), tax_rate=Decimal('0.00'))
+    return o
+
+
+@pytest.fixture
+def monkeypatch_on_commit(monkeypatch):
+    monkeypatch.setattr("django.db.transaction.on_commit", lambda t: t())
+
+
+@pytest.mark.django_db
+def test_overview_incremental(event, item):
+    o1 = _order(event, item, 'FOO1')
+    _order(event, item, 'FOO2', status=Order.STATUS_PAID, days_ago=3)
+
+    refresh_sales_statistics(event)
+    items_by_category, total = order_overview(event)
+    assert total['num']['pending'][0] == 1
+    assert total['num']['paid'][0] == 1
+    assert total['num']['total'][0] == 2
+    assert SalesStatistic.objects.filter(event=event, kind=SalesStatistic.KIND_ORDER).count() == 2
+
+    Order.objects.filter(pk=o1.pk).update(status=Order.STATUS_PAID, last_modified=now())
+    refresh_sales_statistics(event)
+    items_by_category, total = order_overview(event)
+    assert total['num']['pending'][0] == 0
+    assert total['num']['paid'] == (2, Decimal('50.00'), Decimal('50.00'))
+
+
+@pytest.mark.django_db
+def test_refresh_on_status_change(event, item, monkeypatch_on_commit):
+    o1 = _order(event, item, 'FOO1')
+    refresh_sales_statistics(event)
+
+    o1.status = Order.STATUS_PAID
+    o1.save(update_fields=['status'])
+    items_by_category, total = order_overview(event)
+    assert total['num']['pending'][0] == 0
+    assert total['num']['paid'][0] == 1
+
+
+@pytest.mark.django_db
+def test_periodic_compares_watermark(event, item):
+    o1 = _order(event, item, 'FOO1')
+    refresh_sales_statistics(event)
+    SalesStatisticsWatermark.objects.filter(event=event).update(last_modified=now() - timedelta(hours=2))
+    Order.objects.filter(pk=o1.pk).update(status=Order.STATUS_PAID, last_modified=now() - timedelta(hours=1))
+
+    refresh_all_sales_statistics(None)
+    items_by_category, total = order_overview(event)
+    assert total['num']['paid'][0] == 1
+
+
+@pytest.mark.django_db
+def test_rebuild(event, item):
+    _order(event, item, 'FOO1')
+    refresh_sales_statistics(event)
+    SalesStatistic.objects.filter(event=event).update(count=42)
+
+    refresh_sales_statistics(event, rebuild=True)
+    assert list(SalesStatistic.objects.filter(event=event).values_list('kind', 'count').order_by('kind')) == [
+        (SalesStatistic.KIND_FEE, 1), (SalesStatistic.KIND_ORDER, 1), (SalesStatistic.KIND_POSITION, 1),
+    ]
+
+
+@pytest.mark.django_db
+def test_periodic_builds_missing_statistics(event, item):
+    Order.objects.filter(pk=_order(event, item, 'FOO1').pk).update(last_modified=now() - timedelta(days=1))
+    items_by_category, total = order_overview(event)
+    assert total['num']['total'][0] == 0
+
+    refresh_all_sales_statistics(None)
+    items_by_category, total = order_overview(event)
+    assert total['num']['total'][0] == 1
@@ -122,6 +122,30 @@ class WaitingListTestCase(TestCase):
             'foo0@bar.com', 'foo1@bar.com', 'foo2@bar.com'
         ]
 
+    def test_send_auto_shared_quota(self):
+        self.quota.variations.add(self.var1)
+        self.quota.items.add(self.item1)
+        self.quota.size = 5
+        self.quota.save()
+        for i in range(5):
+            WaitingListEntry.objects.create(
+                event=self.event, item=self.item2, variation=self.var1, email='foo{}@bar.com'.format(i)
+            )
+            WaitingListEntry.objects.create(
+                event=self.event, item=self.item1, email='bar{}@bar.com'.format(i)
+            )
+
+        assign_automatically.apply(args=(self.event.pk,))
+        assert WaitingListEntry.objects.filter(voucher__isnull=True).count() == 5
+        assert Voucher.objects.filter(block_quota=True, max_usages=1, tag='waiting-list').count() == 5
+        assert len(djmail.outbox) == 5
+        for wle in WaitingListEntry.objects.filter(voucher__isnull=False):
+            assert wle.voucher.item == wle.item
+            assert wle.email in wle.voucher.comment
+            assert any(wle.voucher.code in m.body for m in djmail.outbox)
+            assert wle.all_logentries().filter(action_type='pretix.waitinglist.voucher').count() == 1
+            assert wle.voucher.all_logentries().filter(action_type='pretix.voucher.added.waitinglist').count() == 1
+
     def test_send_auto_quota_infinite(self):
         self.quota.variations.add(self.var1)
         self.quota.size = None
@@ -540,6 +540,43 @@ class EventsTest(SoupTest):
 
         assert ev.tax_rules.filter(rate=Decimal('19.00')).exists()
 
+    def test_create_event_copy_async(self):
+        self.event1.settings.timezone = 'America/New_York'
+        i1 = self.event1.items.create(name='Ticket', default_price=Decimal('23.00'))
+        self.event1.quotas.create(name='Tickets', size=10).items.add(i1)
+        self.post_doc('/control/events/add', {
+            'event_wizard-current_step': 'foundation',
+            'foundation-organizer': self.orga1.pk,
+            'foundation-locales': ('en',)
+        })
+        self.post_doc('/control/events/add', {
+            'event_wizard-current_step': 'basics',
+            'basics-name_0': '33C3',
+            'basics-slug': '33c3',
+            'basics-date_from_0': '2016-12-27',
+            'basics-date_from_1': '10:00:00',
+            'basics-date_to_0': '2016-12-30',
+            'basics-date_to_1': '19:00:00',
+            'basics-location_0': 'Hamburg',
+            'basics-currency': 'EUR',
+            'basics-tax_rate': '',
+            'basics-locale': 'en',
+            'basics-timezone': 'Europe/Berlin',
+        })
+        with mocker_context() as mocker:
+            mocker.patch('pretix.control.views.main.ASYNC_COPY_THRESHOLD', 1)
+            resp = self.client.post('/control/events/add', {
+                'event_wizard-current_step': 'copy',
+                'copy-copy_from_event': self.event1.pk
+            })
+
+        ev = Event.objects.get(slug='33c3')
+        self.assertRedirects(resp, '/control/event/ccc/33c3/settings/?congratulations=1', fetch_redirect_response=False)
+        assert ev.settings.timezone == 'Europe/Berlin'
+        i1new = ev.items.get()
+        assert i1new.name == 'Ticket'
+        assert list(ev.quotas.get().items.all()) == [i1new]
+
     def test_create_event_with_subevents_success(self):
         doc = self.get_doc('/control/events/add')
         tabletext = doc.select("form")[0].text
@@ -943,6 +980,10 @@ class SubEventsTest(SoupTest):
 
         assert ses[-1].date_from.isoformat() == "2027-04-03T11:29:31+00:00"
 
+        le = self.event1.logentry_set.get(action_type='pretix.subevent.added.bulk')
+        assert le.parsed_data['count'] == 10
+        assert le.parsed_data['time_from'] == '13:29:31'
+
     def test_create_bulk_daily_interval(self):
         self.event1.subevents.all().delete()
         self.event1.settings.timezone = 'Europe/Berlin'
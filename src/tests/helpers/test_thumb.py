@@ -0,0 +1,73 @@
+from io import BytesIO
+
+import pytest
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from PIL import Image, features
+from tests import assert_num_queries
+
+from pretix.base.services.thumbnails import pregenerate_thumbnails
+from pretix.helpers.models import Thumbnail
+from pretix.helpers.thumb import ThumbnailError, _cache_key, get_thumbnail
+
+
+@pytest.fixture
+def source():
+    buffer = BytesIO()
+    Image.new('RGB', (300, 200), (255, 0, 0)).save(buffer, format='PNG')
+    return default_storage.save('pub/test/picture.png', ContentFile(buffer.getvalue()))
+
+
+@pytest.mark.django_db
+def test_create_once(source):
+    t = get_thumbnail(source, '60x60^')
+    assert t.thumb.name.endswith('.60x60c.png')
+    assert Image.open(t.thumb).size == (60, 60)
+    assert get_thumbnail(source, '60x60^').thumb.name == t.thumb.name
+    assert Thumbnail.objects.filter(source=source, size='60x60^').count() == 1
+
+
+@pytest.mark.django_db
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test_thumb',
+    }
+})
+def test_lookup_cached(source):
+    t = get_thumbnail(source, '5000x120')
+    with assert_num_queries(0):
+        assert get_thumbnail(source, '5000x120').thumb.url == t.thumb.url
+
+
+@pytest.mark.django_db
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test_thumb_lock',
+    }
+})
+def test_wait_for_other_process(source, monkeypatch):
+    monkeypatch.setattr('pretix.helpers.thumb.LOCK_WAIT', 0.2)
+    cache.add(_cache_key('lock', source, '60x60^'), 'locked')
+    with pytest.raises(ThumbnailError):
+        get_thumbnail(source, '60x60^')
+    assert not Thumbnail.objects.filter(source=source).exists()
+
+
+@pytest.mark.django_db
+def test_pregenerate(source):
+    pregenerate_thumbnails.apply_async(args=(source, ('60x60^', '5000x120')))
+    assert set(Thumbnail.objects.filter(source=source).values_list('size', flat=True)) == {'60x60^', '5000x120'}
+
+
+@pytest.mark.django_db
+@override_settings(PRETIX_THUMBNAILS_WEBP=True)
+def test_webp(source):
+    if not features.check_module('webp'):
+        pytest.skip('Pillow has been built without WebP support')
+    t = get_thumbnail(source, '60x60^')
+    assert t.thumb.name.endswith('.webp')
+    assert Image.open(t.thumb).format == 'WEBP'
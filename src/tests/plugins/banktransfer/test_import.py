@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from datetime import timedelta
 from decimal import Decimal
 
@@ -10,7 +11,7 @@ from pretix.base.models import (
     Event, Item, Order, OrderPayment, OrderPosition, Organizer, Quota, Team,
     User,
 )
-from pretix.plugins.banktransfer.models import BankImportJob
+from pretix.plugins.banktransfer.models import BankImportJob, BankTransaction
 from pretix.plugins.banktransfer.tasks import process_banktransfers
 
 
@@ -110,6 +111,61 @@ def test_mark_paid(env, job):
     assert env[2].status == Order.STATUS_PAID
 
 
+@pytest.mark.django_db
+def test_batch(env, job):
+    row = {
+        'payer': 'Karla Kundin',
+        'reference': 'Bestellung DUMMY1Z3AS',
+        'date': '2016-01-26',
+        'amount': '10.00'
+    }
+    process_banktransfers(job, [
+        row,
+        row,
+        dict(row, amount='13.00'),
+        dict(row, reference='Bestellung DUMMY6789Z'),
+        dict(row, reference='Bestellung DUMMYAAAAA'),
+        dict(row, reference='Nothing'),
+    ])
+    env[2].refresh_from_db()
+    assert env[2].status == Order.STATUS_PAID
+    assert env[2].payments.count() == 2
+
+    j = BankImportJob.objects.get(pk=job)
+    assert j.rows_total == 6
+    assert j.rows_processed == 6
+    assert sorted(j.transactions.values_list('state', flat=True)) == [
+        BankTransaction.STATE_ERROR, BankTransaction.STATE_NOMATCH, BankTransaction.STATE_NOMATCH,
+        BankTransaction.STATE_VALID, BankTransaction.STATE_VALID,
+    ]
+
+
+@pytest.mark.django_db
+def test_mail_sent_after_releasing_lock(env, job, monkeypatch):
+    held = []
+
+    @contextmanager
+    def lock(self):
+        held.append(self.pk)
+        try:
+            yield
+        finally:
+            held.pop()
+
+    sent = []
+    monkeypatch.setattr(Event, 'lock', lock)
+    monkeypatch.setattr(Order, 'send_mail', lambda self, *args, **kwargs: sent.append(list(held)))
+    process_banktransfers(job, [{
+        'payer': 'Karla Kundin',
+        'reference': 'Bestellung DUMMY1234S',
+        'date': '2016-01-26',
+        'amount': '23.00'
+    }])
+    env[2].refresh_from_db()
+    assert env[2].status == Order.STATUS_PAID
+    assert sent == [[]]
+
+
 @pytest.mark.django_db
 def test_underpaid(env, job):
     process_banktransfers(job, [{
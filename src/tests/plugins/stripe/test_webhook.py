@@ -3,11 +3,14 @@ from datetime import timedelta
 from decimal import Decimal
 
 import pytest
+import stripe
 from django.utils.timezone import now
 
 from pretix.base.models import (
-    Event, Order, OrderPayment, OrderRefund, Organizer, Team, User,
+    Event, IncomingWebhook, Order, OrderPayment, OrderRefund, Organizer, Team,
+    User,
 )
+from pretix.base.services.webhooks import process_webhooks
 from pretix.plugins.stripe.models import ReferencedStripeObject
 
 
@@ -298,3 +301,58 @@ def test_webhook_global_legacy_reference(env, client, monkeypatch):
     order.refresh_from_db()
     assert order.status == Order.STATUS_PAID
     assert list(order.payments.all()) == [payment]
+
+
+@pytest.mark.django_db
+def test_webhook_deduplicated_and_retried(env, client, monkeypatch):
+    order = env[1]
+    order.status = Order.STATUS_PENDING
+    order.save()
+
+    charge = get_test_charge(env[1])
+    calls = []
+
+    def retrieve(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise stripe.error.APIConnectionError('Stripe is down')
+        return charge
+
+    monkeypatch.setattr("stripe.Charge.retrieve", retrieve)
+    payment = order.payments.create(
+        provider='stripe', amount=order.total, info=json.dumps(charge), state=OrderPayment.PAYMENT_STATE_CREATED
+    )
+    ReferencedStripeObject.objects.create(order=order, reference="ch_18TY6GGGWE2Ias8TZHanef25",
+                                          payment=payment)
+    payload = json.dumps({
+        "id": "evt_18otImGGWE2Ias8TUyVRDB1G",
+        "object": "event",
+        "data": {
+            "object": {
+                "id": "ch_18TY6GGGWE2Ias8TZHanef25",
+                "object": "charge",
+            }
+        },
+        "type": "charge.succeeded"
+    })
+
+    # The first attempt fails, but the notification is acknowledged anyway and retried in the background
+    assert client.post('/_stripe/webhook/', payload, content_type='application_json').status_code == 200
+    wh = IncomingWebhook.objects.get()
+    assert wh.state == IncomingWebhook.STATE_PENDING
+    assert wh.next_attempt > now()
+
+    # Duplicates are acknowledged, but not processed again
+    assert client.post('/_stripe/webhook/', payload, content_type='application_json').status_code == 200
+    assert len(calls) == 1
+
+    IncomingWebhook.objects.update(next_attempt=now())
+    process_webhooks.apply(args=(wh.ordering_key,))
+
+    order.refresh_from_db()
+    assert order.status == Order.STATUS_PAID
+    assert len(calls) == 2
+    wh = IncomingWebhook.objects.get()
+    assert wh.state == IncomingWebhook.STATE_DONE
+    assert wh.attempts == 2
+    assert wh.order == order
@@ -1,6 +1,7 @@
 from datetime import datetime, timedelta
 
 import pytest
+from django.test import override_settings
 from django.utils.timezone import now
 from pytz import UTC
 
@@ -137,6 +138,26 @@ def test_calendar(env, client):
     assert 'October 2017' in r.rendered_content
 
 
+@pytest.mark.django_db
+def test_calendar_status(env, client):
+    env[0].settings.event_list_type = 'calendar'
+    e = Event.objects.create(
+        organizer=env[0], name='MRMCD2017', slug='2017',
+        date_from=datetime(now().year + 1, 9, 1, tzinfo=UTC),
+        live=True, is_public=True, has_subevents=True
+    )
+    e.subevents.create(date_from=datetime(now().year + 1, 9, 1, tzinfo=UTC), name='SE1', active=True,
+                       presale_end=now() - timedelta(days=1))
+    e.subevents.create(date_from=datetime(now().year + 1, 9, 2, tzinfo=UTC), name='SE2', active=True,
+                       presale_start=now() + timedelta(days=1))
+    e.settings.presale_start_show_date = False
+    r = client.get('/mrmcd/?style=calendar&month=9&year=%d' % (now().year + 1))
+    assert 'SE1' in r.rendered_content
+    assert 'Sale over' in r.rendered_content
+    assert 'SE2' in r.rendered_content
+    assert 'Soon' in r.rendered_content
+
+
 @pytest.mark.django_db
 def test_attributes_in_calendar(env, client):
     env[0].settings.event_list_type = 'calendar'
@@ -169,6 +190,31 @@ def test_ics(env, client):
     assert b'MRMCD2017' in r.content
 
 
+@pytest.mark.django_db
+@override_settings(CACHES={
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test_ics_etag',
+    }
+})
+def test_ics_etag(env, client):
+    Event.objects.create(
+        organizer=env[0], name='MRMCD2017', slug='2017',
+        date_from=datetime(now().year + 1, 9, 1, tzinfo=UTC),
+        live=True, is_public=True
+    )
+    r = client.get('/mrmcd/events/ical/')
+    assert r.status_code == 200
+    assert r['ETag']
+    assert r.content.startswith(b'BEGIN:VCALENDAR')
+    assert r.content.endswith(b'END:VCALENDAR\r\n')
+    assert r.content.count(b'BEGIN:VEVENT') == 1
+    r = client.get('/mrmcd/events/ical/', HTTP_IF_NONE_MATCH=r['ETag'])
+    assert r.status_code == 304
+    r = client.get('/mrmcd/events/ical/', HTTP_IF_NONE_MATCH='"foo"')
+    assert r.status_code == 200
+
+
 @pytest.mark.django_db
 def test_ics_subevents(env, client):
     e = Event.objects.create(
@@ -4,10 +4,10 @@ from decimal import Decimal
 
 from bs4 import BeautifulSoup
 from django.conf import settings
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.utils.timezone import now
 
-from pretix.base.models import Order, OrderPosition
+from pretix.base.models import Item, Order, OrderPosition
 from pretix.presale.style import regenerate_css, regenerate_organizer_css
 
 from .test_cart import CartTestMixin
@@ -196,6 +196,27 @@ class WidgetCartTest(CartTestMixin, TestCase):
             "cart_exists": False
         }
 
+    @override_settings(REAL_CACHE_USED=True, CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }})
+    def test_product_list_view_conditional(self):
+        response = self.client.get('/%s/%s/widget/product_list' % (self.orga.slug, self.event.slug))
+        assert response.status_code == 200
+        etag = response['ETag']
+        response = self.client.get('/%s/%s/widget/product_list' % (self.orga.slug, self.event.slug),
+                                   HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response['Access-Control-Allow-Origin'] == '*'
+
+        # Load the product again, its event has been bound to the dummy cache before the settings were overridden
+        ticket = Item.objects.get(pk=self.ticket.pk)
+        ticket.default_price = Decimal('24.00')
+        ticket.save()
+        response = self.client.get('/%s/%s/widget/product_list' % (self.orga.slug, self.event.slug),
+                                   HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
     def test_product_list_view_with_voucher(self):
         self.event.vouchers.create(item=self.ticket, code="ABCDE")
         response = self.client.get('/%s/%s/widget/product_list?voucher=ABCDE' % (self.orga.slug, self.event.slug))